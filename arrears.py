@@ -0,0 +1,200 @@
+import time
+import pandas as pd
+
+from payroll_engine import PAYROLL_COLUMNS, compute_payroll, input_hashes, load_payroll_inputs
+from periods import month_bounds
+from statutory import load_statutory_rules, rules_for_period, rules_fingerprint
+
+# Retro pay: months with arrears recorded are never regenerated (generate_payroll refuses), and
+# arrears only look at (employee, month) pairs something changed for after the month was paid:
+# a salary revision created since, attendance uploaded since, or a statutory rule version added
+# since. Only those pairs' inputs are loaded; each is hashed and compared with the hash it was
+# settled with (the payroll row's, or that of its latest arrears row), and the ones that moved
+# are recomputed and compared with what was paid. The difference is recorded in payroll_arrears
+# against the cycle that pays it, however many changes caused it.
+
+AMOUNT_COLUMNS = PAYROLL_COLUMNS[1:]
+
+# Temp table of the employees looked at for the period being processed
+CANDIDATES = 'arrears_candidates'
+
+
+def arrears_periods(conn, month, year, since=None):
+    # Paid months before the cycle, from since = (year, month) if given, with when each was paid
+    since_year, since_month = since or (0, 0)
+    periods = conn.execute("""
+        SELECT year, month FROM stats_payroll_period
+        WHERE employees > 0 AND (year, month) < (?, ?) AND (year, month) >= (?, ?)
+        ORDER BY year, month
+    """, (year, month, since_year, since_month)).fetchall()
+    # One seek of idx_payroll_period_generated each; a period's first payroll run is the cut-off
+    # for what counts as a later change
+    return [(p_year, p_month, conn.execute("""
+        SELECT MIN(generated_at) FROM payroll WHERE year = ? AND month = ?
+    """, (p_year, p_month)).fetchone()[0]) for p_year, p_month in periods]
+
+
+def changed_salaries(conn, periods):
+    # Revisions created after the earliest payroll run looked at; few, so filtered per period here
+    paid_since = min(paid_at for _, _, paid_at in periods)
+    return pd.read_sql_query("""
+        SELECT employee_id, effective_from, created_at FROM salary_revisions WHERE created_at >= ?
+    """, conn, params=(paid_since,))
+
+
+def changed_rules(conn, periods):
+    paid_since = min(paid_at for _, _, paid_at in periods)
+    return conn.execute("""
+        SELECT effective_from, created_at FROM statutory_rates WHERE created_at >= ?
+        UNION ALL
+        SELECT effective_from, created_at FROM statutory_slabs WHERE created_at >= ?
+    """, (paid_since, paid_since)).fetchall()
+
+
+def find_candidates(conn, p_month, p_year, paid_at, salaries, rules):
+    # Fills CANDIDATES with the employees of the period whose inputs may have changed since it
+    # was paid; returns how many there are
+    period_start, period_end = month_bounds(p_year, p_month)
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {CANDIDATES} (employee_id INTEGER PRIMARY KEY)")
+    with conn:
+        conn.execute(f"DELETE FROM {CANDIDATES}")
+        if any(effective_from <= period_start and created_at >= paid_at for effective_from, created_at in rules):
+            # A rule version for the month added since: everyone in it
+            conn.execute(f"""
+                INSERT INTO {CANDIDATES} (employee_id)
+                SELECT employee_id FROM payroll WHERE year = ? AND month = ? AND input_hash IS NOT NULL
+            """, (p_year, p_month))
+        else:
+            # Attendance uploaded late: one seek of idx_attendance_date_uploaded per day
+            days = pd.date_range(period_start, period_end).strftime('%Y-%m-%d').tolist()
+            conn.execute(f"""
+                INSERT OR IGNORE INTO {CANDIDATES} (employee_id)
+                SELECT DISTINCT employee_id FROM attendance
+                WHERE date IN ({', '.join('?' * len(days))}) AND uploaded_at >= ?
+            """, days + [paid_at])
+            revised = salaries[(salaries['effective_from'] <= period_end) & (salaries['created_at'] >= paid_at)]
+            conn.executemany(f"INSERT OR IGNORE INTO {CANDIDATES} (employee_id) VALUES (?)",
+                             ((employee_id,) for employee_id in revised['employee_id'].unique().tolist()))
+    return conn.execute(f"SELECT COUNT(*) FROM {CANDIDATES}").fetchone()[0]
+
+
+def settled_payroll(conn, month, year, cycle_month, cycle_year):
+    # Per candidate employee: what the period has paid so far (payroll row plus arrears from
+    # other cycles) and the input hash the latest of those was computed from. Payroll rows
+    # without a hash (imported pay registers) were not computed here and are left alone.
+    paid = pd.read_sql_query(f"""
+        SELECT p.employee_id, p.input_hash, {', '.join(f'p.{col}' for col in AMOUNT_COLUMNS)}
+        FROM {CANDIDATES} t
+        CROSS JOIN payroll p ON p.employee_id = t.employee_id AND p.month = ? AND p.year = ?
+        WHERE p.input_hash IS NOT NULL
+    """, conn, params=(month, year)).set_index('employee_id')
+    arrears = pd.read_sql_query(f"""
+        SELECT r.employee_id, r.cycle_year, r.cycle_month, r.input_hash,
+               {', '.join(f'r.{col}' for col in AMOUNT_COLUMNS)}
+        FROM {CANDIDATES} t
+        CROSS JOIN payroll_arrears r ON r.employee_id = t.employee_id AND r.year = ? AND r.month = ?
+        ORDER BY r.cycle_year, r.cycle_month
+    """, conn, params=(year, month))
+    if arrears.empty:
+        return paid
+    latest = arrears.groupby('employee_id')['input_hash'].last()
+    latest = latest[latest.index.isin(paid.index)]
+    paid.loc[latest.index, 'input_hash'] = latest
+    earlier = arrears[(arrears['cycle_year'] != cycle_year) | (arrears['cycle_month'] != cycle_month)]
+    settled = earlier.groupby('employee_id')[AMOUNT_COLUMNS].sum().reindex(paid.index, fill_value=0)
+    paid[AMOUNT_COLUMNS] = paid[AMOUNT_COLUMNS] + settled
+    return paid
+
+
+def period_arrears(conn, p_month, p_year, month, year, rules):
+    # Compares the candidates already in CANDIDATES; returns (employees compared, deltas or None)
+    settled = settled_payroll(conn, p_month, p_year, month, year)
+    if settled.empty:
+        return 0, None
+    period_rules = rules_for_period(rules, month_bounds(p_year, p_month)[0])
+    inputs = load_payroll_inputs(conn, p_month, p_year, employees=CANDIDATES)
+    inputs['rules'] = rules_fingerprint(period_rules)
+    inputs['input_hash'] = input_hashes(inputs)
+    inputs = inputs[inputs['employee_id'].isin(settled.index)]
+    changed = inputs[inputs['input_hash'].to_numpy() != settled.loc[inputs['employee_id'], 'input_hash'].to_numpy()]
+    if changed.empty:
+        return len(inputs), None
+
+    payroll = compute_payroll(changed, p_month, p_year, period_rules).set_index('employee_id')
+    deltas = (payroll[AMOUNT_COLUMNS] - settled.loc[payroll.index, AMOUNT_COLUMNS]).round(2)
+    deltas['input_hash'] = changed.set_index('employee_id')['input_hash']
+    deltas['year'] = p_year
+    deltas['month'] = p_month
+    return len(inputs), deltas.reset_index()
+
+
+def write_arrears(conn, arrears, month, year, generated_by):
+    count = len(arrears)
+    rows = zip(
+        arrears['employee_id'].astype('int64').tolist(),
+        arrears['year'].tolist(),
+        arrears['month'].tolist(),
+        [year] * count,
+        [month] * count,
+        *(arrears[col].tolist() for col in AMOUNT_COLUMNS),
+        arrears['input_hash'].astype('int64').tolist(),
+        [generated_by] * count,
+    )
+    with conn:
+        conn.executemany(f"""
+            INSERT INTO payroll_arrears (employee_id, year, month, cycle_year, cycle_month,
+                                         {', '.join(AMOUNT_COLUMNS)}, input_hash, generated_by)
+            VALUES (?, ?, ?, ?, ?, {', '.join('?' * len(AMOUNT_COLUMNS))}, ?, ?)
+            ON CONFLICT (employee_id, year, month, cycle_year, cycle_month) DO UPDATE SET
+                {', '.join(f'{col} = excluded.{col}' for col in AMOUNT_COLUMNS)},
+                input_hash = excluded.input_hash,
+                generated_by = excluded.generated_by,
+                generated_at = CURRENT_TIMESTAMP
+        """, rows)
+        # A change undone before the cycle closed leaves nothing owed either way
+        conn.execute(f"""
+            DELETE FROM payroll_arrears
+            WHERE cycle_year = ? AND cycle_month = ? AND {' AND '.join(f'{col} = 0' for col in AMOUNT_COLUMNS)}
+        """, (year, month))
+
+
+def compute_arrears(conn, month, year, generated_by, since=None, progress=None):
+    # Arrears for every earlier paid month, recorded against the (month, year) cycle. Rerunning
+    # within the same cycle replaces that cycle's rows rather than adding to them.
+    start = time.perf_counter()
+    periods = arrears_periods(conn, month, year, since)
+    candidates = 0
+    checked = 0
+    results = []
+    if periods:
+        rules = load_statutory_rules(conn)
+        salaries = changed_salaries(conn, periods)
+        changed = changed_rules(conn, periods)
+    for done, (p_year, p_month, paid_at) in enumerate(periods, start=1):
+        found = find_candidates(conn, p_month, p_year, paid_at, salaries, changed)
+        candidates += found
+        if found:
+            count, deltas = period_arrears(conn, p_month, p_year, month, year, rules)
+            checked += count
+            if deltas is not None:
+                results.append(deltas)
+        if progress:
+            progress(int(done * 90 / len(periods)))
+
+    arrears = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=AMOUNT_COLUMNS)
+    if len(arrears):
+        write_arrears(conn, arrears, month, year, generated_by)
+    owed = arrears[(arrears[AMOUNT_COLUMNS] != 0).any(axis=1)] if len(arrears) else arrears
+    if progress:
+        progress(100)
+    return {
+        'periods': len(periods),
+        'candidates': candidates,
+        'checked': checked,
+        'recomputed': len(arrears),
+        'arrears': len(owed),
+        'employees': int(owed['employee_id'].nunique()) if len(owed) else 0,
+        'gross': float(owed['gross'].sum()) if len(owed) else 0.0,
+        'net': float(owed['net_salary'].sum()) if len(owed) else 0.0,
+        'seconds': time.perf_counter() - start,
+    }
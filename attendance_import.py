@@ -0,0 +1,303 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+import dashboard_stats
+
+# Rows per batch for streaming imports; each batch is read, written and committed on its own
+CHUNK_SIZE = 50_000
+
+REQUIRED_COLUMNS = ['employee_id', 'date']
+OPTIONAL_COLUMNS = ['check_in', 'check_out']
+
+# Employee codes are text: read as numbers, "00123" would lose its zeros, and only in the
+# chunks where every code happens to be numeric
+CODE_DTYPES = {'employee_id': str}
+
+# Tried in order; each pass only looks at the values the previous ones could not parse
+DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d', '%d-%m-%Y', '%Y-%m-%d %H:%M:%S']
+TIME_FORMATS = ['%H:%M', '%H:%M:%S', '%I:%M %p', '%I:%M:%S %p']
+
+# "HH:MM" label for every minute of the day; much faster than strftime on large columns
+TIME_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)], dtype=object)
+
+# Hours between the punches needed for a full day and for a half day; less is an absence
+FULL_DAY_HOURS = 6.0
+HALF_DAY_HOURS = 3.0
+
+# Share of a paid day each status adds to payroll's payable_days; other statuses (present,
+# off, holiday, leave) count as a whole day
+PAID_FRACTIONS = {'half_day': 0.5, 'absent': 0.0}
+
+# Statuses attendance_hours derives from the punches when the source gives none
+DERIVED_STATUSES = ['present', 'half_day', 'absent']
+
+
+def parse_column(values, formats):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    text = values.astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors='coerce')
+    return parsed
+
+
+def _minutes(parsed):
+    # Minutes past midnight as floats, NaN where the time is missing
+    return parsed.dt.hour * 60 + parsed.dt.minute
+
+
+def _format_times(minutes):
+    labels = pd.Series(TIME_LABELS[minutes.fillna(0).to_numpy(dtype='int64')], index=minutes.index)
+    return labels.where(minutes.notna())
+
+
+def attendance_hours(check_in, check_out, status):
+    # Column-wise hours_worked, status and paid_fraction from punch times in minutes. A check-out
+    # earlier than the check-in is an overnight shift; 0:00/0:00 is how the sheets mark an
+    # absence. A status given by the source (e.g. the workbook register) is kept as is, and a
+    # day with a missing punch can't be judged, so it stays present.
+    worked = check_out - check_in
+    worked = worked.where(worked >= 0, worked + 24 * 60)
+    hours = (worked / 60).round(2).mask((check_in == 0) & (check_out == 0), 0.0)
+    derived = pd.Series(np.select(
+        [hours >= FULL_DAY_HOURS, hours >= HALF_DAY_HOURS, hours.notna()],
+        ['present', 'half_day', 'absent'], 'present',
+    ), index=hours.index)
+    status = status.where(status.notna(), derived)
+    paid = status.map(PAID_FRACTIONS).fillna(1.0)
+    return hours, status, paid
+
+
+def to_nullable(values):
+    # sqlite3 needs None, not NaN, for NULL
+    return values.astype(object).where(values.notna(), None)
+
+
+def normalize_attendance(df):
+    # Column-wise clean-up: codes stripped, dates as YYYY-MM-DD, times as minutes past midnight
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    out = pd.DataFrame(index=df.index)
+    out['employee_code'] = df['employee_id'].astype(str).str.strip()
+    out['date'] = parse_column(df['date'], DATE_FORMATS).dt.strftime('%Y-%m-%d')
+    for col in OPTIONAL_COLUMNS:
+        if col in df.columns:
+            out[col] = _minutes(parse_column(df[col], TIME_FORMATS))
+        else:
+            out[col] = np.nan
+    # Optional; registers that record it (e.g. the .xlsm workbook) pass it through lower-cased
+    if 'status' in df.columns:
+        status = df['status'].astype(str).str.strip().str.lower()
+        out['status'] = status.where(df['status'].notna() & (status != ''))
+    else:
+        out['status'] = None
+    return out
+
+
+def merge_punches(data, keys=('employee_code', 'date')):
+    # Several rows for one employee and day (a repeated line, or one row per punch) become one:
+    # first check-in, last check-out and the first status the source gave
+    keys = list(keys)
+    if not data.duplicated(keys).any():
+        return data
+    return data.groupby(keys, sort=False, as_index=False).agg(
+        check_in=('check_in', 'min'), check_out=('check_out', 'max'), status=('status', 'first'))
+
+
+def _resolve_employee_ids(cursor, codes):
+    # One joined lookup for every distinct code in the batch
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS import_codes (code TEXT PRIMARY KEY)")
+    cursor.execute("DELETE FROM import_codes")
+    cursor.executemany("INSERT INTO import_codes (code) VALUES (?)", ((code,) for code in codes))
+    cursor.execute("""
+        SELECT c.code, e.id
+        FROM import_codes c
+        JOIN employees e ON e.employee_id = c.code
+    """)
+    return dict(cursor.fetchall())
+
+
+def new_upload(conn):
+    # Id for the rows of one upload, reserved from id_sequences inside the caller's transaction
+    # like employee codes (employee_ids.reserve_employee_ids)
+    return conn.execute("""
+        UPDATE id_sequences SET value = value + 1 WHERE name = 'attendance_upload' RETURNING value
+    """).fetchone()[0]
+
+
+def stored_days(cursor, data):
+    # The rows already stored for the batch's (employee_id, date) pairs: the pairs go through a
+    # temp table, and each is one probe of idx_attendance_employee_date
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS import_days (employee_id INTEGER, date TEXT, PRIMARY KEY (employee_id, date))
+    """)
+    cursor.execute("DELETE FROM import_days")
+    cursor.executemany("INSERT INTO import_days (employee_id, date) VALUES (?, ?)",
+                       zip(data['employee_id'].tolist(), data['date'].tolist()))
+    return pd.DataFrame(cursor.execute("""
+        SELECT a.employee_id, a.date, a.check_in, a.check_out, a.status, a.upload_id
+        FROM import_days t
+        CROSS JOIN attendance a ON a.employee_id = t.employee_id AND a.date = t.date
+    """).fetchall(), columns=['employee_id', 'date', 'check_in', 'check_out', 'status', 'upload_id'])
+
+
+def merge_stored_punches(data, stored, upload):
+    # A day an earlier batch of the same upload already wrote (a punch dump split across chunks)
+    # is merged with the batch's punches rather than overwritten, so it keeps its first check-in.
+    # A day stored by any other upload is replaced: a new upload is a correction. A stored
+    # status attendance_hours can derive is dropped and derived again from the merged punches.
+    stored = stored[stored['upload_id'] == upload]
+    if stored.empty:
+        return data
+    stored = stored.assign(status=stored['status'].where(~stored['status'].isin(DERIVED_STATUSES)))
+    for col in ('check_in', 'check_out'):
+        stored[col] = _minutes(parse_column(stored[col], TIME_FORMATS))
+    # The batch comes first, so a status it gives wins over the stored one
+    return merge_punches(pd.concat([data, stored.drop(columns='upload_id')], ignore_index=True),
+                         keys=('employee_id', 'date'))
+
+
+def import_attendance(conn, df, uploaded_by, upload=None):
+    # upload is the id (new_upload) shared by the batches of one file; without one the batch is
+    # an upload of its own
+    start = time.perf_counter()
+    rows_read = len(df)
+    data = normalize_attendance(df)
+    invalid = int(data['date'].isna().sum())
+    data = merge_punches(data[data['date'].notna()])
+    merged = rows_read - invalid - len(data)
+
+    cursor = conn.cursor()
+    with conn:
+        if upload is None:
+            upload = new_upload(conn)
+        mapping = _resolve_employee_ids(cursor, data['employee_code'].unique().tolist())
+        emp_ids = data['employee_code'].map(mapping)
+        known = emp_ids.notna()
+        unknown_codes = data.loc[~known, 'employee_code'].unique()
+        skipped = int((~known).sum())
+        data = data[known].assign(employee_id=emp_ids[known].astype('int64'))
+        stored = stored_days(cursor, data)
+        data = merge_stored_punches(data, stored, upload)
+        data['hours_worked'], data['status'], data['paid_fraction'] = attendance_hours(
+            data['check_in'], data['check_out'], data['status'])
+
+        rows = zip(
+            data['employee_id'].tolist(),
+            data['date'].tolist(),
+            to_nullable(_format_times(data['check_in'])).tolist(),
+            to_nullable(_format_times(data['check_out'])).tolist(),
+            to_nullable(data['hours_worked']).tolist(),
+            data['status'].tolist(),
+            data['paid_fraction'].tolist(),
+            [uploaded_by] * len(data),
+            [upload] * len(data),
+        )
+        # Per-row stats triggers would cost about a third of the import's throughput; the daily
+        # counts are moved once per batch instead, from the stored rows the write replaces
+        triggers = dashboard_stats.suspend_triggers(cursor, 'attendance')
+        cursor.executemany("""
+            INSERT INTO attendance (employee_id, date, check_in, check_out, hours_worked, status,
+                                    paid_fraction, uploaded_by, upload_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (employee_id, date) DO UPDATE SET
+                check_in = excluded.check_in,
+                check_out = excluded.check_out,
+                hours_worked = excluded.hours_worked,
+                status = excluded.status,
+                paid_fraction = excluded.paid_fraction,
+                uploaded_by = excluded.uploaded_by,
+                uploaded_at = CURRENT_TIMESTAMP,
+                upload_id = excluded.upload_id
+        """, rows)
+        dashboard_stats.replace_attendance_counts(cursor, data[['date', 'status']], stored[['date', 'status']])
+        dashboard_stats.restore_triggers(cursor, triggers)
+
+    elapsed = time.perf_counter() - start
+    imported = len(data)
+    return {
+        'rows_read': rows_read,
+        'rows_imported': imported,
+        'rows_invalid': invalid,
+        'rows_merged': merged,
+        'rows_skipped': skipped,
+        'unknown_employees': sorted(unknown_codes.tolist()),
+        'seconds': elapsed,
+        'rows_per_sec': imported / elapsed if elapsed else 0.0,
+    }
+
+
+def _iter_csv(path, chunk_size):
+    total = os.path.getsize(path) or 1
+    with open(path, 'rb') as handle:
+        for chunk in pd.read_csv(handle, chunksize=chunk_size, dtype=CODE_DTYPES):
+            yield chunk, min(handle.tell() / total, 1.0)
+
+
+def _xlsx_frame(rows, header):
+    # Raw cell values, with the code columns as text like read_csv's; left to pandas, a code
+    # column of numbers and empty cells would become floats
+    frame = pd.DataFrame(rows, columns=header, dtype=object)
+    codes = [col for col in CODE_DTYPES if col in frame.columns]
+    frame[codes] = frame[codes].astype(CODE_DTYPES).where(frame[codes].notna())
+    return frame.infer_objects()
+
+
+def _iter_xlsx(path, chunk_size):
+    from openpyxl import load_workbook
+
+    # Read-only mode streams rows from the sheet XML instead of building the whole workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(col).strip() if col is not None else '' for col in next(rows, [])]
+        total = max((sheet.max_row or 0) - 1, 1)
+        done = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_size:
+                done += len(batch)
+                yield _xlsx_frame(batch, header), min(done / total, 1.0)
+                batch = []
+        if batch:
+            yield _xlsx_frame(batch, header), 1.0
+    finally:
+        workbook.close()
+
+
+def iter_attendance_file(path, chunk_size=CHUNK_SIZE):
+    # Yields (DataFrame, fraction of the file consumed) so memory stays bounded by chunk_size
+    if str(path).lower().endswith('.xlsx'):
+        return _iter_xlsx(path, chunk_size)
+    return _iter_csv(path, chunk_size)
+
+
+def import_attendance_file(conn, path, uploaded_by, chunk_size=CHUNK_SIZE, progress=None):
+    start = time.perf_counter()
+    totals = {'rows_read': 0, 'rows_imported': 0, 'rows_invalid': 0, 'rows_merged': 0, 'rows_skipped': 0}
+    unknown = set()
+    with conn:
+        upload = new_upload(conn)
+    for chunk, fraction in iter_attendance_file(path, chunk_size):
+        result = import_attendance(conn, chunk, uploaded_by, upload)
+        for key in totals:
+            totals[key] += result[key]
+        unknown.update(result['unknown_employees'])
+        if progress:
+            progress(int(fraction * 100))
+
+    elapsed = time.perf_counter() - start
+    totals['unknown_employees'] = sorted(unknown)
+    totals['seconds'] = elapsed
+    totals['rows_per_sec'] = totals['rows_imported'] / elapsed if elapsed else 0.0
+    return totals
@@ -0,0 +1,46 @@
+# Imports a synthetic attendance file through the bulk import engine.
+# Run from the repository root:  python -m benchmarks.bench_attendance_import --rows 1000000 [--stream]
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from attendance_import import import_attendance, import_attendance_file
+from benchmarks.synthetic import create_synthetic_database, peak_rss_mb, write_attendance_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bulk attendance import")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--employees', type=int, default=20_000)
+    parser.add_argument('--stream', action='store_true', help="import in chunks straight from the file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        conn = create_synthetic_database(tmp / "hrms.db", args.employees)
+        csv_path = tmp / "attendance.csv"
+        write_attendance_csv(csv_path, args.employees, args.rows)
+
+        if args.stream:
+            read_seconds = 0.0
+            result = import_attendance_file(conn, csv_path, uploaded_by=1)
+        else:
+            start = time.perf_counter()
+            df = pd.read_csv(csv_path)
+            read_seconds = time.perf_counter() - start
+            result = import_attendance(conn, df, uploaded_by=1)
+        conn.close()
+
+    print(f"rows:          {result['rows_read']:,}")
+    print(f"read file:     {read_seconds:.2f}s")
+    print(f"import:        {result['seconds']:.2f}s")
+    print(f"throughput:    {result['rows_per_sec']:,.0f} rows/sec")
+    peak = peak_rss_mb()
+    print(f"peak RSS:      {'n/a' if peak is None else f'{peak:,} MB'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# Generates a month of payroll for a synthetic workforce.
+# Run from the repository root:  python -m benchmarks.bench_payroll --employees 100000
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import payroll_engine
+from benchmarks.synthetic import create_synthetic_database, insert_month_attendance
+from periods import month_bounds
+from statutory import load_statutory_rules, rules_fingerprint, rules_for_period
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark payroll generation")
+    parser.add_argument('--employees', type=int, default=100_000)
+    parser.add_argument('--year', type=int, default=2026)
+    parser.add_argument('--month', type=int, default=1)
+    parser.add_argument('--changed', type=int, default=100,
+                        help="employees given a late attendance correction before the rerun")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = create_synthetic_database(Path(tmp) / "hrms.db", args.employees)
+        rows = insert_month_attendance(conn, args.employees, args.year, args.month)
+
+        start = time.perf_counter()
+        inputs = payroll_engine.load_payroll_inputs(conn, args.month, args.year)
+        aggregate_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        period_rules = rules_for_period(load_statutory_rules(conn), month_bounds(args.year, args.month)[0])
+        inputs['rules'] = rules_fingerprint(period_rules)
+        inputs['input_hash'] = payroll_engine.input_hashes(inputs)
+        payroll = payroll_engine.compute_payroll(inputs, args.month, args.year, period_rules)
+        payroll['input_hash'] = inputs['input_hash']
+        compute_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        payroll_engine.write_payroll(conn, payroll, args.month, args.year, generated_by=1)
+        write_seconds = time.perf_counter() - start
+
+        # Late correction: drop the first day's punch for a handful of employees, then rerun
+        with conn:
+            conn.execute("DELETE FROM attendance WHERE employee_id <= ? AND date = ?",
+                         (args.changed, month_bounds(args.year, args.month)[0]))
+        rerun = payroll_engine.generate_payroll(conn, args.month, args.year, generated_by=1)
+        conn.close()
+
+    total = aggregate_seconds + compute_seconds + write_seconds
+    print(f"employees:     {args.employees:,}")
+    print(f"attendance:    {rows:,} rows")
+    print(f"aggregate:     {aggregate_seconds:.2f}s")
+    print(f"compute:       {compute_seconds:.2f}s")
+    print(f"write:         {write_seconds:.2f}s")
+    print(f"total:         {total:.2f}s ({args.employees / total:,.0f} employees/sec)")
+    print(f"rerun:         {rerun['seconds']:.2f}s ({rerun['recomputed']:,} recomputed, "
+          f"{rerun['unchanged']:,} unchanged)")
+
+
+if __name__ == '__main__':
+    main()
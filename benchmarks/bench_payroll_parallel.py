@@ -0,0 +1,44 @@
+# Full payroll run for a synthetic group of companies at 1/2/4/8 worker processes.
+# Run from the repository root:  python -m benchmarks.bench_payroll_parallel --employees 200000 --companies 8
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+import payroll_engine
+from benchmarks.synthetic import create_synthetic_database, insert_month_attendance
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark partitioned payroll generation")
+    parser.add_argument('--employees', type=int, default=200_000)
+    parser.add_argument('--companies', type=int, default=8)
+    parser.add_argument('--departments', type=int, default=4, help="departments per company")
+    parser.add_argument('--partition-by', choices=sorted(payroll_engine.PARTITION_COLUMNS), default='company')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--year', type=int, default=2026)
+    parser.add_argument('--month', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = create_synthetic_database(Path(tmp) / "hrms.db", args.employees,
+                                         companies=args.companies, departments=args.departments)
+        rows = insert_month_attendance(conn, args.employees, args.year, args.month)
+        print(f"employees:     {args.employees:,} in {args.companies} companies x {args.departments} departments")
+        print(f"attendance:    {rows:,} rows")
+        print(f"cpus:          {os.cpu_count()}")
+
+        baseline = None
+        for workers in args.workers:
+            # full=True so every run recomputes and rewrites the whole month
+            result = payroll_engine.generate_payroll(conn, args.month, args.year, generated_by=1, full=True,
+                                                     workers=workers, partition_by=args.partition_by)
+            baseline = baseline or result['seconds']
+            print(f"workers {workers:>2}:    {result['seconds']:.2f}s "
+                  f"({args.employees / result['seconds']:,.0f} employees/sec, "
+                  f"speedup {baseline / result['seconds']:.2f}x)")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+# Renders a month of payslips for a synthetic workforce at 1/2/4 worker processes.
+# Run from the repository root:  python -m benchmarks.bench_payslips --employees 50000
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+import payroll_engine
+from benchmarks.synthetic import create_synthetic_database, insert_month_attendance
+from payslips import generate_payslips
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch payslip generation")
+    parser.add_argument('--employees', type=int, default=50_000)
+    parser.add_argument('--companies', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--year', type=int, default=2026)
+    parser.add_argument('--month', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = create_synthetic_database(Path(tmp) / "hrms.db", args.employees, companies=args.companies)
+        insert_month_attendance(conn, args.employees, args.year, args.month)
+        payroll_engine.generate_payroll(conn, args.month, args.year, generated_by=1)
+        print(f"employees:     {args.employees:,}")
+        print(f"cpus:          {os.cpu_count()}")
+
+        for workers in args.workers:
+            result = generate_payslips(conn, args.month, args.year, Path(tmp) / f"workers-{workers}",
+                                       workers=workers)
+            size = os.path.getsize(result['archive']) / 1024 ** 2
+            print(f"workers {workers:>2}:    {result['seconds']:.2f}s "
+                  f"({result['payslips'] / result['seconds']:,.0f} payslips/sec, archive {size:.0f} MB)")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+# End-to-end timings of the hot paths on a synthetic organisation, at one or more scales:
+# database creation, attendance upload, payroll generation (first run and unchanged rerun),
+# first page of the GUI tables, and the attendance and payroll exports. Results are written
+# as JSON, one record per (employees, stage); given a --baseline from an earlier run, stages
+# that got slower than --tolerance allows are listed and the exit status is 1.
+# Run from the repository root:
+#   python -m benchmarks.bench_suite --employees 1000 10000 100000 --months 2 --output bench.json
+#   python -m benchmarks.bench_suite --employees 1000 10000 --baseline bench.json
+import argparse
+import contextlib
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import db
+import payroll_engine
+import reports
+from attendance_import import import_attendance_file
+from benchmarks.synthetic import peak_rss_mb, populate_organisation, write_month_attendance_csv
+from database_setup import create_database
+
+# Stages faster than this are reported but never flagged; their noise exceeds any tolerance
+MIN_COMPARED_SECONDS = 0.05
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _record(results, employees, stage, seconds, rows=None):
+    record = {'employees': employees, 'stage': stage, 'seconds': round(seconds, 4)}
+    if rows is not None:
+        record['rows'] = rows
+        record['rows_per_sec'] = round(rows / seconds) if seconds else None
+    results.append(record)
+    print(f"{employees:>10,}  {stage:<24} {seconds:9.3f}s" + (f"  {rows:>12,} rows" if rows is not None else ''),
+          file=sys.stderr)
+
+
+def _months(year, month, count):
+    for i in range(count):
+        yield year + (month - 1 + i) // 12, (month - 1 + i) % 12 + 1
+
+
+def run_scale(tmp, employees, args):
+    from table_models import ATTENDANCE_TABLE, EMPLOYEES_TABLE, PAYROLL_TABLE, KeysetTableModel
+
+    results = []
+    db_path = tmp / "hrms.db"
+    _, seconds = _timed(create_database, db_path)
+    _record(results, employees, 'create_database', seconds)
+
+    conn = db.connect(db_path)
+    _, seconds = _timed(populate_organisation, conn, employees, 0, args.companies, args.departments, args.positions)
+    _record(results, employees, 'insert_employees', seconds, employees)
+
+    # The upload file is generated outside the timing; the import reads it in chunks
+    months = list(_months(args.year, args.month, args.months))
+    csv_path = tmp / "attendance.csv"
+    for i, (year, month) in enumerate(months):
+        write_month_attendance_csv(csv_path, employees, year, month, args.attendance_rate, seed=i, append=i > 0)
+    result = import_attendance_file(conn, csv_path, uploaded_by=1)
+    _record(results, employees, 'attendance_upload', result['seconds'], result['rows_read'])
+    csv_path.unlink()
+
+    for stage, full in [('payroll', True), ('payroll_rerun', False)]:
+        seconds = 0.0
+        rows = 0
+        for year, month in months:
+            # force: the rerun regenerates months the later ones have already closed
+            result = payroll_engine.generate_payroll(conn, month, year, 1, full=full, workers=args.workers,
+                                                     force=True)
+            seconds += result['seconds']
+            rows += result['employees']
+        _record(results, employees, stage, seconds, rows)
+
+    db.configure(db_path)
+    tables = {'employees': EMPLOYEES_TABLE, 'attendance': ATTENDANCE_TABLE, 'payroll': PAYROLL_TABLE}
+    for name, spec in tables.items():
+        model = KeysetTableModel(*spec)
+        _, seconds = _timed(model.refresh)
+        _record(results, employees, f'table_{name}', seconds, model.rowCount())
+    db.close_all()
+
+    for name, export in [('attendance', reports.export_attendance_report), ('payroll', reports.export_payroll_report)]:
+        rows, seconds = _timed(export, conn, str(tmp / f"{name}.{args.export_format}"))
+        _record(results, employees, f'export_{name}', seconds, rows)
+
+    conn.close()
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def regressions(results, baseline, tolerance):
+    previous = {(r['employees'], r['stage']): r['seconds'] for r in baseline['results']}
+    slower = []
+    for record in results:
+        before = previous.get((record['employees'], record['stage']))
+        if before is None or record['seconds'] < MIN_COMPARED_SECONDS:
+            continue
+        if record['seconds'] > before * (1 + tolerance):
+            slower.append({**record, 'baseline_seconds': before, 'ratio': round(record['seconds'] / before, 2)})
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HRMS hot paths on synthetic data")
+    parser.add_argument('--employees', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="workforce sizes to run, each in a fresh database")
+    parser.add_argument('--companies', type=int, default=4)
+    parser.add_argument('--departments', type=int, default=5, help="departments per company")
+    parser.add_argument('--positions', type=int, default=3, help="positions per department")
+    parser.add_argument('--months', type=int, default=2, help="months of attendance and payroll")
+    parser.add_argument('--year', type=int, default=2026)
+    parser.add_argument('--month', type=int, default=1, help="first month")
+    parser.add_argument('--attendance-rate', type=float, default=0.9, help="share of days each employee attends")
+    parser.add_argument('--workers', type=int, default=1, help="payroll worker processes")
+    parser.add_argument('--export-format', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--output', help="JSON results file (default: stdout)")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    started = time.time()
+    results = []
+    for employees in args.employees:
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(sys.stderr):
+            results += run_scale(Path(tmp), employees, args)
+
+    report = {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+        'environment': environment(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'peak_rss_mb': peak_rss_mb(),
+        'results': results,
+    }
+    slower = []
+    if args.baseline:
+        slower = regressions(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        report['regressions'] = slower
+        for record in slower:
+            print(f"REGRESSION {record['employees']:,} {record['stage']}: {record['seconds']:.3f}s "
+                  f"vs {record['baseline_seconds']:.3f}s ({record['ratio']}x)", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    else:
+        print(text)
+    sys.exit(1 if slower else 0)
+
+
+if __name__ == '__main__':
+    main()
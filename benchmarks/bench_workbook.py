@@ -0,0 +1,52 @@
+# Load time of the shipped macro workbook: pd.read_excel vs the streaming workbook reader.
+# Run from the repository root:  python -m benchmarks.bench_workbook --year 2018
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import db
+from database_setup import create_database
+from workbook_import import Workbook, import_workbook, read_sheet, workbook_sheets
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def read_mapped(path):
+    with Workbook(path) as book:
+        return {sheet: read_sheet(book, sheet, mapping) for sheet, mapping in workbook_sheets(book)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reading Payroll Data.xlsm")
+    parser.add_argument('--file', default="Payroll Data.xlsm")
+    parser.add_argument('--year', type=int, default=2018, help="year the month-named sheets belong to")
+    args = parser.parse_args()
+
+    sheets, reader_seconds = timed(lambda: read_mapped(args.file))
+    _, pandas_mapped_seconds = timed(lambda: pd.read_excel(args.file, sheet_name=list(sheets), header=None))
+    _, pandas_all_seconds = timed(lambda: pd.read_excel(args.file, sheet_name=None, header=None))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        create_database(Path(tmp) / "hrms.db")
+        conn = db.connect(Path(tmp) / "hrms.db")
+        result = import_workbook(conn, args.file, uploaded_by=1, year=args.year)
+        conn.close()
+
+    print(f"workbook:               {args.file} ({Path(args.file).stat().st_size / 1e6:.1f} MB, "
+          f"{len(sheets)} mapped sheets)")
+    print(f"pd.read_excel (all):    {pandas_all_seconds:.2f}s")
+    print(f"pd.read_excel (mapped): {pandas_mapped_seconds:.2f}s")
+    print(f"workbook reader:        {reader_seconds:.2f}s ({pandas_mapped_seconds / reader_seconds:.1f}x faster)")
+    print(f"full import:            {result['seconds']:.2f}s ({result['employees']} employee rows, "
+          f"{result['attendance']} attendance rows, {result['payroll']} payroll rows)")
+
+
+if __name__ == '__main__':
+    main()
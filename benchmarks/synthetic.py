@@ -0,0 +1,134 @@
+import calendar
+import sys
+import numpy as np
+import pandas as pd
+
+import db
+from database_setup import create_database
+from employee_ids import reserve_employee_ids
+
+try:
+    import resource
+except ImportError:
+    # Unix only; peak RSS isn't reported on Windows
+    resource = None
+
+
+def create_synthetic_database(db_path, employees, seed=0, companies=1, departments=1, positions=1):
+    create_database(db_path)
+    conn = db.connect(db_path)
+    populate_organisation(conn, employees, seed, companies, departments, positions)
+    return conn
+
+
+def populate_organisation(conn, employees, seed=0, companies=1, departments=1, positions=1):
+    # `departments` per company and `positions` per department; employees are spread
+    # round-robin over positions
+    rng = np.random.default_rng(seed)
+    department_count = companies * departments
+    position_count = department_count * positions
+    titles = ['Associate', 'Senior Associate', 'Lead', 'Manager', 'Director']
+    with conn:
+        conn.executemany("INSERT INTO companies (company_id, name) VALUES (?, ?)", (
+            (f"CMP{c:03d}", f"Synthetic Co {c}") for c in range(1, companies + 1)
+        ))
+        conn.executemany("INSERT INTO departments (department_id, name, company_id) VALUES (?, ?, ?)", (
+            (f"DEP{d:03d}", f"Operations {d}", (d - 1) // departments + 1) for d in range(1, department_count + 1)
+        ))
+        conn.executemany("INSERT INTO positions (position_id, title, department_id) VALUES (?, ?, ?)", (
+            (f"POS{p:03d}", titles[(p - 1) % positions % len(titles)], (p - 1) // positions + 1)
+            for p in range(1, position_count + 1)
+        ))
+        basic = rng.integers(15000, 90000, employees).astype(float)
+        codes = reserve_employee_ids(conn, employees)
+        conn.executemany("""
+            INSERT INTO employees (employee_id, first_name, last_name, email, position_id,
+                                   basic_salary, hra, conveyance, pf, esic)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (code, f"First{i}", f"Last{i}", f"emp{i}@example.com", (i - 1) % position_count + 1,
+             b, round(b * 0.4, 2), 1600.0, round(b * 0.12, 2), 0.0)
+            for i, (code, b) in enumerate(zip(codes, basic.tolist()), start=1)
+        ))
+
+
+def synthetic_attendance(employees, rows, year=2026, month=1, seed=0):
+    # Random punches spread over the month, in the same layout as sample_attendance.csv
+    rng = np.random.default_rng(seed)
+    emp = rng.integers(1, employees + 1, rows)
+    day = rng.integers(1, 29, rows)
+    check_in = rng.integers(7, 11, rows)
+    check_out = check_in + rng.integers(4, 10, rows)
+    codes = np.char.add('EMP', np.char.zfill(emp.astype(str), 4))
+    return pd.DataFrame({
+        'employee_id': codes,
+        'date': [f"{month}/{d}/{year}" for d in day.tolist()],
+        'check_in': np.char.add(check_in.astype(str), ':00'),
+        'check_out': np.char.add(check_out.astype(str), ':00'),
+    })
+
+
+def write_attendance_csv(path, employees, rows, chunk_size=100_000):
+    # Written in chunks so generating a large file does not skew memory measurements
+    for offset in range(0, rows, chunk_size):
+        chunk = synthetic_attendance(employees, min(chunk_size, rows - offset), seed=offset)
+        chunk.to_csv(path, mode='a' if offset else 'w', header=not offset, index=False)
+
+
+def synthetic_month_attendance(first, count, year, month, attendance_rate=0.9, seed=0):
+    # Every day of the month for employees first..first + count - 1, in the layout of
+    # sample_attendance.csv; each day is kept with probability attendance_rate
+    rng = np.random.default_rng(seed)
+    days = calendar.monthrange(year, month)[1]
+    emp = np.repeat(np.arange(first, first + count), days)
+    day = np.tile(np.arange(1, days + 1), count)
+    keep = rng.random(emp.size) < attendance_rate
+    emp, day = emp[keep], day[keep]
+    check_in = rng.integers(7, 11, emp.size)
+    check_out = check_in + rng.integers(4, 10, emp.size)
+    labels = np.array([f"{month}/{d}/{year}" for d in range(1, days + 1)], dtype=object)
+    return pd.DataFrame({
+        'employee_id': np.char.add('EMP', np.char.zfill(emp.astype(str), 4)),
+        'date': labels[day - 1],
+        'check_in': np.char.add(check_in.astype(str), ':00'),
+        'check_out': np.char.add(check_out.astype(str), ':00'),
+    })
+
+
+def write_month_attendance_csv(path, employees, year, month, attendance_rate=0.9, seed=0, append=False,
+                               chunk_employees=20_000):
+    # Appends to path when `append`, so several months can go into one upload file
+    rows = 0
+    for first in range(1, employees + 1, chunk_employees):
+        chunk = synthetic_month_attendance(first, min(chunk_employees, employees - first + 1), year, month,
+                                           attendance_rate, seed + first)
+        header = not append and first == 1
+        chunk.to_csv(path, mode='w' if header else 'a', header=header, index=False)
+        rows += len(chunk)
+    return rows
+
+
+def insert_month_attendance(conn, employees, year, month, attendance_rate=0.9, seed=0):
+    # Bypasses the import pipeline: writes normalized rows straight into attendance
+    rng = np.random.default_rng(seed)
+    days = calendar.monthrange(year, month)[1]
+    emp = np.repeat(np.arange(1, employees + 1), days)
+    day = np.tile(np.arange(1, days + 1), employees)
+    keep = rng.random(emp.size) < attendance_rate
+    dates = np.array([f"{year:04d}-{month:02d}-{d:02d}" for d in range(1, days + 1)], dtype=object)
+    with conn:
+        conn.executemany("""
+            INSERT INTO attendance (employee_id, date, check_in, check_out, hours_worked, status,
+                                    paid_fraction, uploaded_by)
+            VALUES (?, ?, '09:00', '18:00', 9.0, 'present', 1.0, 1)
+        """, zip(emp[keep].tolist(), dates[day[keep] - 1].tolist()))
+    return int(keep.sum())
+
+
+def peak_rss_mb():
+    # Peak resident memory of this process in MB, or None where it can't be read
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024))
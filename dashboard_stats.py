@@ -0,0 +1,110 @@
+from datetime import date
+
+import pandas as pd
+
+from periods import month_to_date_filter
+
+# Reads the trigger-maintained stats_* tables (see migrations._dashboard_summaries). Every query
+# here touches at most one row per position, company, day of the month or payroll period, so
+# the dashboard costs the same with a hundred employees or a million attendance rows.
+#
+# Bulk writers can suspend a table's stats triggers for one transaction and adjust the counts
+# themselves in a few set-based statements (see attendance_import.import_attendance).
+
+# How stats_attendance_daily counts an attendance row, as the triggers of
+# migrations._attendance_working_days do: off days and holidays are not working days, and only
+# present and half days count as attended. A missing status is 'present'.
+NON_WORKING_STATUSES = ['off', 'holiday']
+ATTENDED_STATUSES = ['present', 'half_day']
+
+
+def change_token(conn):
+    # Cheap "did anything change?" check for polling: data_version moves when another connection
+    # (e.g. an import job's) commits, total_changes when this one writes
+    return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+
+def suspend_triggers(cursor, table):
+    # Drops the stats triggers of table inside the caller's transaction and returns their SQL
+    # for restore_triggers; a rollback brings them back as well
+    triggers = cursor.execute("""
+        SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ? AND name GLOB 'trg_*_stats_*'
+    """, (table,)).fetchall()
+    for name, _ in triggers:
+        cursor.execute(f"DROP TRIGGER {name}")
+    return [sql for _, sql in triggers]
+
+
+def restore_triggers(cursor, triggers):
+    for sql in triggers:
+        cursor.execute(sql)
+
+
+def attendance_counts(days):
+    # (date, status) rows -> recorded and attended per date
+    status = days['status'].fillna('present')
+    counts = pd.DataFrame({'recorded': ~status.isin(NON_WORKING_STATUSES), 'attended': status.isin(ATTENDED_STATUSES)})
+    return counts.groupby(days['date']).sum()
+
+
+def replace_attendance_counts(cursor, written, replaced):
+    # For a writer with the attendance triggers suspended: the (date, status) rows it wrote take
+    # the place of the ones they replaced in the daily counts, one upsert per date
+    delta = attendance_counts(written).sub(attendance_counts(replaced), fill_value=0).astype('int64')
+    delta = delta[(delta != 0).any(axis=1)]
+    cursor.executemany("""
+        INSERT INTO stats_attendance_daily (date, recorded, attended) VALUES (?, ?, ?)
+        ON CONFLICT (date) DO UPDATE SET
+            recorded = recorded + excluded.recorded,
+            attended = attended + excluded.attended
+    """, zip(delta.index.tolist(), delta['recorded'].tolist(), delta['attended'].tolist()))
+
+
+def headcount(conn):
+    # [(company, department, status, employees)] rolled up from the per-position counts
+    return conn.execute("""
+        SELECT c.name, d.name, h.status, SUM(h.employees)
+        FROM stats_headcount h
+        LEFT JOIN positions po ON h.position_id = po.id
+        LEFT JOIN departments d ON po.department_id = d.id
+        LEFT JOIN companies c ON d.company_id = c.id
+        WHERE h.employees > 0
+        GROUP BY c.id, d.id, h.status
+        ORDER BY c.name, d.name, h.status
+    """).fetchall()
+
+
+def month_attendance(conn, today=None):
+    period, params = month_to_date_filter('date', today or date.today())
+    recorded, attended = conn.execute(f"""
+        SELECT COALESCE(SUM(recorded), 0), COALESCE(SUM(attended), 0)
+        FROM stats_attendance_daily
+        WHERE {period}
+    """, params).fetchone()
+    return {'recorded': recorded, 'attended': attended, 'rate': attended / recorded if recorded else None}
+
+
+def last_payroll(conn):
+    row = conn.execute("""
+        SELECT year, month, employees, gross, net
+        FROM stats_payroll_period
+        WHERE employees > 0
+        ORDER BY year DESC, month DESC
+        LIMIT 1
+    """).fetchone()
+    if row is None:
+        return None
+    year, month, employees, gross, net = row
+    return {'year': year, 'month': month, 'employees': employees, 'gross': round(gross, 2), 'net': round(net, 2)}
+
+
+def dashboard_stats(conn, today=None):
+    rows = headcount(conn)
+    return {
+        'active_employees': sum(count for _, _, status, count in rows if status == 'active'),
+        'total_employees': sum(count for *_, count in rows),
+        'departments': conn.execute("SELECT COALESCE(SUM(departments), 0) FROM stats_departments").fetchone()[0],
+        'headcount': rows,
+        'attendance': month_attendance(conn, today),
+        'last_payroll': last_payroll(conn),
+    }
@@ -1,14 +1,12 @@
 import os
 import sqlite3
 from pathlib import Path
+from migrations import migrate
 
-def create_database():
+def create_database(db_path="database/hrms.db"):
     # Ensure database directory exists
-    db_dir = Path("database")
-    db_dir.mkdir(exist_ok=True)
-
-    # Database file path
-    db_path = db_dir / "hrms.db"
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Connect to SQLite database
     conn = sqlite3.connect(str(db_path))
@@ -123,7 +121,10 @@ def create_database():
             gross REAL,
             pf REAL,
             esic REAL,
+            professional_tax REAL,
+            tds REAL,
             net_salary REAL,
+            input_hash INTEGER,
             generated_by INTEGER,
             generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (employee_id) REFERENCES employees(id),
@@ -152,6 +153,9 @@ def create_database():
 
     # Commit changes
     conn.commit()
+
+    # Bring older databases up to the current schema (indexes, constraints, new columns)
+    migrate(conn)
     conn.close()
 
     print("Database initialized successfully!")
@@ -0,0 +1,66 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+DB_PATH = "database/hrms.db"
+
+# Applied to every new connection. WAL lets readers keep working while an import or
+# payroll run writes; switch journal_mode to 'DELETE' if the database lives on a
+# network share, where WAL's shared-memory index is not supported.
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,  # negative values are KiB, so 64 MB
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+# Prepared statements kept per connection by sqlite3; the app issues a few dozen distinct queries
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+_lock = threading.Lock()
+_pool = []
+# Bumped by close_all so threads notice their cached connection has been closed
+_generation = 0
+
+
+def configure(db_path=None, **pragmas):
+    # Point the pool at another database and/or override PRAGMAs; open connections are recycled
+    global DB_PATH
+    close_all()
+    if db_path is not None:
+        DB_PATH = str(db_path)
+    PRAGMAS.update(pragmas)
+
+
+def connect(db_path=None, check_same_thread=True):
+    # A new, fully configured connection that the caller owns and closes
+    conn = sqlite3.connect(str(db_path or DB_PATH), cached_statements=STATEMENT_CACHE_SIZE,
+                           check_same_thread=check_same_thread)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def get_connection():
+    # Long-lived connection for the calling thread; GUI and worker threads each get their own
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.generation != _generation:
+        # Pooled connections may be closed from another thread by close_all
+        conn = connect(check_same_thread=False)
+        with _lock:
+            _pool.append(conn)
+            _local.conn = conn
+            _local.generation = _generation
+    return conn
+
+
+def close_all():
+    global _generation
+    with _lock:
+        connections = list(_pool)
+        _pool.clear()
+        _generation += 1
+    for conn in connections:
+        conn.close()
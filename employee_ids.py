@@ -0,0 +1,24 @@
+# Employee codes (EMP0001, EMP0002, ...) are handed out from the id_sequences table instead of
+# being derived from the employee count, so deleted rows and concurrent onboarding can't reuse one.
+# Reserve inside the same transaction as the INSERT: the UPDATE takes SQLite's write lock, so
+# other writers wait, and a rollback returns the numbers.
+
+PREFIX = 'EMP'
+WIDTH = 4
+SEQUENCE = 'employee_id'
+
+
+def format_employee_id(number):
+    return f"{PREFIX}{str(number).zfill(WIDTH)}"
+
+
+def reserve_employee_ids(conn, count):
+    # One indexed UPDATE regardless of how many IDs are reserved
+    last = conn.execute("""
+        UPDATE id_sequences SET value = value + ? WHERE name = ? RETURNING value
+    """, (count, SEQUENCE)).fetchone()[0]
+    return [format_employee_id(number) for number in range(last - count + 1, last + 1)]
+
+
+def next_employee_id(conn):
+    return reserve_employee_ids(conn, 1)[0]
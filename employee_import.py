@@ -0,0 +1,164 @@
+import csv
+import time
+import pandas as pd
+
+from attendance_import import DATE_FORMATS, parse_column, to_nullable
+from employee_ids import reserve_employee_ids
+
+# position_id holds the position code (positions.position_id), e.g. POS001
+REQUIRED_COLUMNS = ['first_name', 'last_name', 'email', 'position_id']
+TEXT_COLUMNS = ['phone', 'address']
+DATE_COLUMNS = ['date_of_birth', 'date_of_joining']
+SALARY_COLUMNS = ['basic_salary', 'hra', 'conveyance', 'pf', 'esic']
+
+EMAIL_PATTERN = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+ERROR_REPORT_HEADERS = ['row', 'email', 'error']
+
+
+def read_employee_file(path):
+    # Onboarding files are thousands of rows, so they are read whole; everything as text so
+    # phone numbers keep their leading zeros and validation sees exactly what was typed
+    if str(path).lower().endswith('.xlsx'):
+        return pd.read_excel(path, dtype=str)
+    return pd.read_csv(path, dtype=str)
+
+
+def _text(df, col):
+    if col not in df.columns:
+        return pd.Series(None, index=df.index, dtype=object)
+    values = df[col].astype(str).str.strip()
+    return values.where(df[col].notna() & (values != ''))
+
+
+def normalize_employees(df):
+    df = df.rename(columns=lambda col: str(col).strip())
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    out = pd.DataFrame(index=df.index)
+    for col in REQUIRED_COLUMNS + TEXT_COLUMNS:
+        out[col] = _text(df, col)
+    out['email'] = out['email'].str.lower()
+    for col in DATE_COLUMNS:
+        out[col] = _text(df, col)
+        out[f'{col}_parsed'] = parse_column(out[col], DATE_FORMATS).dt.strftime('%Y-%m-%d')
+    for col in SALARY_COLUMNS:
+        out[col] = _text(df, col)
+        out[f'{col}_parsed'] = pd.to_numeric(out[col], errors='coerce')
+    return out
+
+
+def _lookup(cursor, table, values, sql):
+    # One joined lookup for every distinct value, through a temp table
+    cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (value TEXT PRIMARY KEY)")
+    cursor.execute(f"DELETE FROM {table}")
+    cursor.executemany(f"INSERT OR IGNORE INTO {table} (value) VALUES (?)", ((value,) for value in values))
+    cursor.execute(sql)
+    return dict(cursor.fetchall())
+
+
+def validate_employees(cursor, data):
+    # Returns {row index: [messages]}; all checks run column-wise over the whole file
+    errors = {}
+
+    def flag(mask, message):
+        for index in mask[mask].index:
+            errors.setdefault(index, []).append(message)
+
+    for col in REQUIRED_COLUMNS:
+        flag(data[col].isna(), f"{col} is required")
+
+    email = data['email']
+    flag(email.notna() & ~email.str.match(EMAIL_PATTERN, na=False), "email is not valid")
+    flag(email.notna() & email.duplicated(keep=False), "email appears more than once in the file")
+    existing = _lookup(cursor, 'import_emails', email.dropna().unique().tolist(), """
+        SELECT i.value, e.employee_id FROM import_emails i JOIN employees e ON e.email = i.value
+    """)
+    flag(email.isin(list(existing)), "email already belongs to an existing employee")
+
+    positions = _lookup(cursor, 'import_positions', data['position_id'].dropna().unique().tolist(), """
+        SELECT i.value, p.id FROM import_positions i JOIN positions p ON p.position_id = i.value
+    """)
+    data['position'] = data['position_id'].map(positions)
+    flag(data['position_id'].notna() & data['position'].isna(), "unknown position code")
+
+    for col in DATE_COLUMNS:
+        flag(data[col].notna() & data[f'{col}_parsed'].isna(), f"{col} is not a valid date")
+    for col in SALARY_COLUMNS:
+        parsed = data[f'{col}_parsed']
+        flag(data[col].notna() & parsed.isna(), f"{col} is not a number")
+        flag(parsed < 0, f"{col} is negative")
+    return errors
+
+
+def import_employees(conn, df, created_by):
+    # Valid rows are loaded in one transaction; rows with errors are skipped and reported.
+    # Row numbers in the report match the spreadsheet (header is row 1).
+    start = time.perf_counter()
+    df = df.reset_index(drop=True)
+    data = normalize_employees(df)
+
+    cursor = conn.cursor()
+    # IMMEDIATE takes the write lock before validating, so no other writer can add a
+    # clashing email between the checks and the insert
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        errors = validate_employees(cursor, data)
+        valid = data[~data.index.isin(list(errors))]
+        codes = reserve_employee_ids(conn, len(valid)) if len(valid) else []
+        rows = zip(
+            codes,
+            valid['first_name'].tolist(),
+            valid['last_name'].tolist(),
+            valid['email'].tolist(),
+            to_nullable(valid['phone']).tolist(),
+            to_nullable(valid['address']).tolist(),
+            *(to_nullable(valid[f'{col}_parsed']).tolist() for col in DATE_COLUMNS),
+            valid['position'].astype('int64').tolist(),
+            *(to_nullable(valid[f'{col}_parsed']).tolist() for col in SALARY_COLUMNS),
+            [created_by] * len(valid),
+        )
+        cursor.executemany("""
+            INSERT INTO employees (employee_id, first_name, last_name, email, phone, address,
+                                   date_of_birth, date_of_joining, position_id,
+                                   basic_salary, hra, conveyance, pf, esic, created_by)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+    emails = to_nullable(data['email'])
+    report = [
+        {'row': int(index) + 2, 'email': emails[index], 'error': '; '.join(messages)}
+        for index, messages in sorted(errors.items())
+    ]
+    return {
+        'rows_read': len(df),
+        'rows_imported': len(codes),
+        'rows_rejected': len(report),
+        'first_employee_id': codes[0] if codes else None,
+        'last_employee_id': codes[-1] if codes else None,
+        'errors': report,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def import_employees_file(conn, path, created_by, progress=None):
+    df = read_employee_file(path)
+    if progress:
+        progress(30)
+    result = import_employees(conn, df, created_by)
+    if progress:
+        progress(100)
+    return result
+
+
+def write_error_report(errors, file_path):
+    with open(file_path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.DictWriter(handle, fieldnames=ERROR_REPORT_HEADERS)
+        writer.writeheader()
+        writer.writerows(errors)
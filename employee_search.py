@@ -0,0 +1,34 @@
+import re
+
+# Filters for "find an employee" boxes. Each word typed must match the start of a word in the
+# employee code, name or email. Uses the employees_fts index when the database has one (see
+# migrations._employee_search); otherwise falls back to LIKE, matching anywhere in those columns.
+
+SEARCH_COLUMNS = ['employee_id', 'first_name', 'last_name', 'email']
+
+
+def has_fts(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'employees_fts'").fetchone() is not None
+
+
+def search_words(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def employee_filter(conn, text, column='e.id'):
+    # (where, params) restricting `column` (an employees.id reference) to matching employees;
+    # shaped for KeysetTableModel.set_filter
+    words = search_words(text)
+    if not words:
+        return '', ()
+    if has_fts(conn):
+        query = ' '.join(f'"{word}"*' for word in words)
+        return f"{column} IN (SELECT rowid FROM employees_fts WHERE employees_fts MATCH ?)", (query,)
+
+    matches_word = ' OR '.join(f"{col} LIKE ? ESCAPE '\\'" for col in SEARCH_COLUMNS)
+    conditions = ' AND '.join(f"({matches_word})" for _ in words)
+    params = []
+    for word in words:
+        pattern = '%' + word.replace('\\', '\\\\').replace('_', '\\_') + '%'
+        params.extend([pattern] * len(SEARCH_COLUMNS))
+    return f"{column} IN (SELECT id FROM employees WHERE {conditions})", tuple(params)
@@ -0,0 +1,223 @@
+# Headless entry point for scheduled jobs; shares the engines with the GUI but never imports PyQt6.
+#
+#   python hrms_cli.py --db database/hrms.db run --month 1 --year 2026
+#   python hrms_cli.py --db sites/north.db --db sites/south.db --jobs 2 import --file "incoming/{db}.csv"
+#   python hrms_cli.py --db database/hrms.db onboard --file new_hires.xlsx --errors rejected.csv
+#   python hrms_cli.py --db database/hrms.db export payroll --output reports/payroll.xlsx
+#   python hrms_cli.py --db database/hrms.db revise --employee EMP0001 --from 2026-01-01 --basic 32000
+#   python hrms_cli.py --db database/hrms.db payslips --month 1 --year 2026 --output payslips --workers 4
+#   python hrms_cli.py --db database/hrms.db arrears --month 4 --year 2026 --since 2026-01
+#
+# Every --db is processed in its own process (up to --jobs at a time); "{db}" in file
+# paths is replaced by each database's file name without extension. One JSON line is
+# printed per database, and the exit status is non-zero if any of them failed.
+import argparse
+import contextlib
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import db
+from migrations import migrate
+
+
+def _expand(template, db_path):
+    return template.replace('{db}', Path(db_path).stem) if template else template
+
+
+def _open(db_path):
+    if not Path(db_path).exists():
+        raise FileNotFoundError(f"Database not found: {db_path}")
+    conn = db.connect(db_path)
+    migrate(conn)
+    return conn
+
+
+def cmd_init(db_path, args):
+    from database_setup import create_database
+    # Keep stdout for the JSON result lines
+    with contextlib.redirect_stdout(sys.stderr):
+        create_database(db_path)
+    return {'schema': 'created'}
+
+
+def cmd_import(db_path, args):
+    from attendance_import import import_attendance_file
+    from workbook_import import import_workbook
+    path = _expand(args.file, db_path)
+    conn = _open(db_path)
+    try:
+        if path.lower().endswith('.xlsm'):
+            return import_workbook(conn, path, args.user, args.year)
+        return import_attendance_file(conn, path, args.user, chunk_size=args.chunk_size)
+    finally:
+        conn.close()
+
+
+def cmd_onboard(db_path, args):
+    from employee_import import import_employees_file, write_error_report
+    conn = _open(db_path)
+    try:
+        result = import_employees_file(conn, _expand(args.file, db_path), args.user)
+    finally:
+        conn.close()
+    if args.errors and result['errors']:
+        write_error_report(result['errors'], _expand(args.errors, db_path))
+        result['errors'] = _expand(args.errors, db_path)
+    return result
+
+
+def cmd_run(db_path, args):
+    import payroll_engine
+    conn = _open(db_path)
+    try:
+        return payroll_engine.generate_payroll(conn, args.month, args.year, args.user, full=args.full,
+                                               workers=args.workers, partition_by=args.partition_by,
+                                               force=args.force)
+    finally:
+        conn.close()
+
+
+def cmd_export(db_path, args):
+    import reports
+    export = reports.export_attendance_report if args.report == 'attendance' else reports.export_payroll_report
+    conn = _open(db_path)
+    try:
+        rows = export(conn, _expand(args.output, db_path), date_from=args.date_from, date_to=args.date_to,
+                      company_id=args.company, department_id=args.department)
+    finally:
+        conn.close()
+    return {'rows': rows, 'output': _expand(args.output, db_path)}
+
+
+def cmd_revise(db_path, args):
+    from salary_history import add_salary_revision, salary_as_of
+    conn = _open(db_path)
+    try:
+        row = conn.execute("SELECT id FROM employees WHERE employee_id = ?", (args.employee,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown employee: {args.employee}")
+        # Components not given keep the values in force on the revision date
+        current = salary_as_of(conn, row[0], args.effective_from) or (None, None, None)
+        salary = [new if new is not None else old for new, old in zip([args.basic, args.hra, args.conveyance], current)]
+        add_salary_revision(conn, row[0], args.effective_from, *salary)
+        return {'employee': args.employee, 'effective_from': args.effective_from,
+                'basic_salary': salary[0], 'hra': salary[1], 'conveyance': salary[2]}
+    finally:
+        conn.close()
+
+
+def cmd_payslips(db_path, args):
+    from payslips import generate_payslips
+    conn = _open(db_path)
+    try:
+        return generate_payslips(conn, args.month, args.year, _expand(args.output, db_path), workers=args.workers)
+    finally:
+        conn.close()
+
+
+def cmd_arrears(db_path, args):
+    from arrears import compute_arrears
+    conn = _open(db_path)
+    try:
+        return compute_arrears(conn, args.month, args.year, args.user, since=args.since)
+    finally:
+        conn.close()
+
+
+def _year_month(value):
+    year, month = value.split('-')
+    return int(year), int(month)
+
+
+def _run_one(command, db_path, args):
+    # Runs in a worker process; errors are returned rather than raised so every database reports
+    try:
+        return {'db': db_path, 'ok': True, 'result': command(db_path, args)}
+    except Exception as e:
+        return {'db': db_path, 'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+
+def build_parser():
+    today = date.today()
+    parser = argparse.ArgumentParser(prog='hrms_cli', description="Run HRMS batch jobs without the GUI.")
+    parser.add_argument('--db', action='append', dest='dbs', metavar='PATH',
+                        help="database to operate on; repeat for several (default: database/hrms.db)")
+    parser.add_argument('--jobs', type=int, default=1, help="databases processed in parallel")
+    parser.add_argument('--user', type=int, default=1, help="users.id recorded as uploader/generator")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    init = commands.add_parser('init', help="create or migrate the database")
+    init.set_defaults(handler=cmd_init)
+
+    imp = commands.add_parser('import', help="import an attendance CSV/XLSX file or a payroll .xlsm workbook")
+    imp.add_argument('--file', required=True)
+    imp.add_argument('--chunk-size', type=int, default=50_000)
+    imp.add_argument('--year', type=int, default=today.year, help="year of the month sheets in an .xlsm workbook")
+    imp.set_defaults(handler=cmd_import)
+
+    onboard = commands.add_parser('onboard', help="bulk-import employees from a CSV/XLSX file")
+    onboard.add_argument('--file', required=True)
+    onboard.add_argument('--errors', help="write rejected rows to this CSV instead of the JSON result")
+    onboard.set_defaults(handler=cmd_onboard)
+
+    run = commands.add_parser('run', help="generate payroll for a month")
+    run.add_argument('--month', type=int, default=today.month)
+    run.add_argument('--year', type=int, default=today.year)
+    run.add_argument('--full', action='store_true', help="recompute every employee, not just changed ones")
+    run.add_argument('--workers', type=int, default=1, help="processes computing partitions in parallel")
+    run.add_argument('--partition-by', choices=['company', 'department'], default='company')
+    run.add_argument('--force', action='store_true',
+                     help="regenerate a month already closed by a later payroll run or arrears cycle")
+    run.set_defaults(handler=cmd_run)
+
+    revise = commands.add_parser('revise', help="record a salary revision, possibly backdated")
+    revise.add_argument('--employee', required=True, help="employee code, e.g. EMP0001")
+    revise.add_argument('--from', dest='effective_from', type=date.fromisoformat, required=True)
+    revise.add_argument('--basic', type=float)
+    revise.add_argument('--hra', type=float)
+    revise.add_argument('--conveyance', type=float)
+    revise.set_defaults(handler=cmd_revise)
+
+    payslips = commands.add_parser('payslips', help="render a month's payslips as PDFs plus a zip archive")
+    payslips.add_argument('--month', type=int, default=today.month)
+    payslips.add_argument('--year', type=int, default=today.year)
+    payslips.add_argument('--output', required=True, help="directory for the payslip folder and archive")
+    payslips.add_argument('--workers', type=int, default=1, help="processes rendering payslips in parallel")
+    payslips.set_defaults(handler=cmd_payslips)
+
+    arrears = commands.add_parser('arrears', help="record arrears owed for earlier paid months in a pay cycle")
+    arrears.add_argument('--month', type=int, default=today.month, help="cycle month the arrears are paid with")
+    arrears.add_argument('--year', type=int, default=today.year)
+    arrears.add_argument('--since', type=_year_month, metavar='YYYY-MM', help="earliest paid month to revisit")
+    arrears.set_defaults(handler=cmd_arrears)
+
+    export = commands.add_parser('export', help="export an attendance or payroll report")
+    export.add_argument('report', choices=['attendance', 'payroll'])
+    export.add_argument('--output', required=True, help=".csv or .xlsx path")
+    export.add_argument('--from', dest='date_from', type=date.fromisoformat)
+    export.add_argument('--to', dest='date_to', type=date.fromisoformat)
+    export.add_argument('--company', type=int, help="companies.id")
+    export.add_argument('--department', type=int, help="departments.id")
+    export.set_defaults(handler=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    dbs = args.dbs or [db.DB_PATH]
+    if args.jobs > 1 and len(dbs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(_run_one, [args.handler] * len(dbs), dbs, [args] * len(dbs)))
+    else:
+        results = [_run_one(args.handler, path, args) for path in dbs]
+
+    for result in results:
+        print(json.dumps(result, default=str))
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import threading
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+import db
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobSignals(QObject):
+    # Emitted from the worker thread; Qt queues them onto the GUI thread
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class Job(QRunnable):
+    # Runs fn(conn, *args, progress=callback, **kwargs) on a QThreadPool thread, where conn
+    # is that thread's pooled connection. fn reports progress (0-100) through the callback;
+    # cancellation is checked each time it reports.
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = JobSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def report_progress(self, percent):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.signals.progress.emit(percent)
+
+    def run(self):
+        try:
+            result = self.fn(db.get_connection(), *self.args, progress=self.report_progress, **self.kwargs)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
@@ -1,6 +1,5 @@
 import sys
-import sqlite3
-from pathlib import Path
+import db
 from PyQt6.QtWidgets import (
     QApplication, QDialog, QVBoxLayout, QHBoxLayout, QLabel,
     QLineEdit, QPushButton, QMessageBox, QComboBox
@@ -63,14 +62,10 @@ class LoginDialog(QDialog):
             QMessageBox.warning(self, "Error", "Please enter both username and password.")
             return
 
-        # Connect to database
-        db_path = Path("database/hrms.db")
-        conn = sqlite3.connect(str(db_path))
+        conn = db.get_connection()
         cursor = conn.cursor()
-
         cursor.execute("SELECT id, role FROM users WHERE username = ? AND password = ?", (username, password))
         user = cursor.fetchone()
-        conn.close()
 
         if user:
             self.user_id = user[0]
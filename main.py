@@ -1,14 +1,20 @@
 import sys
+import logging
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from login import LoginDialog
 from main_window import MainWindow
 from database_setup import create_database
+import db
 
 def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
     # Create database if not exists
     create_database()
 
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(db.close_all)
 
     # Show login dialog
     login = LoginDialog()
@@ -21,4 +27,6 @@ def main():
         return 0
 
 if __name__ == '__main__':
+    # Lets spawned worker processes (e.g. payslip rendering) start in the packaged build
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
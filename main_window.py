@@ -1,23 +1,48 @@
 import sys
+import time
+import logging
 import sqlite3
 from pathlib import Path
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout,
-    QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QTableView,
     QLineEdit, QComboBox, QMessageBox, QFileDialog, QDateEdit,
-    QTextEdit, QProgressBar, QSplitter
+    QTextEdit, QProgressBar, QSplitter, QCheckBox, QInputDialog
 )
-from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtCore import Qt, QDate, QThreadPool, QTimer
 from PyQt6.QtGui import QAction
 import pandas as pd
 import os
+from attendance_import import import_attendance_file
+import payroll_engine
+import db
+from table_models import ATTENDANCE_TABLE, EMPLOYEES_TABLE, PAYROLL_TABLE, KeysetTableModel
+from jobs import Job
+from employee_ids import next_employee_id
+from employee_import import import_employees_file, write_error_report
+from workbook_import import import_workbook
+import reports
+import dashboard_stats
+from employee_search import employee_filter
+from periods import date_range_filter
+from payslips import generate_payslips
+from arrears import compute_arrears
+
+logger = logging.getLogger(__name__)
+
+# How often the dashboard checks whether its stats need re-reading
+DASHBOARD_REFRESH_MS = 2000
+# Pause in typing before a search box filters its table
+SEARCH_DEBOUNCE_MS = 250
 
 class MainWindow(QMainWindow):
     def __init__(self, user_id, user_role):
         super().__init__()
         self.user_id = user_id
         self.user_role = user_role
+        start = time.perf_counter()
         self.init_ui()
+        logger.info("Main window ready in %.1f ms", (time.perf_counter() - start) * 1000)
 
     def init_ui(self):
         self.setWindowTitle(f"HRMS - {self.user_role.title()}")
@@ -32,22 +57,45 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout(central_widget)
         layout.addWidget(self.tab_widget)
 
-        # Add tabs based on role
-        self.add_dashboard_tab()
+        # Add tabs based on role; each is built the first time it is shown
+        self.tab_builders = {}
+        self.register_tab("Dashboard", self.add_dashboard_tab)
         if self.user_role in ['super_admin', 'admin']:
-            self.add_companies_tab()
-            self.add_departments_tab()
-            self.add_positions_tab()
-            self.add_users_tab()
-        self.add_employees_tab()
-        self.add_attendance_tab()
-        self.add_payroll_tab()
-        self.add_reports_tab()
-        self.add_documents_tab()
+            self.register_tab("Companies", self.add_companies_tab)
+            self.register_tab("Departments", self.add_departments_tab)
+            self.register_tab("Positions", self.add_positions_tab)
+            self.register_tab("Users", self.add_users_tab)
+        self.register_tab("Employees", self.add_employees_tab)
+        self.register_tab("Attendance", self.add_attendance_tab)
+        self.register_tab("Payroll", self.add_payroll_tab)
+        self.register_tab("Reports", self.add_reports_tab)
+        self.register_tab("Documents", self.add_documents_tab)
+        self.tab_widget.currentChanged.connect(self.ensure_tab_built)
+        self.ensure_tab_built(self.tab_widget.currentIndex())
 
         # Menu bar
         self.create_menu_bar()
 
+        # Status bar with progress for background jobs
+        self.create_status_bar()
+
+    def register_tab(self, title, builder):
+        # Empty page now; builder() fills it in on first show
+        page = QWidget()
+        page_layout = QVBoxLayout(page)
+        page_layout.setContentsMargins(0, 0, 0, 0)
+        self.tab_widget.addTab(page, title)
+        self.tab_builders[page] = (title, builder)
+
+    def ensure_tab_built(self, index):
+        page = self.tab_widget.widget(index)
+        if page not in self.tab_builders:
+            return
+        title, builder = self.tab_builders.pop(page)
+        start = time.perf_counter()
+        page.layout().addWidget(builder())
+        logger.info("Built %s tab in %.1f ms", title, (time.perf_counter() - start) * 1000)
+
     def create_menu_bar(self):
         menubar = self.menuBar()
 
@@ -61,6 +109,60 @@ class MainWindow(QMainWindow):
         exit_action.triggered.connect(self.close)
         file_menu.addAction(exit_action)
 
+    def create_status_bar(self):
+        # Dedicated pool whose threads never expire, so each keeps its pooled connection
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setExpiryTimeout(-1)
+        self.current_job = None
+
+        self.job_label = QLabel()
+        self.job_progress = QProgressBar()
+        self.job_progress.setRange(0, 100)
+        self.job_cancel_btn = QPushButton("Cancel")
+        self.job_cancel_btn.clicked.connect(self.cancel_job)
+        for widget in (self.job_label, self.job_progress, self.job_cancel_btn):
+            self.statusBar().addPermanentWidget(widget)
+            widget.hide()
+
+    def run_job(self, title, on_finished, fn, *args, **kwargs):
+        # Runs fn off the GUI thread; see jobs.Job for the calling convention
+        if self.current_job:
+            QMessageBox.warning(self, "Busy", "Another job is still running. Wait for it to finish or cancel it.")
+            return
+
+        job = Job(fn, *args, **kwargs)
+        job.signals.progress.connect(self.job_progress.setValue)
+        # job_finished first, so the status bar is reset before any result dialog opens
+        for signal in (job.signals.finished, job.signals.failed, job.signals.cancelled):
+            signal.connect(self.job_finished)
+        job.signals.finished.connect(on_finished)
+        job.signals.failed.connect(lambda error: QMessageBox.warning(self, "Error", f"{title} failed: {error}"))
+        job.signals.cancelled.connect(lambda: QMessageBox.information(self, "Cancelled", f"{title} was cancelled."))
+
+        self.current_job = job
+        self.job_label.setText(f"{title}...")
+        self.job_progress.setValue(0)
+        self.job_cancel_btn.setEnabled(True)
+        for widget in (self.job_label, self.job_progress, self.job_cancel_btn):
+            widget.show()
+        self.thread_pool.start(job)
+
+    def cancel_job(self):
+        if self.current_job:
+            self.current_job.cancel()
+            self.job_cancel_btn.setEnabled(False)
+
+    def job_finished(self, *args):
+        self.current_job = None
+        for widget in (self.job_label, self.job_progress, self.job_cancel_btn):
+            widget.hide()
+
+    def closeEvent(self, event):
+        # A running job stops at its next progress report; wait so it never outlives the window
+        self.cancel_job()
+        self.thread_pool.waitForDone()
+        super().closeEvent(event)
+
     def logout(self):
         self.close()
         # Re-run login
@@ -80,30 +182,60 @@ class MainWindow(QMainWindow):
         welcome.setStyleSheet("font-size: 18px; font-weight: bold;")
         layout.addWidget(welcome)
 
-        # Add some stats
+        # Stats, read from the trigger-maintained summary tables
         stats_layout = QHBoxLayout()
         self.employee_count = QLabel("Total Employees: 0")
         self.department_count = QLabel("Total Departments: 0")
-        stats_layout.addWidget(self.employee_count)
-        stats_layout.addWidget(self.department_count)
+        self.attendance_rate = QLabel("Attendance This Month: -")
+        self.last_payroll_label = QLabel("Last Payroll: -")
+        for label in (self.employee_count, self.department_count, self.attendance_rate, self.last_payroll_label):
+            stats_layout.addWidget(label)
         layout.addLayout(stats_layout)
 
-        self.tab_widget.addTab(tab, "Dashboard")
+        self.headcount_table = QTableWidget()
+        self.headcount_table.setColumnCount(4)
+        self.headcount_table.setHorizontalHeaderLabels(["Company", "Department", "Status", "Employees"])
+        layout.addWidget(self.headcount_table)
+
+        # Poll a change counter and only re-read the stats when something was written
+        self.stats_token = None
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.refresh_dashboard_if_changed)
+        self.stats_timer.start(DASHBOARD_REFRESH_MS)
+
         self.update_dashboard_stats()
+        return tab
+
+    def refresh_dashboard_if_changed(self):
+        if dashboard_stats.change_token(db.get_connection()) != self.stats_token:
+            self.update_dashboard_stats()
 
     def update_dashboard_stats(self):
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
+        conn = db.get_connection()
+        self.stats_token = dashboard_stats.change_token(conn)
+        stats = dashboard_stats.dashboard_stats(conn)
 
-        cursor.execute("SELECT COUNT(*) FROM employees")
-        emp_count = cursor.fetchone()[0]
-        self.employee_count.setText(f"Total Employees: {emp_count}")
+        self.employee_count.setText(f"Total Employees: {stats['active_employees']} active / {stats['total_employees']}")
+        self.department_count.setText(f"Total Departments: {stats['departments']}")
 
-        cursor.execute("SELECT COUNT(*) FROM departments")
-        dept_count = cursor.fetchone()[0]
-        self.department_count.setText(f"Total Departments: {dept_count}")
+        attendance = stats['attendance']
+        if attendance['rate'] is None:
+            self.attendance_rate.setText("Attendance This Month: -")
+        else:
+            self.attendance_rate.setText(f"Attendance This Month: {attendance['rate']:.1%} "
+                                         f"({attendance['attended']} of {attendance['recorded']} days)")
 
-        conn.close()
+        payroll = stats['last_payroll']
+        if payroll is None:
+            self.last_payroll_label.setText("Last Payroll: -")
+        else:
+            self.last_payroll_label.setText(f"Last Payroll: {payroll['month']:02d}/{payroll['year']} - "
+                                            f"{payroll['employees']} employees, net {payroll['net']:,.2f}")
+
+        self.headcount_table.setRowCount(len(stats['headcount']))
+        for row, values in enumerate(stats['headcount']):
+            for col, value in enumerate(values):
+                self.headcount_table.setItem(row, col, QTableWidgetItem('' if value is None else str(value)))
 
     def add_companies_tab(self):
         tab = QWidget()
@@ -135,8 +267,8 @@ class MainWindow(QMainWindow):
         self.companies_table.setHorizontalHeaderLabels(["ID", "Company ID", "Name", "Address"])
         layout.addWidget(self.companies_table)
 
-        self.tab_widget.addTab(tab, "Companies")
         self.load_companies()
+        return tab
 
     def add_company(self):
         company_id = self.company_id_input.text().strip()
@@ -147,12 +279,11 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Company ID and Name are required.")
             return
 
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
+        conn = db.get_connection()
         try:
-            cursor.execute("INSERT INTO companies (company_id, name, address, created_by) VALUES (?, ?, ?, ?)",
-                         (company_id, name, address, self.user_id))
-            conn.commit()
+            with conn:
+                conn.execute("INSERT INTO companies (company_id, name, address, created_by) VALUES (?, ?, ?, ?)",
+                             (company_id, name, address, self.user_id))
             QMessageBox.information(self, "Success", "Company added successfully.")
             self.load_companies()
             self.company_id_input.clear()
@@ -160,14 +291,12 @@ class MainWindow(QMainWindow):
             self.company_address_input.clear()
         except sqlite3.IntegrityError:
             QMessageBox.warning(self, "Error", "Company ID already exists.")
-        conn.close()
 
     def load_companies(self):
-        conn = sqlite3.connect("database/hrms.db")
+        conn = db.get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, company_id, name, address FROM companies")
         companies = cursor.fetchall()
-        conn.close()
 
         self.companies_table.setRowCount(len(companies))
         for row, company in enumerate(companies):
@@ -209,15 +338,14 @@ class MainWindow(QMainWindow):
         self.departments_table.setHorizontalHeaderLabels(["ID", "Dept ID", "Name", "Company"])
         layout.addWidget(self.departments_table)
 
-        self.tab_widget.addTab(tab, "Departments")
         self.load_departments()
+        return tab
 
     def load_companies_combo(self, combo):
-        conn = sqlite3.connect("database/hrms.db")
+        conn = db.get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, name FROM companies")
         companies = cursor.fetchall()
-        conn.close()
         combo.clear()
         for company in companies:
             combo.addItem(company[1], company[0])
@@ -235,22 +363,20 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Please select a company.")
             return
 
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
+        conn = db.get_connection()
         try:
-            cursor.execute("INSERT INTO departments (department_id, name, company_id, created_by) VALUES (?, ?, ?, ?)",
-                         (dept_id, name, company_id, self.user_id))
-            conn.commit()
+            with conn:
+                conn.execute("INSERT INTO departments (department_id, name, company_id, created_by) VALUES (?, ?, ?, ?)",
+                             (dept_id, name, company_id, self.user_id))
             QMessageBox.information(self, "Success", "Department added successfully.")
             self.load_departments()
             self.dept_id_input.clear()
             self.dept_name_input.clear()
         except sqlite3.IntegrityError:
             QMessageBox.warning(self, "Error", "Department ID already exists.")
-        conn.close()
 
     def load_departments(self):
-        conn = sqlite3.connect("database/hrms.db")
+        conn = db.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
             SELECT d.id, d.department_id, d.name, c.name
@@ -258,7 +384,6 @@ class MainWindow(QMainWindow):
             LEFT JOIN companies c ON d.company_id = c.id
         """)
         departments = cursor.fetchall()
-        conn.close()
 
         self.departments_table.setRowCount(len(departments))
         for row, dept in enumerate(departments):
@@ -296,15 +421,14 @@ class MainWindow(QMainWindow):
         self.positions_table.setHorizontalHeaderLabels(["ID", "Pos ID", "Title", "Department"])
         layout.addWidget(self.positions_table)
 
-        self.tab_widget.addTab(tab, "Positions")
         self.load_positions()
+        return tab
 
     def load_departments_combo(self, combo):
-        conn = sqlite3.connect("database/hrms.db")
+        conn = db.get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, name FROM departments")
         departments = cursor.fetchall()
-        conn.close()
         combo.clear()
         for dept in departments:
             combo.addItem(dept[1], dept[0])
@@ -318,22 +442,20 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "All fields are required.")
             return
 
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
+        conn = db.get_connection()
         try:
-            cursor.execute("INSERT INTO positions (position_id, title, department_id, created_by) VALUES (?, ?, ?, ?)",
-                         (pos_id, title, dept_id, self.user_id))
-            conn.commit()
+            with conn:
+                conn.execute("INSERT INTO positions (position_id, title, department_id, created_by) VALUES (?, ?, ?, ?)",
+                             (pos_id, title, dept_id, self.user_id))
             QMessageBox.information(self, "Success", "Position added successfully.")
             self.load_positions()
             self.pos_id_input.clear()
             self.pos_title_input.clear()
         except sqlite3.IntegrityError:
             QMessageBox.warning(self, "Error", "Position ID already exists.")
-        conn.close()
 
     def load_positions(self):
-        conn = sqlite3.connect("database/hrms.db")
+        conn = db.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
             SELECT p.id, p.position_id, p.title, d.name
@@ -341,7 +463,6 @@ class MainWindow(QMainWindow):
             LEFT JOIN departments d ON p.department_id = d.id
         """)
         positions = cursor.fetchall()
-        conn.close()
 
         self.positions_table.setRowCount(len(positions))
         for row, pos in enumerate(positions):
@@ -383,8 +504,8 @@ class MainWindow(QMainWindow):
         self.users_table.setHorizontalHeaderLabels(["ID", "Username", "Role"])
         layout.addWidget(self.users_table)
 
-        self.tab_widget.addTab(tab, "Users")
         self.load_users()
+        return tab
 
     def add_user(self):
         username = self.user_username_input.text().strip()
@@ -395,26 +516,23 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Username and password are required.")
             return
 
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
+        conn = db.get_connection()
         try:
-            cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                         (username, password, role))
-            conn.commit()
+            with conn:
+                conn.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+                             (username, password, role))
             QMessageBox.information(self, "Success", "User added successfully.")
             self.load_users()
             self.user_username_input.clear()
             self.user_password_input.clear()
         except sqlite3.IntegrityError:
             QMessageBox.warning(self, "Error", "Username already exists.")
-        conn.close()
 
     def load_users(self):
-        conn = sqlite3.connect("database/hrms.db")
+        conn = db.get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, username, role FROM users")
         users = cursor.fetchall()
-        conn.close()
 
         self.users_table.setRowCount(len(users))
         for row, user in enumerate(users):
@@ -450,21 +568,35 @@ class MainWindow(QMainWindow):
 
         layout.addLayout(form_layout)
 
+        import_btn = QPushButton("Import Employees (Excel/CSV)")
+        import_btn.clicked.connect(self.import_employees)
+        layout.addWidget(import_btn)
+
         # Table
-        self.employees_table = QTableWidget()
-        self.employees_table.setColumnCount(6)
-        self.employees_table.setHorizontalHeaderLabels(["ID", "Emp ID", "Name", "Email", "Position", "Status"])
+        # Search, applied once typing pauses
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("Search:"))
+        self.emp_search_input = QLineEdit()
+        self.emp_search_input.setPlaceholderText("Employee ID, name or email")
+        search_layout.addWidget(self.emp_search_input)
+        layout.addLayout(search_layout)
+        self.emp_search_timer = self.debounce_timer(self.load_employees)
+        self.emp_search_input.textChanged.connect(lambda: self.emp_search_timer.start())
+
+        # Table, filled page by page as it scrolls
+        self.employees_model = KeysetTableModel(*EMPLOYEES_TABLE, parent=self)
+        self.employees_table = QTableView()
+        self.employees_table.setModel(self.employees_model)
         layout.addWidget(self.employees_table)
 
-        self.tab_widget.addTab(tab, "Employees")
         self.load_employees()
+        return tab
 
     def load_positions_combo(self, combo):
-        conn = sqlite3.connect("database/hrms.db")
+        conn = db.get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, title FROM positions")
         positions = cursor.fetchall()
-        conn.close()
         combo.clear()
         for pos in positions:
             combo.addItem(pos[1], pos[0])
@@ -479,17 +611,15 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "All fields are required.")
             return
 
-        # Auto-generate employee ID
-        emp_id = self.generate_employee_id()
-
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
+        conn = db.get_connection()
         try:
-            cursor.execute("""
-                INSERT INTO employees (employee_id, first_name, last_name, email, position_id, created_by)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (emp_id, fname, lname, email, pos_id, self.user_id))
-            conn.commit()
+            with conn:
+                # Reserved in the insert transaction, so a failed insert doesn't use up the ID
+                emp_id = next_employee_id(conn)
+                conn.execute("""
+                    INSERT INTO employees (employee_id, first_name, last_name, email, position_id, created_by)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (emp_id, fname, lname, email, pos_id, self.user_id))
             QMessageBox.information(self, "Success", f"Employee added successfully. Employee ID: {emp_id}")
             self.load_employees()
             self.emp_fname_input.clear()
@@ -497,31 +627,42 @@ class MainWindow(QMainWindow):
             self.emp_email_input.clear()
         except sqlite3.IntegrityError:
             QMessageBox.warning(self, "Error", "Email already exists.")
-        conn.close()
 
-    def generate_employee_id(self):
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM employees")
-        count = cursor.fetchone()[0]
-        conn.close()
-        return f"EMP{str(count + 1).zfill(4)}"
+    def import_employees(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select Employee File", "", "Excel Files (*.xlsx);;CSV Files (*.csv)")
+        if not file_path:
+            return
 
-    def load_employees(self):
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT e.id, e.employee_id, e.first_name || ' ' || e.last_name, e.email, p.title, e.status
-            FROM employees e
-            LEFT JOIN positions p ON e.position_id = p.id
-        """)
-        employees = cursor.fetchall()
-        conn.close()
+        self.run_job("Employee import", self.employees_imported, import_employees_file, file_path, self.user_id)
 
-        self.employees_table.setRowCount(len(employees))
-        for row, emp in enumerate(employees):
-            for col, value in enumerate(emp):
-                self.employees_table.setItem(row, col, QTableWidgetItem(str(value)))
+    def employees_imported(self, result):
+        message = f"{result['rows_imported']} of {result['rows_read']} employees imported."
+        if result['rows_imported']:
+            message += f"\nEmployee IDs {result['first_employee_id']} to {result['last_employee_id']}."
+        self.load_employees()
+        if not result['errors']:
+            QMessageBox.information(self, "Success", message)
+            return
+
+        message += f"\n{result['rows_rejected']} rows were rejected. Save the error report?"
+        answer = QMessageBox.question(self, "Import finished with errors", message)
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Error Report", "employee_import_errors.csv", "CSV Files (*.csv)")
+        if file_path:
+            write_error_report(result['errors'], file_path)
+
+    def debounce_timer(self, slot):
+        # Single-shot timer restarted on every keystroke, so slot runs once typing pauses
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(SEARCH_DEBOUNCE_MS)
+        timer.timeout.connect(slot)
+        return timer
+
+    def load_employees(self):
+        where, params = employee_filter(db.get_connection(), self.emp_search_input.text())
+        self.employees_model.set_filter(where, params)
 
     def add_attendance_tab(self):
         tab = QWidget()
@@ -532,69 +673,96 @@ class MainWindow(QMainWindow):
         upload_btn.clicked.connect(self.upload_attendance)
         layout.addWidget(upload_btn)
 
-        # Table
-        self.attendance_table = QTableWidget()
-        self.attendance_table.setColumnCount(6)
-        self.attendance_table.setHorizontalHeaderLabels(["ID", "Employee", "Date", "Check In", "Check Out", "Hours"])
+        # Filters
+        filter_layout = QHBoxLayout()
+        self.att_date_check = QCheckBox("Date range:")
+        self.att_date_check.toggled.connect(self.load_attendance)
+        filter_layout.addWidget(self.att_date_check)
+        self.att_date_from = QDateEdit(QDate.currentDate().addDays(1 - QDate.currentDate().day()))
+        self.att_date_from.setCalendarPopup(True)
+        filter_layout.addWidget(self.att_date_from)
+        filter_layout.addWidget(QLabel("to"))
+        self.att_date_to = QDateEdit(QDate.currentDate())
+        self.att_date_to.setCalendarPopup(True)
+        filter_layout.addWidget(self.att_date_to)
+        for date_edit in (self.att_date_from, self.att_date_to):
+            date_edit.dateChanged.connect(self.attendance_dates_changed)
+        filter_layout.addWidget(QLabel("Employee:"))
+        self.att_employee_input = QLineEdit()
+        self.att_employee_input.setPlaceholderText("Employee ID, name or email")
+        filter_layout.addWidget(self.att_employee_input)
+        self.att_employee_timer = self.debounce_timer(self.load_attendance)
+        self.att_employee_input.textChanged.connect(lambda: self.att_employee_timer.start())
+        layout.addLayout(filter_layout)
+
+        # Table, filled page by page as it scrolls
+        self.attendance_model = KeysetTableModel(*ATTENDANCE_TABLE, parent=self)
+        self.attendance_table = QTableView()
+        self.attendance_table.setModel(self.attendance_model)
         layout.addWidget(self.attendance_table)
 
-        self.tab_widget.addTab(tab, "Attendance")
         self.load_attendance()
+        return tab
 
     def upload_attendance(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select Attendance File", "", "Excel Files (*.xlsx);;CSV Files (*.csv)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select Attendance File", "",
+                                                   "Excel Files (*.xlsx);;CSV Files (*.csv);;Payroll Workbooks (*.xlsm)")
         if not file_path:
             return
 
-        try:
-            if file_path.endswith('.xlsx'):
-                df = pd.read_excel(file_path)
-            else:
-                df = pd.read_csv(file_path)
-
-            # Assume columns: employee_id, date, check_in, check_out
-            conn = sqlite3.connect("database/hrms.db")
-            cursor = conn.cursor()
-
-            for _, row in df.iterrows():
-                emp_id = row['employee_id']
-                date = row['date']
-                check_in = row.get('check_in')
-                check_out = row.get('check_out')
-
-                # Get employee db id
-                cursor.execute("SELECT id FROM employees WHERE employee_id = ?", (emp_id,))
-                emp = cursor.fetchone()
-                if emp:
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO attendance (employee_id, date, check_in, check_out, uploaded_by)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (emp[0], date, check_in, check_out, self.user_id))
-
-            conn.commit()
-            conn.close()
-            QMessageBox.information(self, "Success", "Attendance uploaded successfully.")
+        if file_path.lower().endswith('.xlsm'):
+            # Month sheets (Jan-Att, Jan-Pay, ...) don't carry the year
+            year, ok = QInputDialog.getInt(self, "Payroll Workbook", "Year of the month sheets:",
+                                           QDate.currentDate().year(), 2000, 2100)
+            if ok:
+                self.run_job("Workbook import", self.workbook_imported, import_workbook, file_path, self.user_id, year)
+            return
+
+        self.run_job("Attendance upload", self.attendance_uploaded,
+                     import_attendance_file, file_path, self.user_id)
+
+    def attendance_uploaded(self, result):
+        message = (f"Attendance uploaded successfully.\n"
+                   f"{result['rows_imported']} rows imported ({result['rows_per_sec']:,.0f} rows/sec).")
+        if result['rows_merged']:
+            message += f"\n{result['rows_merged']} duplicate or extra punch rows merged into their day."
+        if result['rows_skipped'] or result['rows_invalid']:
+            message += (f"\n{result['rows_skipped']} rows skipped for unknown employees, "
+                        f"{result['rows_invalid']} rows with invalid dates.")
+        QMessageBox.information(self, "Success", message)
+        self.load_attendance()
+
+    def workbook_imported(self, result):
+        message = (f"Workbook imported from {len(result['sheets'])} sheets in {result['seconds']:.1f}s.\n"
+                   f"{result['employees']} employee rows, {result['attendance']} attendance rows, "
+                   f"{result['payroll']} payroll rows.")
+        if result['unknown_employees']:
+            message += f"\n{len(result['unknown_employees'])} employee codes were not found."
+        QMessageBox.information(self, "Success", message)
+        self.load_attendance()
+        # Other tabs read fresh data when first opened; refresh the ones already built
+        if hasattr(self, 'employees_table'):
+            self.load_employees()
+        if hasattr(self, 'payroll_model'):
+            self.load_payroll()
+
+    def attendance_dates_changed(self):
+        if self.att_date_check.isChecked():
             self.load_attendance()
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to upload attendance: {str(e)}")
 
     def load_attendance(self):
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT a.id, e.employee_id, a.date, a.check_in, a.check_out, a.hours_worked
-            FROM attendance a
-            LEFT JOIN employees e ON a.employee_id = e.id
-            ORDER BY a.date DESC
-            LIMIT 100
-        """)
-        attendance = cursor.fetchall()
-        conn.close()
-
-        self.attendance_table.setRowCount(len(attendance))
-        for row, att in enumerate(attendance):
-            for col, value in enumerate(att):
-                self.attendance_table.setItem(row, col, QTableWidgetItem(str(value)))
+        conditions = []
+        params = []
+        if self.att_date_check.isChecked():
+            condition, values = date_range_filter("a.date", self.att_date_from.date().toPyDate(),
+                                                  self.att_date_to.date().toPyDate())
+            conditions.append(condition)
+            params += values
+        where, values = employee_filter(db.get_connection(), self.att_employee_input.text(), "a.employee_id")
+        if where:
+            conditions.append(where)
+            params += values
+        self.attendance_model.set_filter(' AND '.join(conditions), params)
 
     def add_payroll_tab(self):
         tab = QWidget()
@@ -605,71 +773,104 @@ class MainWindow(QMainWindow):
         generate_btn.clicked.connect(self.generate_payroll)
         layout.addWidget(generate_btn)
 
-        # Table
-        self.payroll_table = QTableWidget()
-        self.payroll_table.setColumnCount(8)
-        self.payroll_table.setHorizontalHeaderLabels(["ID", "Employee", "Month", "Year", "Payable Days", "Gross", "Deductions", "Net"])
+        payslips_btn = QPushButton("Generate Payslips")
+        payslips_btn.clicked.connect(self.generate_payslips)
+        layout.addWidget(payslips_btn)
+
+        arrears_btn = QPushButton("Compute Arrears")
+        arrears_btn.clicked.connect(self.compute_arrears)
+        layout.addWidget(arrears_btn)
+
+        # Table, filled page by page as it scrolls
+        self.payroll_model = KeysetTableModel(*PAYROLL_TABLE, parent=self)
+        self.payroll_table = QTableView()
+        self.payroll_table.setModel(self.payroll_model)
         layout.addWidget(self.payroll_table)
 
-        self.tab_widget.addTab(tab, "Payroll")
         self.load_payroll()
+        return tab
 
     def generate_payroll(self):
-        # Simple payroll generation for current month
+        # Payroll for the current month, pro-rated by attendance
         from datetime import datetime
         now = datetime.now()
-        month = now.month
-        year = now.year
+        self.run_job("Payroll generation", self.payroll_generated,
+                     payroll_engine.generate_payroll, now.month, now.year, self.user_id)
 
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
-
-        # Get all employees
-        cursor.execute("SELECT id, employee_id, basic_salary, hra, conveyance, pf, esic FROM employees WHERE status = 'active'")
-        employees = cursor.fetchall()
-
-        for emp in employees:
-            emp_id, emp_code, basic, hra, conv, pf, esic = emp
+    def payroll_generated(self, result):
+        QMessageBox.information(self, "Success",
+                                f"Payroll generated successfully for {result['employees']} employees.\n"
+                                f"{result['recomputed']} recomputed, {result['unchanged']} unchanged since the last run.")
+        self.load_payroll()
 
-            # Calculate payable days (simplified - assume 30 days)
-            payable_days = 30  # In real app, calculate from attendance
+    def generate_payslips(self):
+        periods = db.get_connection().execute("""
+            SELECT year, month FROM stats_payroll_period WHERE employees > 0 ORDER BY year DESC, month DESC
+        """).fetchall()
+        if not periods:
+            QMessageBox.information(self, "Payslips", "Generate payroll first; there are no payroll periods yet.")
+            return
+        labels = [f"{year}-{month:02d}" for year, month in periods]
+        label, ok = QInputDialog.getItem(self, "Generate Payslips", "Payroll period:", labels, 0, False)
+        if not ok:
+            return
+        output_dir = QFileDialog.getExistingDirectory(self, "Save Payslips To")
+        if not output_dir:
+            return
+        year, month = periods[labels.index(label)]
+        self.run_job("Payslip generation", self.payslips_generated,
+                     generate_payslips, month, year, output_dir, workers=os.cpu_count() or 1)
 
-            gross = basic + (hra or 0) + (conv or 0)
-            deductions = (pf or 0) + (esic or 0)
-            net = gross - deductions
+    def payslips_generated(self, result):
+        QMessageBox.information(self, "Success",
+                                f"{result['payslips']} payslips generated in {result['seconds']:.1f}s.\n"
+                                f"Files: {result['folder']}\nArchive: {result['archive']}")
 
-            cursor.execute("""
-                INSERT INTO payroll (employee_id, month, year, payable_days, basic, hra, conveyance, gross, pf, esic, net_salary, generated_by)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (emp_id, month, year, payable_days, basic, hra, conv, gross, pf, esic, net, self.user_id))
+    def compute_arrears(self):
+        # Differences owed for earlier paid months, settled with the current month's payroll
+        from datetime import datetime
+        now = datetime.now()
+        self.run_job("Arrears computation", self.arrears_computed,
+                     compute_arrears, now.month, now.year, self.user_id)
 
-        conn.commit()
-        conn.close()
-        QMessageBox.information(self, "Success", "Payroll generated successfully.")
-        self.load_payroll()
+    def arrears_computed(self, result):
+        QMessageBox.information(self, "Arrears",
+                                f"Checked {result['checked']} payslips across {result['periods']} earlier months.\n"
+                                f"{result['arrears']} owe arrears for {result['employees']} employees: "
+                                f"net {result['net']:,.2f}.")
 
     def load_payroll(self):
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT p.id, e.employee_id, p.month, p.year, p.payable_days, p.gross, p.pf + p.esic, p.net_salary
-            FROM payroll p
-            LEFT JOIN employees e ON p.employee_id = e.id
-            ORDER BY p.year DESC, p.month DESC
-            LIMIT 100
-        """)
-        payroll = cursor.fetchall()
-        conn.close()
-
-        self.payroll_table.setRowCount(len(payroll))
-        for row, pay in enumerate(payroll):
-            for col, value in enumerate(pay):
-                self.payroll_table.setItem(row, col, QTableWidgetItem(str(value)))
+        self.payroll_model.refresh()
 
     def add_reports_tab(self):
         tab = QWidget()
         layout = QVBoxLayout(tab)
 
+        # Filters applied to both exports
+        filter_layout = QHBoxLayout()
+        self.report_date_check = QCheckBox("Date range:")
+        filter_layout.addWidget(self.report_date_check)
+        self.report_date_from = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.report_date_from.setCalendarPopup(True)
+        filter_layout.addWidget(self.report_date_from)
+        filter_layout.addWidget(QLabel("to"))
+        self.report_date_to = QDateEdit(QDate.currentDate())
+        self.report_date_to.setCalendarPopup(True)
+        filter_layout.addWidget(self.report_date_to)
+
+        filter_layout.addWidget(QLabel("Company:"))
+        self.report_company_combo = QComboBox()
+        filter_layout.addWidget(self.report_company_combo)
+
+        filter_layout.addWidget(QLabel("Department:"))
+        self.report_dept_combo = QComboBox()
+        filter_layout.addWidget(self.report_dept_combo)
+
+        refresh_btn = QPushButton("Refresh Lists")
+        refresh_btn.clicked.connect(self.load_report_filters)
+        filter_layout.addWidget(refresh_btn)
+        layout.addLayout(filter_layout)
+
         # Export buttons
         export_attendance_btn = QPushButton("Export Attendance Report")
         export_attendance_btn.clicked.connect(self.export_attendance)
@@ -678,49 +879,46 @@ class MainWindow(QMainWindow):
         export_payroll_btn = QPushButton("Export Payroll Report")
         export_payroll_btn.clicked.connect(self.export_payroll)
         layout.addWidget(export_payroll_btn)
-
-        self.tab_widget.addTab(tab, "Reports")
+        layout.addStretch()
+
+        self.load_report_filters()
+        return tab
+
+    def load_report_filters(self):
+        self.load_companies_combo(self.report_company_combo)
+        self.report_company_combo.insertItem(0, "All companies", None)
+        self.report_company_combo.setCurrentIndex(0)
+        self.load_departments_combo(self.report_dept_combo)
+        self.report_dept_combo.insertItem(0, "All departments", None)
+        self.report_dept_combo.setCurrentIndex(0)
+
+    def report_filters(self):
+        filters = {
+            'company_id': self.report_company_combo.currentData(),
+            'department_id': self.report_dept_combo.currentData(),
+        }
+        if self.report_date_check.isChecked():
+            filters['date_from'] = self.report_date_from.date().toPyDate()
+            filters['date_to'] = self.report_date_to.date().toPyDate()
+        return filters
 
     def export_attendance(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Attendance Report", "", "Excel Files (*.xlsx);;CSV Files (*.csv)")
         if not file_path:
             return
 
-        conn = sqlite3.connect("database/hrms.db")
-        df = pd.read_sql_query("""
-            SELECT e.employee_id, e.first_name, e.last_name, a.date, a.check_in, a.check_out, a.hours_worked, a.status
-            FROM attendance a
-            LEFT JOIN employees e ON a.employee_id = e.id
-        """, conn)
-        conn.close()
-
-        if file_path.endswith('.xlsx'):
-            df.to_excel(file_path, index=False)
-        else:
-            df.to_csv(file_path, index=False)
-
-        QMessageBox.information(self, "Success", "Attendance report exported successfully.")
+        self.run_job("Attendance export",
+                     lambda rows: QMessageBox.information(self, "Success", f"Attendance report exported successfully ({rows} rows)."),
+                     reports.export_attendance_report, file_path, **self.report_filters())
 
     def export_payroll(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Payroll Report", "", "Excel Files (*.xlsx);;CSV Files (*.csv)")
         if not file_path:
             return
 
-        conn = sqlite3.connect("database/hrms.db")
-        df = pd.read_sql_query("""
-            SELECT e.employee_id, e.first_name, e.last_name, p.month, p.year, p.payable_days,
-                   p.basic, p.hra, p.conveyance, p.gross, p.pf, p.esic, p.net_salary
-            FROM payroll p
-            LEFT JOIN employees e ON p.employee_id = e.id
-        """, conn)
-        conn.close()
-
-        if file_path.endswith('.xlsx'):
-            df.to_excel(file_path, index=False)
-        else:
-            df.to_csv(file_path, index=False)
-
-        QMessageBox.information(self, "Success", "Payroll report exported successfully.")
+        self.run_job("Payroll export",
+                     lambda rows: QMessageBox.information(self, "Success", f"Payroll report exported successfully ({rows} rows)."),
+                     reports.export_payroll_report, file_path, **self.report_filters())
 
     def add_documents_tab(self):
         tab = QWidget()
@@ -737,8 +935,8 @@ class MainWindow(QMainWindow):
         self.documents_table.setHorizontalHeaderLabels(["ID", "Employee", "Type", "File"])
         layout.addWidget(self.documents_table)
 
-        self.tab_widget.addTab(tab, "Documents")
         self.load_documents()
+        return tab
 
     def upload_document(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Document", "", "All Files (*)")
@@ -746,11 +944,10 @@ class MainWindow(QMainWindow):
             return
 
         # Select employee
-        conn = sqlite3.connect("database/hrms.db")
+        conn = db.get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, employee_id, first_name, last_name FROM employees")
         employees = cursor.fetchall()
-        conn.close()
 
         if not employees:
             QMessageBox.warning(self, "Error", "No employees found.")
@@ -768,18 +965,15 @@ class MainWindow(QMainWindow):
         import shutil
         shutil.copy(file_path, dest_path)
 
-        conn = sqlite3.connect("database/hrms.db")
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO documents (employee_id, document_type, file_path, uploaded_by) VALUES (?, ?, ?, ?)",
-                     (emp_id, doc_type, str(dest_path), self.user_id))
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute("INSERT INTO documents (employee_id, document_type, file_path, uploaded_by) VALUES (?, ?, ?, ?)",
+                         (emp_id, doc_type, str(dest_path), self.user_id))
 
         QMessageBox.information(self, "Success", "Document uploaded successfully.")
         self.load_documents()
 
     def load_documents(self):
-        conn = sqlite3.connect("database/hrms.db")
+        conn = db.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
             SELECT d.id, e.employee_id, d.document_type, d.file_path
@@ -787,7 +981,6 @@ class MainWindow(QMainWindow):
             LEFT JOIN employees e ON d.employee_id = e.id
         """)
         documents = cursor.fetchall()
-        conn.close()
 
         self.documents_table.setRowCount(len(documents))
         for row, doc in enumerate(documents):
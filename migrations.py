@@ -0,0 +1,616 @@
+import sqlite3
+
+# Schema changes applied on top of the tables created by database_setup.create_database.
+# Each migration runs once, in order, inside its own transaction; PRAGMA user_version
+# records how many have been applied, so existing hrms.db files are upgraded in place.
+
+
+def _payroll_unique_period(cursor):
+    # Databases created before incremental payroll runs lack the input fingerprint column
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(payroll)")}
+    if 'input_hash' not in columns:
+        cursor.execute("ALTER TABLE payroll ADD COLUMN input_hash INTEGER")
+
+    # Repeated runs used to insert duplicate periods; keep the latest row for each
+    cursor.execute("""
+        DELETE FROM payroll WHERE id NOT IN (
+            SELECT MAX(id) FROM payroll GROUP BY employee_id, month, year
+        )
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_payroll_employee_period ON payroll (employee_id, month, year)
+    """)
+
+
+def _hot_path_indexes(cursor):
+    # Without a unique key INSERT OR REPLACE never replaced anything; keep the latest upload per day
+    cursor.execute("""
+        DELETE FROM attendance WHERE id NOT IN (
+            SELECT MAX(id) FROM attendance GROUP BY employee_id, date
+        )
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_employee_date ON attendance (employee_id, date)
+    """)
+    # Covers the payroll month aggregation and the newest-first attendance listing
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date, employee_id, status, hours_worked)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_payroll_period ON payroll (year, month)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_employees_position ON employees (position_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_employees_status ON employees (status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_positions_department ON positions (department_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_departments_company ON departments (company_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_employee ON documents (employee_id)")
+
+
+def _employee_id_sequence(cursor):
+    # Allocation continues after the highest code in use, not the row count
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS id_sequences (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO id_sequences (name, value)
+        SELECT 'employee_id', COALESCE(MAX(CAST(SUBSTR(employee_id, 4) AS INTEGER)), 0)
+        FROM employees
+        WHERE employee_id GLOB 'EMP[0-9]*'
+    """)
+
+
+def _dashboard_summaries(cursor):
+    # Running totals for the dashboard, kept current by triggers so it never scans the base tables.
+    # Headcount is kept per position; positions roll up to departments and companies at read time,
+    # so moving a position or department doesn't touch these rows.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_headcount (
+            position_id INTEGER NOT NULL,  -- 0 when the employee has no position
+            status TEXT NOT NULL,
+            employees INTEGER NOT NULL,
+            PRIMARY KEY (position_id, status)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_attendance_daily (
+            date DATE PRIMARY KEY,
+            recorded INTEGER NOT NULL,
+            attended INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_payroll_period (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            employees INTEGER NOT NULL,
+            gross REAL NOT NULL,
+            net REAL NOT NULL,
+            PRIMARY KEY (year, month)
+        )
+    """)
+
+    cursor.execute("""
+        INSERT INTO stats_headcount (position_id, status, employees)
+        SELECT COALESCE(position_id, 0), COALESCE(status, ''), COUNT(*) FROM employees GROUP BY 1, 2
+    """)
+    cursor.execute("""
+        INSERT INTO stats_attendance_daily (date, recorded, attended)
+        SELECT date, COUNT(*), SUM(COALESCE(status, 'present') != 'absent') FROM attendance GROUP BY date
+    """)
+    cursor.execute("""
+        INSERT INTO stats_payroll_period (year, month, employees, gross, net)
+        SELECT year, month, COUNT(*), COALESCE(SUM(gross), 0), COALESCE(SUM(net_salary), 0)
+        FROM payroll GROUP BY year, month
+    """)
+
+    headcount_add = """
+        INSERT INTO stats_headcount (position_id, status, employees)
+        VALUES (COALESCE(NEW.position_id, 0), COALESCE(NEW.status, ''), 1)
+        ON CONFLICT (position_id, status) DO UPDATE SET employees = employees + 1;
+    """
+    headcount_remove = """
+        UPDATE stats_headcount SET employees = employees - 1
+        WHERE position_id = COALESCE(OLD.position_id, 0) AND status = COALESCE(OLD.status, '');
+    """
+    attendance_add = """
+        INSERT INTO stats_attendance_daily (date, recorded, attended)
+        VALUES (NEW.date, 1, COALESCE(NEW.status, 'present') != 'absent')
+        ON CONFLICT (date) DO UPDATE SET
+            recorded = recorded + 1,
+            attended = attended + (COALESCE(NEW.status, 'present') != 'absent');
+    """
+    attendance_remove = """
+        UPDATE stats_attendance_daily SET
+            recorded = recorded - 1,
+            attended = attended - (COALESCE(OLD.status, 'present') != 'absent')
+        WHERE date = OLD.date;
+    """
+    payroll_add = """
+        INSERT INTO stats_payroll_period (year, month, employees, gross, net)
+        VALUES (NEW.year, NEW.month, 1, COALESCE(NEW.gross, 0), COALESCE(NEW.net_salary, 0))
+        ON CONFLICT (year, month) DO UPDATE SET
+            employees = employees + 1,
+            gross = gross + COALESCE(NEW.gross, 0),
+            net = net + COALESCE(NEW.net_salary, 0);
+    """
+    payroll_remove = """
+        UPDATE stats_payroll_period SET
+            employees = employees - 1,
+            gross = gross - COALESCE(OLD.gross, 0),
+            net = net - COALESCE(OLD.net_salary, 0)
+        WHERE year = OLD.year AND month = OLD.month;
+    """
+    triggers = {
+        'employees': (headcount_add, headcount_remove, 'position_id, status'),
+        'attendance': (attendance_add, attendance_remove, 'date, status'),
+        'payroll': (payroll_add, payroll_remove, 'year, month, gross, net_salary'),
+    }
+    for table, (add, remove, columns) in triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_insert AFTER INSERT ON {table} BEGIN {add} END")
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_delete AFTER DELETE ON {table} BEGIN {remove} END")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_update AFTER UPDATE OF {columns} ON {table}
+            BEGIN {remove} {add} END
+        """)
+
+
+def _employee_search(cursor):
+    # Full-text index over code, name and email for the Employees tab search box. SQLite builds
+    # without FTS5 skip it, and employee_search falls back to LIKE.
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5(
+                employee_id, first_name, last_name, email,
+                content='employees', content_rowid='id', prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return
+    columns = "employee_id, first_name, last_name, email"
+    add = f"INSERT INTO employees_fts (rowid, {columns}) VALUES (NEW.id, NEW.employee_id, NEW.first_name, NEW.last_name, NEW.email);"
+    remove = f"""
+        INSERT INTO employees_fts (employees_fts, rowid, {columns})
+        VALUES ('delete', OLD.id, OLD.employee_id, OLD.first_name, OLD.last_name, OLD.email);
+    """
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_employees_fts_insert AFTER INSERT ON employees BEGIN {add} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_employees_fts_delete AFTER DELETE ON employees BEGIN {remove} END")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_employees_fts_update AFTER UPDATE OF {columns} ON employees
+        BEGIN {remove} {add} END
+    """)
+    cursor.execute("INSERT INTO employees_fts (employees_fts) VALUES ('rebuild')")
+
+
+# The attendance parsing and hours rules _attendance_hours and _canonical_dates were written
+# against, copied from attendance_import as it was then. A migration has to do the same thing
+# whenever it runs, so these stay as they are when the importer's rules change.
+LEGACY_DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d', '%d-%m-%Y', '%Y-%m-%d %H:%M:%S']
+LEGACY_TIME_FORMATS = ['%H:%M', '%H:%M:%S', '%I:%M %p', '%I:%M:%S %p']
+LEGACY_FULL_DAY_HOURS = 6.0
+LEGACY_HALF_DAY_HOURS = 3.0
+LEGACY_PAID_FRACTIONS = {'half_day': 0.5, 'absent': 0.0}
+
+
+def _parse_legacy(values, formats):
+    import pandas as pd
+
+    text = values.astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors='coerce')
+    return parsed
+
+
+def _legacy_minutes(values):
+    # Minutes past midnight as floats, NaN where the time is missing or unreadable
+    parsed = _parse_legacy(values, LEGACY_TIME_FORMATS)
+    return parsed.dt.hour * 60 + parsed.dt.minute
+
+
+def _legacy_hours(check_in, check_out, status):
+    # hours_worked, status and paid_fraction from punch minutes; see _attendance_hours
+    import numpy as np
+    import pandas as pd
+
+    worked = check_out - check_in
+    worked = worked.where(worked >= 0, worked + 24 * 60)
+    hours = (worked / 60).round(2).mask((check_in == 0) & (check_out == 0), 0.0)
+    derived = pd.Series(np.select(
+        [hours >= LEGACY_FULL_DAY_HOURS, hours >= LEGACY_HALF_DAY_HOURS, hours.notna()],
+        ['present', 'half_day', 'absent'], 'present',
+    ), index=hours.index)
+    status = status.where(status.notna(), derived)
+    paid = status.map(LEGACY_PAID_FRACTIONS).fillna(1.0)
+    return hours, status, paid
+
+
+def _attendance_hours(cursor):
+    # Imports now store hours_worked, status and paid_fraction, so payroll sums paid_fraction
+    # instead of re-deriving each day. Existing rows are backfilled with the same rules; a status
+    # other than the column default came from the source and is kept.
+    import pandas as pd
+
+    cursor.execute("ALTER TABLE attendance ADD COLUMN paid_fraction REAL")
+    last_id = 0
+    while True:
+        rows = cursor.execute("""
+            SELECT id, check_in, check_out, status FROM attendance WHERE id > ? ORDER BY id LIMIT 50000
+        """, (last_id,)).fetchall()
+        if not rows:
+            break
+        data = pd.DataFrame(rows, columns=['id', 'check_in', 'check_out', 'status'])
+        status = data['status'].where(data['status'] != 'present')
+        hours, status, paid = _legacy_hours(_legacy_minutes(data['check_in']), _legacy_minutes(data['check_out']),
+                                            status)
+        hours = hours.astype(object).where(hours.notna(), None)
+        cursor.executemany("""
+            UPDATE attendance SET hours_worked = ?, status = ?, paid_fraction = ? WHERE id = ?
+        """, zip(hours.tolist(), status.tolist(), paid.tolist(), data['id'].tolist()))
+        last_id = rows[-1][0]
+    # Lets the payroll month sum read paid_fraction from the index alone
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_attendance_employee_paid ON attendance (employee_id, date, paid_fraction)
+    """)
+
+
+def _canonical_dates(cursor):
+    # Uploads from before normalized imports stored dates as typed (1/1/2026, 2026-01-01 00:00:00),
+    # which sort as text and fall outside every BETWEEN. Rewrite them as YYYY-MM-DD; where that
+    # lands on a day the employee already has, the newest row is kept, as in _hot_path_indexes.
+    # Punch times typed as 9:00, 09:00:00 or 9:00 AM become HH:MM, the form imports write.
+    # Values no format recognizes are left as they are.
+    import pandas as pd
+
+    rows = cursor.execute("""
+        SELECT id, check_in, check_out FROM attendance
+        WHERE check_in NOT GLOB '[0-2][0-9]:[0-5][0-9]' OR check_out NOT GLOB '[0-2][0-9]:[0-5][0-9]'
+    """).fetchall()
+    if rows:
+        times = pd.DataFrame(rows, columns=['id', 'check_in', 'check_out'])
+        for col in ('check_in', 'check_out'):
+            parsed = _parse_legacy(times[col], LEGACY_TIME_FORMATS)
+            times[col] = parsed.dt.strftime('%H:%M').where(parsed.notna(), times[col])
+        cursor.executemany("UPDATE attendance SET check_in = ?, check_out = ? WHERE id = ?",
+                           zip(times['check_in'].tolist(), times['check_out'].tolist(), times['id'].tolist()))
+
+    rows = cursor.execute("""
+        SELECT id, employee_id, date FROM attendance
+        WHERE date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+    """).fetchall()
+    if not rows:
+        return
+    legacy = pd.DataFrame(rows, columns=['id', 'employee_id', 'date'])
+    legacy['date'] = _parse_legacy(legacy['date'], LEGACY_DATE_FORMATS).dt.strftime('%Y-%m-%d')
+    legacy = legacy[legacy['date'].notna()]
+
+    cursor.execute("CREATE TEMP TABLE canonical_dates (id INTEGER PRIMARY KEY, employee_id INTEGER, date TEXT)")
+    cursor.executemany("INSERT INTO canonical_dates (id, employee_id, date) VALUES (?, ?, ?)",
+                       zip(legacy['id'].tolist(), legacy['employee_id'].tolist(), legacy['date'].tolist()))
+    existing = pd.DataFrame(cursor.execute("""
+        SELECT a.id, a.employee_id, a.date
+        FROM canonical_dates c
+        JOIN attendance a ON a.employee_id = c.employee_id AND a.date = c.date
+    """).fetchall(), columns=['id', 'employee_id', 'date'])
+    days = pd.concat([legacy, existing]).drop_duplicates('id')
+    newest = days.groupby(['employee_id', 'date'])['id'].transform('max')
+    stale = days.loc[days['id'] != newest, 'id']
+    legacy = legacy[~legacy['id'].isin(stale)]
+
+    # Deletes and date updates go through the stats triggers, which move the daily counts
+    cursor.executemany("DELETE FROM attendance WHERE id = ?", ((i,) for i in stale.tolist()))
+    cursor.executemany("UPDATE attendance SET date = ? WHERE id = ?",
+                       zip(legacy['date'].tolist(), legacy['id'].tolist()))
+    cursor.execute("DELETE FROM stats_attendance_daily WHERE recorded = 0")
+    cursor.execute("DROP TABLE canonical_dates")
+
+
+# Seed rule versions (India, central rates; professional tax per the Maharashtra schedule).
+# New versions are added as rows with a later effective_from rather than by editing these.
+STATUTORY_RATES = [
+    ('pf_rate', '2014-09-01', 0.12),
+    ('pf_wage_ceiling', '2014-09-01', 15000),
+    ('esic_rate', '2017-01-01', 0.0175),
+    ('esic_rate', '2019-07-01', 0.0075),
+    ('esic_wage_limit', '2017-01-01', 21000),
+    ('tds_standard_deduction', '2023-04-01', 50000),
+    ('tds_standard_deduction', '2024-04-01', 75000),
+    ('tds_rebate_limit', '2023-04-01', 700000),
+    ('tds_rebate_limit', '2025-04-01', 1200000),
+    ('tds_cess_rate', '2018-04-01', 0.04),
+]
+
+# (code, effective_from, lower_bound, amount, rate): a fixed amount for the slab plus a
+# marginal rate on the part above its lower bound
+STATUTORY_SLABS = [
+    ('professional_tax', '2000-01-01', 0, 0, 0),
+    ('professional_tax', '2000-01-01', 7500, 175, 0),
+    ('professional_tax', '2000-01-01', 10000, 200, 0),
+] + [
+    ('income_tax', effective_from, lower, 0, rate)
+    for effective_from, slabs in [
+        ('2023-04-01', [(0, 0), (300000, 0.05), (600000, 0.10), (900000, 0.15), (1200000, 0.20), (1500000, 0.30)]),
+        ('2024-04-01', [(0, 0), (300000, 0.05), (700000, 0.10), (1000000, 0.15), (1200000, 0.20), (1500000, 0.30)]),
+        ('2025-04-01', [(0, 0), (400000, 0.05), (800000, 0.10), (1200000, 0.15), (1600000, 0.20),
+                        (2000000, 0.25), (2400000, 0.30)]),
+    ]
+    for lower, rate in slabs
+]
+
+
+def _statutory_rules(cursor):
+    # Deductions move from flat amounts on the employee row to rates and slabs applied by statutory.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS statutory_rates (
+            code TEXT NOT NULL,
+            effective_from DATE NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (code, effective_from)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS statutory_slabs (
+            code TEXT NOT NULL,
+            effective_from DATE NOT NULL,
+            lower_bound REAL NOT NULL,
+            amount REAL NOT NULL DEFAULT 0,
+            rate REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (code, effective_from, lower_bound)
+        )
+    """)
+    cursor.executemany("INSERT OR IGNORE INTO statutory_rates (code, effective_from, value) VALUES (?, ?, ?)",
+                       STATUTORY_RATES)
+    cursor.executemany("""
+        INSERT OR IGNORE INTO statutory_slabs (code, effective_from, lower_bound, amount, rate) VALUES (?, ?, ?, ?, ?)
+    """, STATUTORY_SLABS)
+
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(payroll)")}
+    for column in ('professional_tax', 'tds'):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE payroll ADD COLUMN {column} REAL")
+
+
+def _salary_history(cursor):
+    # employees keeps the current salary; salary_revisions keeps every version with the date it
+    # took effect, so payroll for a past month uses the salary of that month. A salary an
+    # employee was created with applies to all months before their first revision.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS salary_revisions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            effective_from DATE NOT NULL,
+            basic_salary REAL,
+            hra REAL,
+            conveyance REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (employee_id) REFERENCES employees(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_salary_revisions_employee_date
+        ON salary_revisions (employee_id, effective_from)
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO salary_revisions (employee_id, effective_from, basic_salary, hra, conveyance)
+        SELECT id, '0001-01-01', basic_salary, hra, conveyance FROM employees
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_employees_salary_insert AFTER INSERT ON employees BEGIN
+            INSERT OR IGNORE INTO salary_revisions (employee_id, effective_from, basic_salary, hra, conveyance)
+            VALUES (NEW.id, '0001-01-01', NEW.basic_salary, NEW.hra, NEW.conveyance);
+        END
+    """)
+    # A salary changed on the employee row takes effect today. salary_history.add_salary_revision
+    # writes its revision first, so the row it then updates already matches and is skipped here.
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_employees_salary_update
+        AFTER UPDATE OF basic_salary, hra, conveyance ON employees
+        WHEN NOT EXISTS (
+            SELECT 1 FROM (
+                SELECT basic_salary, hra, conveyance FROM salary_revisions
+                WHERE employee_id = NEW.id AND effective_from <= date('now', 'localtime')
+                ORDER BY effective_from DESC LIMIT 1
+            ) r
+            WHERE r.basic_salary IS NEW.basic_salary AND r.hra IS NEW.hra AND r.conveyance IS NEW.conveyance
+        )
+        BEGIN
+            INSERT INTO salary_revisions (employee_id, effective_from, basic_salary, hra, conveyance)
+            VALUES (NEW.id, date('now', 'localtime'), NEW.basic_salary, NEW.hra, NEW.conveyance)
+            ON CONFLICT (employee_id, effective_from) DO UPDATE SET
+                basic_salary = excluded.basic_salary,
+                hra = excluded.hra,
+                conveyance = excluded.conveyance,
+                created_at = CURRENT_TIMESTAMP;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_employees_salary_delete AFTER DELETE ON employees BEGIN
+            DELETE FROM salary_revisions WHERE employee_id = OLD.id;
+        END
+    """)
+
+
+def _payroll_arrears(cursor):
+    # Differences between what a closed month paid and what it should have paid after a
+    # back-dated change, paid out in a later cycle (see arrears.py). Amount columns mirror payroll.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS payroll_arrears (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            cycle_year INTEGER NOT NULL,
+            cycle_month INTEGER NOT NULL,
+            payable_days REAL,
+            basic REAL,
+            hra REAL,
+            conveyance REAL,
+            gross REAL,
+            pf REAL,
+            esic REAL,
+            professional_tax REAL,
+            tds REAL,
+            net_salary REAL,
+            input_hash INTEGER,
+            generated_by INTEGER,
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (employee_id) REFERENCES employees(id),
+            FOREIGN KEY (generated_by) REFERENCES users(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_payroll_arrears_period_cycle
+        ON payroll_arrears (employee_id, year, month, cycle_year, cycle_month)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_payroll_arrears_cycle ON payroll_arrears (cycle_year, cycle_month)")
+
+
+def _attendance_working_days(cursor):
+    # stats_attendance_daily counted every status but 'absent' as attended, so weekly offs,
+    # holidays and leave raised the attendance rate. Offs and holidays are not working days and
+    # drop out of `recorded`; only present and half days count as attended.
+    def working(row):
+        return f"(COALESCE({row}.status, 'present') NOT IN ('off', 'holiday'))"
+
+    def attended(row):
+        return f"(COALESCE({row}.status, 'present') IN ('present', 'half_day'))"
+
+    add = f"""
+        INSERT INTO stats_attendance_daily (date, recorded, attended)
+        VALUES (NEW.date, {working('NEW')}, {attended('NEW')})
+        ON CONFLICT (date) DO UPDATE SET
+            recorded = recorded + {working('NEW')},
+            attended = attended + {attended('NEW')};
+    """
+    remove = f"""
+        UPDATE stats_attendance_daily SET
+            recorded = recorded - {working('OLD')},
+            attended = attended - {attended('OLD')}
+        WHERE date = OLD.date;
+    """
+    for event in ('insert', 'delete', 'update'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_attendance_stats_{event}")
+    cursor.execute(f"CREATE TRIGGER trg_attendance_stats_insert AFTER INSERT ON attendance BEGIN {add} END")
+    cursor.execute(f"CREATE TRIGGER trg_attendance_stats_delete AFTER DELETE ON attendance BEGIN {remove} END")
+    cursor.execute(f"""
+        CREATE TRIGGER trg_attendance_stats_update AFTER UPDATE OF date, status ON attendance
+        BEGIN {remove} {add} END
+    """)
+
+    cursor.execute("DELETE FROM stats_attendance_daily")
+    cursor.execute(f"""
+        INSERT INTO stats_attendance_daily (date, recorded, attended)
+        SELECT date, SUM({working('attendance')}), SUM({attended('attendance')}) FROM attendance GROUP BY date
+    """)
+
+
+def _salary_revision_dates(cursor):
+    # Finds the revisions taking effect inside a payroll month (salary_history.split_salaries)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_salary_revisions_effective ON salary_revisions (effective_from)")
+
+
+def _arrears_change_tracking(cursor):
+    # arrears.py finds the (employee, month) pairs to recompute from what changed after they were
+    # paid: salary revisions by created_at, attendance by uploaded_at and statutory rule versions
+    # by created_at. Rule rows get the column here, stamped by triggers since ALTER TABLE can't
+    # add a CURRENT_TIMESTAMP default; the seeded rows keep NULL, older than any payroll.
+    # Late attendance for a month is one seek per day of it: date = ? AND uploaded_at >= ?
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date_uploaded ON attendance (date, uploaded_at, employee_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_salary_revisions_created ON salary_revisions (created_at)")
+    # When each period was first paid, as one seek; replaces the (year, month) index it extends
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_payroll_period_generated ON payroll (year, month, generated_at)")
+    cursor.execute("DROP INDEX IF EXISTS idx_payroll_period")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_payroll_arrears_period ON payroll_arrears (year, month)")
+    for table, columns in [('statutory_rates', 'value'), ('statutory_slabs', 'lower_bound, amount, rate')]:
+        if 'created_at' not in {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN created_at TIMESTAMP")
+        stamp = f"UPDATE {table} SET created_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;"
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_created AFTER INSERT ON {table} BEGIN {stamp} END")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_changed AFTER UPDATE OF effective_from, {columns} ON {table}
+            BEGIN {stamp} END
+        """)
+
+
+def _department_counts(cursor):
+    # The dashboard's department count, kept per company like stats_headcount so it is read
+    # without counting the departments table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_departments (
+            company_id INTEGER PRIMARY KEY,  -- 0 when the department has no company
+            departments INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO stats_departments (company_id, departments)
+        SELECT COALESCE(company_id, 0), COUNT(*) FROM departments GROUP BY 1
+    """)
+    add = """
+        INSERT INTO stats_departments (company_id, departments) VALUES (COALESCE(NEW.company_id, 0), 1)
+        ON CONFLICT (company_id) DO UPDATE SET departments = departments + 1;
+    """
+    remove = """
+        UPDATE stats_departments SET departments = departments - 1 WHERE company_id = COALESCE(OLD.company_id, 0);
+    """
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_departments_stats_insert AFTER INSERT ON departments BEGIN {add} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_departments_stats_delete AFTER DELETE ON departments BEGIN {remove} END")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_departments_stats_update AFTER UPDATE OF company_id ON departments
+        BEGIN {remove} {add} END
+    """)
+
+
+def _attendance_uploads(cursor):
+    # Each upload stamps the rows it writes with an id from id_sequences, so a later batch of the
+    # same upload merges its punches into a day the upload already wrote, while a day stored by
+    # an earlier upload is replaced (attendance_import.import_attendance)
+    if 'upload_id' not in {row[1] for row in cursor.execute("PRAGMA table_info(attendance)")}:
+        cursor.execute("ALTER TABLE attendance ADD COLUMN upload_id INTEGER")
+    cursor.execute("INSERT OR IGNORE INTO id_sequences (name, value) VALUES ('attendance_upload', 0)")
+
+
+# Append only: the position in this list is the schema version a migration brings the database to
+MIGRATIONS = [
+    _payroll_unique_period,
+    _hot_path_indexes,
+    _employee_id_sequence,
+    _dashboard_summaries,
+    _employee_search,
+    _attendance_hours,
+    _canonical_dates,
+    _statutory_rules,
+    _salary_history,
+    _payroll_arrears,
+    _attendance_working_days,
+    _salary_revision_dates,
+    _arrears_change_tracking,
+    _department_counts,
+    _attendance_uploads,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    version = schema_version(conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema version {version} is newer than this application ({SCHEMA_VERSION}).")
+
+    for number in range(version + 1, SCHEMA_VERSION + 1):
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            MIGRATIONS[number - 1](cursor)
+            cursor.execute(f"PRAGMA user_version = {number}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    return SCHEMA_VERSION
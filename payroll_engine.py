@@ -0,0 +1,254 @@
+import calendar
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+
+import db
+from periods import month_bounds, month_filter
+from salary_history import SALARY_AS_OF_JOIN, split_salaries
+from statutory import load_statutory_rules, rules_fingerprint, rules_for_period, statutory_deductions
+
+PAYROLL_COLUMNS = ['employee_id', 'payable_days', 'basic', 'hra', 'conveyance', 'gross', 'pf', 'esic',
+                   'professional_tax', 'tds', 'net_salary']
+
+
+# Columns a run can be split on; each partition is computed independently
+PARTITION_COLUMNS = {
+    'company': 'd.company_id',
+    'department': 'po.department_id',
+}
+
+ORG_JOINS = """
+    LEFT JOIN positions po ON e.position_id = po.id
+    LEFT JOIN departments d ON po.department_id = d.id
+"""
+
+SALARY_COLUMNS = ['basic_salary', 'hra', 'conveyance']
+
+INPUT_DTYPES = {'basic_salary': float, 'hra': float, 'conveyance': float, 'payable_days': float}
+
+
+def prorate_salaries(inputs, split):
+    # Where a revision took effect mid-month, each salary is paid for the paid days it was in
+    # force: the salary columns become their paid-day weighted average, so that salary times
+    # payable_days is the sum over the segments. Without paid days the month-end salary stays.
+    paid = split.groupby('employee_id')['payable_days'].transform('sum')
+    weighted = split[SALARY_COLUMNS].mul(split['payable_days'] / paid, axis=0)
+    rates = weighted.groupby(split['employee_id']).sum()[paid.groupby(split['employee_id']).first() > 0]
+    rows = inputs['employee_id'].isin(rates.index)
+    inputs.loc[rows, SALARY_COLUMNS] = rates.loc[inputs.loc[rows, 'employee_id'], SALARY_COLUMNS].to_numpy()
+    return inputs
+
+
+def load_payroll_inputs(conn, month, year, partition_by=None, partition=None, employees=None):
+    # Salaries are the revisions in force at the end of the month, pro-rated where one took
+    # effect during it, so rerunning a past month pays what was due then. Attendance is summed
+    # per employee through idx_attendance_employee_paid, so restricting the employee set to one
+    # company/department restricts the attendance read with it. employees names a temp table
+    # of employee ids to load instead of today's active employees (see arrears.py).
+    month_start, month_end = month_bounds(year, month)
+    period, period_params = month_filter('a.date', year, month)
+    params = [month_end] + period_params
+    joins = ''
+    where = "e.status = 'active'"
+    if employees:
+        where = f"e.id IN (SELECT employee_id FROM {employees})"
+    if partition_by:
+        joins = ORG_JOINS
+        where += f" AND {PARTITION_COLUMNS[partition_by]} IS ?"
+        params.append(partition)
+    inputs = pd.read_sql_query(f"""
+        SELECT e.id AS employee_id, s.basic_salary, s.hra, s.conveyance,
+               COALESCE(SUM(a.paid_fraction), 0) AS payable_days
+        FROM employees e
+        {joins}
+        {SALARY_AS_OF_JOIN}
+        LEFT JOIN attendance a ON a.employee_id = e.id AND {period}
+        WHERE {where}
+        GROUP BY e.id
+    """, conn, params=params)
+    split = split_salaries(conn, month_start, month_end)
+    split = split[split['employee_id'].isin(inputs['employee_id'])]
+    if len(split):
+        inputs = prorate_salaries(inputs.astype(INPUT_DTYPES), split)
+    # Fixed dtypes keep input hashes identical however the employees were partitioned
+    return inputs.astype(INPUT_DTYPES)
+
+
+def payroll_partitions(conn, partition_by):
+    # None collects employees with no position/department/company
+    return [row[0] for row in conn.execute(f"""
+        SELECT DISTINCT {PARTITION_COLUMNS[partition_by]}
+        FROM employees e
+        {ORG_JOINS}
+        WHERE e.status = 'active'
+    """)]
+
+
+def compute_payroll(inputs, month, year, period_rules):
+    # Column arithmetic over the whole employee set; no per-employee Python loop. period_rules
+    # are the statutory rules in force for the month (statutory.rules_for_period).
+    days_in_month = calendar.monthrange(year, month)[1]
+    payable_days = inputs['payable_days'].to_numpy(dtype=float)
+    factor = np.clip(payable_days / days_in_month, 0.0, 1.0)
+
+    salary = {col: inputs[col].fillna(0).to_numpy(dtype=float) for col in ('basic_salary', 'hra', 'conveyance')}
+    payroll = pd.DataFrame({'employee_id': inputs['employee_id'], 'payable_days': payable_days})
+    payroll['basic'] = np.round(salary['basic_salary'] * factor, 2)
+    payroll['hra'] = np.round(salary['hra'] * factor, 2)
+    payroll['conveyance'] = np.round(salary['conveyance'] * factor, 2)
+    payroll['gross'] = payroll['basic'] + payroll['hra'] + payroll['conveyance']
+    deductions = statutory_deductions(period_rules, payroll['basic'].to_numpy(), payroll['gross'].to_numpy(),
+                                      salary['basic_salary'] + salary['hra'] + salary['conveyance'])
+    for col, amounts in deductions.items():
+        payroll[col] = amounts
+    payroll['net_salary'] = np.round(payroll['gross'] - sum(payroll[col] for col in deductions), 2)
+    return payroll[PAYROLL_COLUMNS]
+
+
+def input_hashes(inputs):
+    # Fingerprint of everything a payroll row is computed from; stored so reruns can skip unchanged rows
+    hashes = pd.util.hash_pandas_object(inputs, index=False).to_numpy()
+    return pd.Series(hashes.view('int64'), index=inputs.index)
+
+
+def find_changed(conn, inputs, month, year, partitioned=False):
+    # A partition only reads back its own employees' rows: their ids go through a temp table and
+    # each is one probe of idx_payroll_employee_period (CROSS JOIN keeps the temp table as the
+    # outer loop) instead of every worker reading the whole month
+    if partitioned:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS payroll_partition (employee_id INTEGER PRIMARY KEY)")
+        with conn:
+            conn.execute("DELETE FROM payroll_partition")
+            conn.executemany("INSERT INTO payroll_partition (employee_id) VALUES (?)",
+                             ((employee_id,) for employee_id in inputs['employee_id'].tolist()))
+        stored = pd.read_sql_query("""
+            SELECT p.employee_id, p.input_hash
+            FROM payroll_partition t
+            CROSS JOIN payroll p ON p.employee_id = t.employee_id AND p.month = ? AND p.year = ?
+        """, conn, params=(month, year))
+    else:
+        stored = pd.read_sql_query("""
+            SELECT employee_id, input_hash FROM payroll WHERE month = ? AND year = ?
+        """, conn, params=(month, year))
+    current = pd.MultiIndex.from_arrays([inputs['employee_id'], inputs['input_hash']])
+    unchanged = pd.MultiIndex.from_arrays([stored['employee_id'], stored['input_hash'].astype('Int64')])
+    return pd.Series(~current.isin(unchanged), index=inputs.index)
+
+
+def write_payroll(conn, payroll, month, year, generated_by):
+    count = len(payroll)
+    rows = zip(
+        payroll['employee_id'].astype('int64').tolist(),
+        [month] * count,
+        [year] * count,
+        *(payroll[col].tolist() for col in PAYROLL_COLUMNS[1:]),
+        payroll['input_hash'].astype('int64').tolist(),
+        [generated_by] * count,
+    )
+    with conn:
+        # Upsert keyed by (employee_id, month, year), so reruns update rows in place
+        conn.executemany("""
+            INSERT INTO payroll (employee_id, month, year, payable_days, basic, hra, conveyance,
+                                 gross, pf, esic, professional_tax, tds, net_salary, input_hash, generated_by)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (employee_id, month, year) DO UPDATE SET
+                payable_days = excluded.payable_days,
+                basic = excluded.basic,
+                hra = excluded.hra,
+                conveyance = excluded.conveyance,
+                gross = excluded.gross,
+                pf = excluded.pf,
+                esic = excluded.esic,
+                professional_tax = excluded.professional_tax,
+                tds = excluded.tds,
+                net_salary = excluded.net_salary,
+                input_hash = excluded.input_hash,
+                generated_by = excluded.generated_by,
+                generated_at = CURRENT_TIMESTAMP
+        """, rows)
+
+
+def _changed_payroll(conn, month, year, full, period_rules, partition_by=None, partition=None):
+    inputs = load_payroll_inputs(conn, month, year, partition_by, partition)
+    inputs['rules'] = rules_fingerprint(period_rules)
+    inputs['input_hash'] = input_hashes(inputs)
+    active = len(inputs)
+    if not full:
+        inputs = inputs[find_changed(conn, inputs, month, year, partitioned=partition_by is not None)]
+    payroll = compute_payroll(inputs, month, year, period_rules)
+    payroll['input_hash'] = inputs['input_hash']
+    return active, payroll
+
+
+def _compute_partition(db_path, month, year, full, period_rules, partition_by, partition):
+    # Runs in a worker process: read-only, with its own connection; the parent does the writing
+    conn = db.connect(db_path)
+    try:
+        return _changed_payroll(conn, month, year, full, period_rules, partition_by, partition)
+    finally:
+        conn.close()
+
+
+def _compute_parallel(conn, month, year, full, period_rules, workers, partition_by, progress):
+    db_path = conn.execute("PRAGMA database_list").fetchone()[2]
+    partitions = payroll_partitions(conn, partition_by)
+    if not partitions:
+        return _changed_payroll(conn, month, year, full, period_rules)
+    active = 0
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(partitions), 1))) as pool:
+        futures = [pool.submit(_compute_partition, db_path, month, year, full, period_rules, partition_by, partition)
+                   for partition in partitions]
+        for done, future in enumerate(as_completed(futures), start=1):
+            count, payroll = future.result()
+            active += count
+            results.append(payroll)
+            if progress:
+                progress(int(done * 50 / len(futures)))
+    return active, pd.concat(results, ignore_index=True)
+
+
+def period_closed(conn, month, year):
+    # A month with payroll is closed once a later cycle has started: payroll was run for a later
+    # month, or arrears were computed in a later cycle (compute_arrears takes every earlier month
+    # with payroll as paid). Its rows are then what was paid, and changes to it are settled as
+    # arrears; regenerating it would hide the difference from arrears or pay it twice.
+    return bool(conn.execute("""
+        SELECT EXISTS (SELECT 1 FROM stats_payroll_period WHERE year = ? AND month = ? AND employees > 0)
+           AND (EXISTS (SELECT 1 FROM stats_payroll_period WHERE employees > 0 AND (year, month) > (?, ?))
+                OR EXISTS (SELECT 1 FROM payroll_arrears WHERE (cycle_year, cycle_month) > (?, ?)))
+    """, (year, month, year, month, year, month)).fetchone()[0])
+
+
+def generate_payroll(conn, month, year, generated_by, full=False, progress=None, workers=1,
+                     partition_by='company', force=False):
+    # Only employees whose inputs changed since the last run for this period are recomputed.
+    # With workers > 1 each company (or department) is computed in its own process and the
+    # results are merged here, so the database only ever has one writer. Statutory rules are
+    # read and compiled once here and handed to the workers. A closed month is only regenerated
+    # with force.
+    start = time.perf_counter()
+    if not force and period_closed(conn, month, year):
+        raise ValueError(f"Payroll for {year}-{month:02d} has been paid and a later cycle has started; "
+                         f"changes to it are paid as arrears. Force the run to regenerate it anyway.")
+    period_rules = rules_for_period(load_statutory_rules(conn), month_bounds(year, month)[0])
+    if workers > 1:
+        active, payroll = _compute_parallel(conn, month, year, full, period_rules, workers, partition_by, progress)
+    else:
+        active, payroll = _changed_payroll(conn, month, year, full, period_rules)
+    if progress:
+        progress(60)
+    write_payroll(conn, payroll, month, year, generated_by)
+    if progress:
+        progress(100)
+    elapsed = time.perf_counter() - start
+    return {
+        'employees': active,
+        'recomputed': len(payroll),
+        'unchanged': active - len(payroll),
+        'gross': float(payroll['gross'].sum()),
+        'net': float(payroll['net_salary'].sum()),
+        'seconds': elapsed,
+    }
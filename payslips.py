@@ -0,0 +1,213 @@
+import calendar
+import csv
+import io
+import multiprocessing
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Rows rendered per task; the parent keeps the pool fed one chunk per fetchmany
+PAYSLIP_CHUNK_SIZE = 2_000
+
+# (label, payroll column) pairs printed in the two columns of the payslip
+PAYSLIP_EARNINGS = [("Basic", 'basic'), ("House Rent Allowance", 'hra'), ("Conveyance", 'conveyance')]
+PAYSLIP_DEDUCTIONS = [("Provident Fund", 'pf'), ("ESIC", 'esic'), ("Professional Tax", 'professional_tax'),
+                      ("Income Tax (TDS)", 'tds')]
+
+PAYSLIP_QUERY = """
+    SELECT e.employee_id, e.first_name || ' ' || e.last_name AS name,
+           COALESCE(po.title, '') AS position, COALESCE(d.name, '') AS department,
+           COALESCE(c.name, '') AS company, p.payable_days, {amounts},
+           p.gross, p.gross - p.net_salary AS deductions, p.net_salary
+    FROM payroll p
+    JOIN employees e ON p.employee_id = e.id
+    LEFT JOIN positions po ON e.position_id = po.id
+    LEFT JOIN departments d ON po.department_id = d.id
+    LEFT JOIN companies c ON d.company_id = c.id
+    WHERE p.year = ? AND p.month = ?
+    ORDER BY e.employee_id
+""".format(amounts=', '.join(f"p.{col}" for _, col in PAYSLIP_EARNINGS + PAYSLIP_DEDUCTIONS))
+
+# Payslip query columns repeated in index.csv, followed by the file name
+INDEX_COLUMNS = ['employee_id', 'name', 'department', 'net_salary']
+
+# A4 in points; amounts are set in Courier so padding them to a fixed width right-aligns them
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+AMOUNT_WIDTH = 14
+AMOUNT_FONT_SIZE = 10
+COURIER_ADVANCE = 0.6
+
+
+def _pdf_text(value):
+    return str(value).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _literal(text):
+    # Static text going into the str.format template
+    return _pdf_text(text).replace('{', '{{').replace('}', '}}')
+
+
+def _text(x, y, font, size, text):
+    return f"BT /{font} {size} Tf {x} {y} Td ({text}) Tj ET"
+
+
+def _amount(right, y, field, bold=False):
+    x = right - AMOUNT_WIDTH * AMOUNT_FONT_SIZE * COURIER_ADVANCE
+    return _text(x, y, 'F4' if bold else 'F3', AMOUNT_FONT_SIZE, f"{{{field}:>{AMOUNT_WIDTH},.2f}}")
+
+
+def compile_template():
+    # Built once per process: a str.format template for the page's content stream, and the
+    # fixed parts of the file around it. Only the stream, its /Length and the xref offset
+    # differ between payslips, so rendering is one format call and two byte joins.
+    ops = [
+        _text(50, 790, 'F2', 16, "{company}"),
+        _text(50, 768, 'F1', 12, "Payslip for {period}"),
+        "0.5 w 50 755 m 545 755 l S",
+    ]
+    details = [("Employee ID", "{employee_id}"), ("Name", "{name}"), ("Position", "{position}"),
+               ("Department", "{department}"), ("Payable Days", "{payable_days:g} of {days_in_month}")]
+    for i, (label, value) in enumerate(details):
+        y = 730 - i * 16
+        ops.append(_text(50, y, 'F2', 10, _literal(label)))
+        ops.append(_text(150, y, 'F1', 10, value))
+
+    top = 630
+    ops += [
+        _text(50, top, 'F2', 11, "Earnings"),
+        _text(300, top, 'F2', 11, "Deductions"),
+        f"0.5 w 50 {top - 6} m 545 {top - 6} l S",
+    ]
+    for x, right, items in [(50, 290, PAYSLIP_EARNINGS), (300, 545, PAYSLIP_DEDUCTIONS)]:
+        for i, (label, field) in enumerate(items):
+            y = top - 24 - i * 16
+            ops.append(_text(x, y, 'F1', 10, _literal(label)))
+            ops.append(_amount(right, y, field))
+    y = top - 24 - max(len(PAYSLIP_EARNINGS), len(PAYSLIP_DEDUCTIONS)) * 16 - 8
+    ops += [
+        f"0.5 w 50 {y + 12} m 545 {y + 12} l S",
+        _text(50, y, 'F2', 10, "Gross Earnings"),
+        _amount(290, y, 'gross', bold=True),
+        _text(300, y, 'F2', 10, "Total Deductions"),
+        _amount(545, y, 'deductions', bold=True),
+        _text(50, y - 36, 'F2', 12, "Net Pay"),
+        _amount(545, y - 36, 'net_salary', bold=True),
+        _text(50, 60, 'F1', 8, "This is a computer-generated payslip and needs no signature."),
+    ]
+
+    fonts = ['Helvetica', 'Helvetica-Bold', 'Courier', 'Courier-Bold']
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+        f"/Resources << /Font << {' '.join(f'/F{i} {i + 3} 0 R' for i in range(1, len(fonts) + 1))} >> >> "
+        f"/Contents {len(fonts) + 4} 0 R >>",
+    ] + [f"<< /Type /Font /Subtype /Type1 /BaseFont /{font} /Encoding /WinAnsiEncoding >>" for font in fonts]
+
+    head = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(head))
+        head += f"{number} 0 obj\n{body}\nendobj\n".encode('ascii')
+    offsets.append(len(head))  # the content stream follows the fixed objects
+    xref = f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n" + ''.join(f"{o:010d} 00000 n \n" for o in offsets)
+    trailer = f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n"
+    return {
+        'content': '\n'.join(ops),
+        'head': head + f"{len(offsets)} 0 obj\n".encode('ascii'),
+        'tail': xref.encode('ascii') + trailer.encode('ascii'),
+    }
+
+
+PAYSLIP_TEMPLATE = compile_template()
+
+
+def render_payslip(values, template=PAYSLIP_TEMPLATE):
+    stream = template['content'].format(**values).encode('cp1252', 'replace')
+    body = template['head'] + b"<< /Length %d >>\nstream\n%s\nendstream\nendobj\n" % (len(stream), stream)
+    return body + template['tail'] + b"%d\n%%%%EOF\n" % len(body)
+
+
+def render_payslips(columns, rows, month, year, folder):
+    # Runs in a worker process: writes each row's PDF into folder (creating thousands of small
+    # files is the slow part) and returns (file name, PDF bytes) for the archive
+    period = _pdf_text(f"{calendar.month_name[month]} {year}")
+    days_in_month = calendar.monthrange(year, month)[1]
+    text = {'employee_id', 'name', 'position', 'department', 'company'}
+    rendered = []
+    for row in rows:
+        values = {col: _pdf_text(value) if col in text else (value or 0) for col, value in zip(columns, row)}
+        values['period'] = period
+        values['days_in_month'] = days_in_month
+        file_name = f"{row[0]}.pdf"
+        pdf = render_payslip(values)
+        (folder / file_name).write_bytes(pdf)
+        rendered.append((file_name, pdf))
+    return rendered
+
+
+def _chunks(cursor):
+    while True:
+        rows = cursor.fetchmany(PAYSLIP_CHUNK_SIZE)
+        if not rows:
+            break
+        yield rows
+
+
+def generate_payslips(conn, month, year, output_dir, workers=1, progress=None):
+    # One PDF per payroll row of the period, written to <output_dir>/payslips-YYYY-MM/ and
+    # collected, with an index.csv, into payslips-YYYY-MM.zip beside it. Workers render and
+    # write the per-employee files; the archive has a single writer, here.
+    start = time.perf_counter()
+    name = f"payslips-{year:04d}-{month:02d}"
+    folder = Path(output_dir) / name
+    folder.mkdir(parents=True, exist_ok=True)
+    archive_path = Path(output_dir) / f"{name}.zip"
+    total = conn.execute("SELECT COUNT(*) FROM payroll WHERE year = ? AND month = ?", (year, month)).fetchone()[0]
+
+    cursor = conn.execute(PAYSLIP_QUERY, (year, month))
+    columns = [col[0] for col in cursor.description]
+    positions = [columns.index(col) for col in INDEX_COLUMNS]
+    index = io.StringIO()
+    writer = csv.writer(index)
+    writer.writerow(INDEX_COLUMNS + ['file'])
+    written = 0
+
+    def save(rows, rendered):
+        nonlocal written
+        for row, (file_name, pdf) in zip(rows, rendered):
+            archive.writestr(file_name, pdf)
+            writer.writerow([row[i] for i in positions] + [file_name])
+        written += len(rendered)
+        if progress:
+            progress(min(int(written * 100 / max(total, 1)), 99))
+
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        if workers > 1:
+            # Spawned, not forked: this may run on a GUI worker thread, and the workers only need
+            # this module
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                # Results are saved in submission order, so the archive and index stay sorted
+                pending = []
+                for rows in _chunks(cursor):
+                    pending.append((rows, pool.submit(render_payslips, columns, rows, month, year, folder)))
+                    if len(pending) > workers:
+                        rows, future = pending.pop(0)
+                        save(rows, future.result())
+                for rows, future in pending:
+                    save(rows, future.result())
+        else:
+            for rows in _chunks(cursor):
+                save(rows, render_payslips(columns, rows, month, year, folder))
+        archive.writestr("index.csv", index.getvalue())
+    (folder / "index.csv").write_text(index.getvalue(), encoding='utf-8')
+
+    if progress:
+        progress(100)
+    return {
+        'payslips': written,
+        'folder': str(folder),
+        'archive': str(archive_path),
+        'seconds': time.perf_counter() - start,
+    }
@@ -0,0 +1,27 @@
+import calendar
+
+# Dates are stored as ISO "YYYY-MM-DD" text (see migrations._canonical_dates), which sorts and
+# compares in calendar order. Period filters are therefore plain BETWEENs on the bare column,
+# which SQLite answers with an index range scan; wrapping the column in strftime() or substr()
+# would force it to read every row.
+
+
+def iso(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def month_bounds(year, month):
+    last_day = calendar.monthrange(year, month)[1]
+    return f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-{last_day:02d}"
+
+
+def date_range_filter(column, date_from, date_to):
+    return f"{column} BETWEEN ? AND ?", [iso(date_from), iso(date_to)]
+
+
+def month_filter(column, year, month):
+    return f"{column} BETWEEN ? AND ?", list(month_bounds(year, month))
+
+
+def month_to_date_filter(column, today):
+    return date_range_filter(column, today.replace(day=1), today)
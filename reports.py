@@ -0,0 +1,141 @@
+import csv
+import os
+
+from periods import date_range_filter
+
+# Rows pulled from the cursor per fetchmany; memory use is bounded by this, not the report size
+EXPORT_CHUNK_SIZE = 10_000
+
+# Excel's hard limit per sheet, header row included
+XLSX_MAX_ROWS = 1_048_576
+
+ORG_JOINS = """
+    LEFT JOIN positions po ON e.position_id = po.id
+    LEFT JOIN departments d ON po.department_id = d.id
+"""
+
+ATTENDANCE_REPORT = {
+    'title': "Attendance",
+    'headers': ["employee_id", "first_name", "last_name", "date", "check_in", "check_out",
+                "hours_worked", "status"],
+    'select': """
+        SELECT e.employee_id, e.first_name, e.last_name, a.date, a.check_in, a.check_out, a.hours_worked, a.status
+        FROM attendance a
+        LEFT JOIN employees e ON a.employee_id = e.id
+    """ + ORG_JOINS,
+    'order_by': "a.date, a.employee_id",
+}
+
+PAYROLL_REPORT = {
+    'title': "Payroll",
+    'headers': ["employee_id", "first_name", "last_name", "month", "year", "payable_days",
+                "basic", "hra", "conveyance", "gross", "pf", "esic", "professional_tax", "tds", "net_salary"],
+    'select': """
+        SELECT e.employee_id, e.first_name, e.last_name, p.month, p.year, p.payable_days,
+               p.basic, p.hra, p.conveyance, p.gross, p.pf, p.esic, p.professional_tax, p.tds, p.net_salary
+        FROM payroll p
+        LEFT JOIN employees e ON p.employee_id = e.id
+    """ + ORG_JOINS,
+    'order_by': "p.year, p.month, p.id",
+}
+
+
+def _attendance_date_filter(date_from, date_to):
+    return date_range_filter("a.date", date_from, date_to)
+
+
+def _payroll_date_filter(date_from, date_to):
+    # Payroll rows are per period, so the range is widened to whole months
+    return "(p.year, p.month) BETWEEN (?, ?) AND (?, ?)", [date_from.year, date_from.month,
+                                                           date_to.year, date_to.month]
+
+
+def build_filters(date_filter, date_from=None, date_to=None, company_id=None, department_id=None):
+    conditions = []
+    params = []
+    if date_from and date_to:
+        condition, values = date_filter(date_from, date_to)
+        conditions.append(condition)
+        params.extend(values)
+    if company_id:
+        conditions.append("d.company_id = ?")
+        params.append(company_id)
+    if department_id:
+        conditions.append("po.department_id = ?")
+        params.append(department_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    return where, params
+
+
+def _write_csv(file_path, headers, chunks):
+    with open(file_path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(headers)
+        for rows in chunks:
+            writer.writerows(rows)
+
+
+def _write_xlsx(file_path, title, headers, chunks):
+    from openpyxl import Workbook
+
+    # Write-only workbooks stream rows to disk instead of keeping every cell object in memory
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheets = 0
+    sheet_rows = XLSX_MAX_ROWS
+    for rows in chunks:
+        for row in rows:
+            if sheet_rows == XLSX_MAX_ROWS:
+                sheets += 1
+                sheet = workbook.create_sheet(title if sheets == 1 else f"{title} ({sheets})")
+                sheet.append(headers)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet(title).append(headers)
+    workbook.save(file_path)
+
+
+def export_report(conn, report, date_filter, file_path, progress=None, **filters):
+    where, params = build_filters(date_filter, **filters)
+    total = None
+    if progress:
+        total = conn.execute(f"SELECT COUNT(*) FROM ({report['select']} {where})", params).fetchone()[0]
+
+    cursor = conn.execute(f"{report['select']} {where} ORDER BY {report['order_by']}", params)
+    exported = 0
+
+    def chunks():
+        nonlocal exported
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            yield rows
+            exported += len(rows)
+            if progress:
+                progress(min(int(exported * 100 / max(total, 1)), 100))
+
+    try:
+        if file_path.endswith('.xlsx'):
+            _write_xlsx(file_path, report['title'], report['headers'], chunks())
+        else:
+            _write_csv(file_path, report['headers'], chunks())
+    except BaseException:
+        # Don't leave a truncated report behind on failure or cancellation
+        cursor.close()
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    if progress:
+        progress(100)
+    return exported
+
+
+def export_attendance_report(conn, file_path, progress=None, **filters):
+    return export_report(conn, ATTENDANCE_REPORT, _attendance_date_filter, file_path, progress, **filters)
+
+
+def export_payroll_report(conn, file_path, progress=None, **filters):
+    return export_report(conn, PAYROLL_REPORT, _payroll_date_filter, file_path, progress, **filters)
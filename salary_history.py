@@ -0,0 +1,73 @@
+from datetime import date
+
+import pandas as pd
+
+from periods import iso
+
+# Joins the revision in force on a given day (the first ? parameter) for each employee e.
+# The subquery is one descending probe of idx_salary_revisions_employee_date per employee, so
+# resolving a month for the whole workforce stays a single query.
+SALARY_AS_OF_JOIN = """
+    LEFT JOIN salary_revisions s ON s.id = (
+        SELECT r.id FROM salary_revisions r
+        WHERE r.employee_id = e.id AND r.effective_from <= ?
+        ORDER BY r.effective_from DESC LIMIT 1
+    )
+"""
+
+
+def split_salaries(conn, first_day, last_day):
+    # For employees with a revision taking effect after first_day and on or before last_day:
+    # one row per salary in force during the period, with the paid attendance (the sum of
+    # paid_fraction) of the days it covered. Revisions are few, so this stays a small read
+    # through idx_salary_revisions_effective however large the workforce is.
+    return pd.read_sql_query("""
+        SELECT s.employee_id, s.basic_salary, s.hra, s.conveyance,
+               COALESCE(SUM(a.paid_fraction), 0) AS payable_days
+        FROM (
+            SELECT r.employee_id, r.basic_salary, r.hra, r.conveyance,
+                   MAX(r.effective_from, ?) AS segment_start,
+                   COALESCE(date(LEAD(r.effective_from) OVER (
+                       PARTITION BY r.employee_id ORDER BY r.effective_from), '-1 day'), ?) AS segment_end
+            FROM salary_revisions r
+            WHERE r.employee_id IN (
+                SELECT employee_id FROM salary_revisions WHERE effective_from > ? AND effective_from <= ?
+            ) AND r.effective_from <= ?
+        ) s
+        LEFT JOIN attendance a ON a.employee_id = s.employee_id AND a.date BETWEEN s.segment_start AND s.segment_end
+        WHERE s.segment_end >= ?
+        GROUP BY s.employee_id, s.segment_start
+    """, conn, params=[first_day, last_day, first_day, last_day, last_day, first_day])
+
+
+def salary_as_of(conn, employee_id, day):
+    # (basic_salary, hra, conveyance) in force on day, or None before the first revision
+    return conn.execute("""
+        SELECT basic_salary, hra, conveyance FROM salary_revisions
+        WHERE employee_id = ? AND effective_from <= ?
+        ORDER BY effective_from DESC LIMIT 1
+    """, (employee_id, iso(day))).fetchone()
+
+
+def salary_history(conn, employee_id):
+    return conn.execute("""
+        SELECT effective_from, basic_salary, hra, conveyance, created_at
+        FROM salary_revisions WHERE employee_id = ? ORDER BY effective_from
+    """, (employee_id,)).fetchall()
+
+
+def add_salary_revision(conn, employee_id, effective_from, basic_salary, hra, conveyance):
+    # Records a revision taking effect on effective_from, which may be in the past (a backdated
+    # raise) or the future. The employee row keeps showing the salary in force today.
+    with conn:
+        conn.execute("""
+            INSERT INTO salary_revisions (employee_id, effective_from, basic_salary, hra, conveyance)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (employee_id, effective_from) DO UPDATE SET
+                basic_salary = excluded.basic_salary,
+                hra = excluded.hra,
+                conveyance = excluded.conveyance,
+                created_at = CURRENT_TIMESTAMP
+        """, (employee_id, iso(effective_from), basic_salary, hra, conveyance))
+        conn.execute("UPDATE employees SET (basic_salary, hra, conveyance) = (?, ?, ?) WHERE id = ?",
+                     (*salary_as_of(conn, employee_id, date.today()), employee_id))
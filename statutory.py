@@ -0,0 +1,125 @@
+import zlib
+import numpy as np
+
+# Statutory deductions from the effective-dated statutory_rates and statutory_slabs tables
+# (seeded by migrations._statutory_rules). A rule changes by adding a row with a new
+# effective_from, so rerunning an old month still applies the rates of that month.
+#
+# load_statutory_rules reads both tables once and compiles them into sorted arrays; picking
+# the version in force for a period is a searchsorted, and a slab lookup for the whole
+# employee set is one more.
+
+# Version of the formulas in statutory_deductions, folded into the rules fingerprint. Bump it
+# with any change to how deductions are computed, so that payroll rows computed the old way no
+# longer match their input hash and the next run recomputes them.
+CALCULATION_VERSION = 2
+
+
+def _versions(rows):
+    # rows ordered by (code, effective_from): {code: (effective dates, [payload per version])}
+    compiled = {}
+    for code, effective_from, payload in rows:
+        dates, payloads = compiled.setdefault(code, ([], []))
+        dates.append(effective_from)
+        payloads.append(payload)
+    return {code: (np.array(dates), payloads) for code, (dates, payloads) in compiled.items()}
+
+
+def _compile_slabs(slabs):
+    # [(lower_bound, amount, rate)] -> arrays, plus the tax accumulated below each lower bound
+    lower, amount, rate = (np.array(col, dtype=float) for col in zip(*slabs))
+    base = np.concatenate([[0.0], np.cumsum(rate[:-1] * np.diff(lower))])
+    return {'lower': lower, 'amount': amount, 'rate': rate, 'base': base}
+
+
+def load_statutory_rules(conn):
+    rates = conn.execute("""
+        SELECT code, effective_from, value FROM statutory_rates ORDER BY code, effective_from
+    """).fetchall()
+    slab_rows = conn.execute("""
+        SELECT code, effective_from, lower_bound, amount, rate
+        FROM statutory_slabs ORDER BY code, effective_from, lower_bound
+    """).fetchall()
+    tables = {}
+    for code, effective_from, lower, amount, rate in slab_rows:
+        tables.setdefault((code, effective_from), []).append((lower, amount, rate))
+    return {
+        'rates': _versions(rates),
+        'slabs': _versions((code, effective_from, _compile_slabs(slabs))
+                           for (code, effective_from), slabs in tables.items()),
+    }
+
+
+def _in_force(versions, code, period_start):
+    if code not in versions:
+        return None
+    dates, payloads = versions[code]
+    index = np.searchsorted(dates, period_start, side='right') - 1
+    return payloads[index] if index >= 0 else None
+
+
+def rules_for_period(rules, period_start):
+    # The rate values and slab tables in force on period_start (None where a rule hasn't started)
+    return {
+        'rates': {code: _in_force(rules['rates'], code, period_start) for code in rules['rates']},
+        'slabs': {code: _in_force(rules['slabs'], code, period_start) for code in rules['slabs']},
+    }
+
+
+def rules_fingerprint(period_rules):
+    # Folded into payroll input hashes, so editing a rule (or the formulas applying it)
+    # recomputes the months it applies to
+    slabs = {code: None if table is None else [table[key].tolist() for key in sorted(table)]
+             for code, table in period_rules['slabs'].items()}
+    return zlib.crc32(repr((CALCULATION_VERSION, sorted(period_rules['rates'].items()),
+                            sorted(slabs.items()))).encode())
+
+
+def slab_amounts(table, values):
+    # Fixed amount of the slab each value falls in plus its marginal rate on the part above the
+    # slab's lower bound, on top of the tax accumulated by the slabs below
+    if table is None:
+        return np.zeros(len(values))
+    index = np.clip(np.searchsorted(table['lower'], values, side='right') - 1, 0, None)
+    above = np.maximum(values - table['lower'][index], 0.0)
+    return table['amount'][index] + table['base'][index] + table['rate'][index] * above
+
+
+def statutory_deductions(period_rules, basic, gross, monthly_gross):
+    # basic and gross are this month's earned amounts, monthly_gross the full contracted one
+    # (which decides ESIC coverage)
+    rate = period_rules['rates']
+    slabs = period_rules['slabs']
+
+    pf_wages = np.minimum(basic, rate['pf_wage_ceiling']) if rate.get('pf_wage_ceiling') else basic
+    pf = pf_wages * (rate.get('pf_rate') or 0.0)
+
+    esic_limit = rate.get('esic_wage_limit')
+    esic_covered = monthly_gross <= esic_limit if esic_limit else np.ones(len(gross), dtype=bool)
+    esic = np.where(esic_covered, gross * (rate.get('esic_rate') or 0.0), 0.0)
+
+    professional_tax = np.where(gross > 0, slab_amounts(slabs.get('professional_tax'), gross), 0.0)
+
+    # TDS projects this month's earned pay over the year and deducts a twelfth of the tax on
+    # it, so a month with few paid days withholds less. Below the rebate limit there is no tax;
+    # just above it, marginal relief keeps the tax from exceeding the income over the limit.
+    taxable = np.maximum(gross * 12 - (rate.get('tds_standard_deduction') or 0.0), 0.0)
+    annual_tax = slab_amounts(slabs.get('income_tax'), taxable)
+    rebate_limit = rate.get('tds_rebate_limit')
+    if rebate_limit:
+        annual_tax = np.where(taxable <= rebate_limit, 0.0, np.minimum(annual_tax, taxable - rebate_limit))
+    tds = annual_tax * (1 + (rate.get('tds_cess_rate') or 0.0)) / 12
+
+    deductions = {
+        'pf': np.round(pf),
+        'esic': np.ceil(np.round(esic, 2)),
+        'professional_tax': np.round(professional_tax),
+        'tds': np.round(tds),
+    }
+    # Deductions never take net pay below zero; what doesn't fit is dropped from the last ones
+    # (TDS first), since PF and ESIC are owed on the wages actually paid
+    remaining = np.asarray(gross, dtype=float).copy()
+    for code, amounts in deductions.items():
+        deductions[code] = np.minimum(amounts, np.maximum(remaining, 0.0))
+        remaining -= deductions[code]
+    return deductions
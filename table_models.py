@@ -0,0 +1,113 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+import db
+
+# (columns, from clause, sort keys) of the paged tables on the Employees, Attendance and Payroll
+# tabs; benchmarks/bench_suite.py times the same specs
+EMPLOYEES_TABLE = (
+    [("ID", "e.id"), ("Emp ID", "e.employee_id"), ("Name", "e.first_name || ' ' || e.last_name"),
+     ("Email", "e.email"), ("Position", "p.title"), ("Status", "e.status")],
+    "employees e LEFT JOIN positions p ON e.position_id = p.id",
+    ["e.id"],
+)
+ATTENDANCE_TABLE = (
+    [("ID", "a.id"), ("Employee", "e.employee_id"), ("Date", "a.date"),
+     ("Check In", "a.check_in"), ("Check Out", "a.check_out"), ("Hours", "a.hours_worked"),
+     ("Status", "a.status")],
+    "attendance a LEFT JOIN employees e ON a.employee_id = e.id",
+    ["a.date", "a.employee_id"],
+)
+PAYROLL_TABLE = (
+    [("ID", "p.id"), ("Employee", "e.employee_id"), ("Month", "p.month"), ("Year", "p.year"),
+     ("Payable Days", "p.payable_days"), ("Gross", "p.gross"), ("Deductions", "p.gross - p.net_salary"),
+     ("Net", "p.net_salary")],
+    "payroll p LEFT JOIN employees e ON p.employee_id = e.id",
+    ["p.year", "p.month", "p.id"],
+)
+
+
+class KeysetTableModel(QAbstractTableModel):
+    # Read-only table over a SQL query that fetches rows page by page as the view scrolls.
+    # Pages continue from the last row's sort key (keyset pagination) rather than OFFSET,
+    # so page N costs the same as page 1 and first paint only reads one page.
+
+    def __init__(self, columns, from_clause, order_keys, page_size=500, parent=None):
+        super().__init__(parent)
+        # columns: [(header, sql expression)], order_keys: sql expressions, newest first.
+        # order_keys must identify a row uniquely and should match an index.
+        self.headers = [header for header, _ in columns]
+        self.expressions = [expr for _, expr in columns]
+        self.from_clause = from_clause
+        self.order_keys = order_keys
+        self.page_size = page_size
+        self.where = ''
+        self.params = ()
+        self.rows = []
+        self.last_key = None
+        self.exhausted = False
+
+    def set_filter(self, where='', params=()):
+        self.where = where
+        self.params = tuple(params)
+        self.refresh()
+
+    def refresh(self):
+        self.beginResetModel()
+        self.rows = []
+        self.last_key = None
+        self.exhausted = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def _page(self):
+        conditions = [f"({self.where})"] if self.where else []
+        params = list(self.params)
+        if self.last_key is not None:
+            placeholders = ', '.join('?' * len(self.order_keys))
+            conditions.append(f"({', '.join(self.order_keys)}) < ({placeholders})")
+            params.extend(self.last_key)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        order = ', '.join(f"{key} DESC" for key in self.order_keys)
+        sql = f"""
+            SELECT {', '.join(self.expressions + self.order_keys)}
+            FROM {self.from_clause}
+            {where}
+            ORDER BY {order}
+            LIMIT ?
+        """
+        params.append(self.page_size)
+        return db.get_connection().execute(sql, params).fetchall()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        return '' if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        page = self._page()
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if not page:
+            return
+        width = len(self.headers)
+        self.last_key = page[-1][width:]
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(row[:width] for row in page)
+        self.endInsertRows()
@@ -0,0 +1,97 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import db
+import payroll_engine
+from arrears import compute_arrears
+from attendance_import import import_attendance
+from database_setup import create_database
+from salary_history import add_salary_revision
+
+
+@pytest.fixture
+def conn(tmp_path):
+    # Three employees paid for January; setup rows are backdated so that only what a test
+    # changes afterwards counts as a change since payroll
+    create_database(tmp_path / "hrms.db")
+    conn = db.connect(tmp_path / "hrms.db")
+    conn.executemany("""
+        INSERT INTO employees (employee_id, first_name, last_name, email, basic_salary, hra, conveyance, status)
+        VALUES (?, 'A', 'B', ?, 31000, 0, 0, 'active')
+    """, [(f"EMP{i:04d}", f"emp{i}@example.com") for i in (1, 2, 3)])
+    conn.commit()
+    import_attendance(conn, pd.DataFrame({
+        'employee_id': [f"EMP{i:04d}" for i in (1, 2, 3) for _ in range(31)],
+        'date': [f"2026-01-{day:02d}" for _ in (1, 2, 3) for day in range(1, 32)],
+        'check_in': '09:00', 'check_out': '18:00',
+    }), uploaded_by=1)
+    with conn:
+        conn.execute("UPDATE salary_revisions SET created_at = '2000-01-01 00:00:00'")
+        conn.execute("UPDATE attendance SET uploaded_at = '2000-01-01 00:00:00'")
+    payroll_engine.generate_payroll(conn, 1, 2026, 1)
+    with conn:
+        conn.execute("UPDATE payroll SET generated_at = '2000-01-02 00:00:00'")
+    yield conn
+    conn.close()
+
+
+def arrears_rows(conn):
+    return conn.execute("""
+        SELECT employee_id, year, month, cycle_year, cycle_month, basic, net_salary FROM payroll_arrears
+        ORDER BY employee_id, year, month, cycle_year, cycle_month
+    """).fetchall()
+
+
+def test_backdated_revision_only_touches_the_revised_employee(conn):
+    add_salary_revision(conn, 2, date(2026, 1, 1), 62000, 0, 0)
+    result = compute_arrears(conn, 2, 2026, 1)
+    assert result['candidates'] == 1
+    assert arrears_rows(conn) == [(2, 2026, 1, 2026, 2, 31000.0, 31000.0)]
+
+    # Nothing new since: the rerun leaves the cycle's rows as they are
+    assert compute_arrears(conn, 2, 2026, 1)['recomputed'] == 0
+    assert arrears_rows(conn) == [(2, 2026, 1, 2026, 2, 31000.0, 31000.0)]
+
+
+def test_late_attendance_is_a_candidate(conn):
+    import_attendance(conn, pd.DataFrame({'employee_id': ['EMP0003'], 'date': ['2026-01-05'], 'status': ['absent']}),
+                      uploaded_by=1)
+    result = compute_arrears(conn, 2, 2026, 1)
+    assert result['candidates'] == 1
+    assert arrears_rows(conn) == [(3, 2026, 1, 2026, 2, -1000.0, -1000.0)]
+
+
+def test_month_with_arrears_is_not_regenerated(conn):
+    add_salary_revision(conn, 2, date(2026, 1, 1), 50000, 0, 0)
+    compute_arrears(conn, 2, 2026, 1)
+    before = conn.execute("SELECT basic FROM payroll WHERE employee_id = 2").fetchone()
+
+    with pytest.raises(ValueError):
+        payroll_engine.generate_payroll(conn, 1, 2026, 1)
+    assert conn.execute("SELECT basic FROM payroll WHERE employee_id = 2").fetchone() == before
+    assert compute_arrears(conn, 2, 2026, 1)['recomputed'] == 0
+    assert len(arrears_rows(conn)) == 1
+
+
+def test_paid_month_is_closed_once_the_next_payroll_runs(conn):
+    # February's run closes January: a backdated raise can't be folded into January's rows
+    # by regenerating it, and is paid as arrears instead
+    payroll_engine.generate_payroll(conn, 2, 2026, 1)
+    add_salary_revision(conn, 2, date(2026, 1, 1), 62000, 0, 0)
+    with pytest.raises(ValueError):
+        payroll_engine.generate_payroll(conn, 1, 2026, 1)
+    assert conn.execute("SELECT basic FROM payroll WHERE employee_id = 2 AND month = 1").fetchone() == (31000.0,)
+
+    # The open month still picks the raise up in place
+    assert payroll_engine.generate_payroll(conn, 2, 2026, 1)['recomputed'] == 1
+    compute_arrears(conn, 2, 2026, 1)
+    assert arrears_rows(conn) == [(2, 2026, 1, 2026, 2, 31000.0, 31000.0)]
+
+
+def test_forced_run_regenerates_a_closed_month(conn):
+    payroll_engine.generate_payroll(conn, 2, 2026, 1)
+    add_salary_revision(conn, 2, date(2026, 1, 1), 62000, 0, 0)
+    payroll_engine.generate_payroll(conn, 1, 2026, 1, force=True)
+    assert conn.execute("SELECT basic FROM payroll WHERE employee_id = 2 AND month = 1").fetchone() == (62000.0,)
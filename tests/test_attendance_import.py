@@ -0,0 +1,171 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import db
+from attendance_import import import_attendance, import_attendance_file, merge_stored_punches
+from database_setup import create_database
+
+
+@pytest.fixture
+def conn(tmp_path):
+    create_database(tmp_path / "hrms.db")
+    conn = db.connect(tmp_path / "hrms.db")
+    conn.executemany("""
+        INSERT INTO employees (employee_id, first_name, last_name, email, basic_salary, hra, conveyance, status)
+        VALUES (?, 'A', 'B', ?, 31000, 0, 0, 'active')
+    """, [(code, f"{code}@example.com") for code in ('EMP0001', 'EMP0002')])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def stored(conn):
+    return conn.execute("""
+        SELECT e.employee_id, a.date, a.check_in, a.check_out, a.hours_worked, a.status, a.paid_fraction
+        FROM attendance a JOIN employees e ON e.id = a.employee_id
+        ORDER BY e.employee_id, a.date
+    """).fetchall()
+
+
+def test_date_and_time_formats_are_normalised(conn):
+    result = import_attendance(conn, pd.DataFrame({
+        'employee_id': ['EMP0001', ' EMP0001 ', 'EMP0001', 'EMP0001'],
+        'date': ['1/5/2026', '2026-01-06', '07-01-2026', '2026-01-08 00:00:00'],
+        'check_in': ['9:00', '09:00:00', '9:00 AM', '10:00'],
+        'check_out': ['18:00', '13:30:00', '11:00 AM', '9:00'],
+    }), uploaded_by=1)
+    assert result['rows_imported'] == 4
+    assert stored(conn) == [
+        ('EMP0001', '2026-01-05', '09:00', '18:00', 9.0, 'present', 1.0),
+        ('EMP0001', '2026-01-06', '09:00', '13:30', 4.5, 'half_day', 0.5),
+        ('EMP0001', '2026-01-07', '09:00', '11:00', 2.0, 'absent', 0.0),
+        # A check-out before the check-in is an overnight shift
+        ('EMP0001', '2026-01-08', '10:00', '09:00', 23.0, 'present', 1.0),
+    ]
+
+
+def test_absence_marker_and_missing_punch(conn):
+    import_attendance(conn, pd.DataFrame({
+        'employee_id': ['EMP0001', 'EMP0002'],
+        'date': ['2026-01-05', '2026-01-05'],
+        'check_in': ['0:00', '9:00'],
+        'check_out': ['0:00', None],
+    }), uploaded_by=1)
+    assert stored(conn) == [
+        ('EMP0001', '2026-01-05', '00:00', '00:00', 0.0, 'absent', 0.0),
+        ('EMP0002', '2026-01-05', '09:00', None, None, 'present', 1.0),
+    ]
+
+
+def test_unknown_codes_and_invalid_dates_are_counted_not_written(conn):
+    result = import_attendance(conn, pd.DataFrame({
+        'employee_id': ['EMP0001', 'EMP9999', 'EMP9999', 'EMP0002'],
+        'date': ['2026-01-05', '2026-01-05', '2026-01-06', 'not a date'],
+        'check_in': '9:00', 'check_out': '18:00',
+    }), uploaded_by=1)
+    assert result['rows_read'] == 4
+    assert result['rows_invalid'] == 1
+    assert result['rows_skipped'] == 2
+    assert result['rows_imported'] == 1
+    assert result['unknown_employees'] == ['EMP9999']
+    assert [row[:2] for row in stored(conn)] == [('EMP0001', '2026-01-05')]
+
+
+def test_punches_for_one_day_are_merged(conn):
+    result = import_attendance(conn, pd.DataFrame({
+        'employee_id': ['EMP0001', 'EMP0001', 'EMP0001', 'EMP0002', 'EMP0002'],
+        'date': ['2026-01-05'] * 3 + ['2026-01-05', '1/5/2026'],
+        'check_in': ['9:00', '13:00', None, '9:00', '9:00'],
+        'check_out': ['12:00', None, '18:30', '18:00', '18:00'],
+    }), uploaded_by=1)
+    assert result['rows_merged'] == 3
+    assert result['rows_imported'] == 2
+    assert stored(conn) == [
+        ('EMP0001', '2026-01-05', '09:00', '18:30', 9.5, 'present', 1.0),
+        ('EMP0002', '2026-01-05', '09:00', '18:00', 9.0, 'present', 1.0),
+    ]
+
+
+def test_missing_required_column_is_rejected(conn):
+    with pytest.raises(ValueError):
+        import_attendance(conn, pd.DataFrame({'employee_id': ['EMP0001']}), uploaded_by=1)
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.xlsx'])
+def test_numeric_codes_keep_leading_zeros_in_every_chunk(conn, tmp_path, suffix):
+    conn.executemany("""
+        INSERT INTO employees (employee_id, first_name, last_name, email, status) VALUES (?, 'A', 'B', ?, 'active')
+    """, [('00123', 'z@example.com'), ('124', 'n@example.com')])
+    conn.commit()
+    rows = [('00123', '2026-01-05'), ('124', '2026-01-05'), ('124', '2026-01-06'), (None, '2026-01-06'),
+            ('EMP0001', '2026-01-05')]
+    path = tmp_path / f"attendance{suffix}"
+    if suffix == '.csv':
+        pd.DataFrame(rows, columns=['employee_id', 'date']).to_csv(path, index=False)
+    else:
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['employee_id', 'date'])
+        # As typed into a sheet: the zero-padded code as text, the other as a number
+        for code, day in rows:
+            sheet.append([int(code) if code == '124' else code, datetime.strptime(day, '%Y-%m-%d')])
+        workbook.save(path)
+
+    # Two rows per chunk: the first holds only numeric codes, the second a number and a blank
+    import_attendance_file(conn, path, uploaded_by=1, chunk_size=2)
+    assert [row[:2] for row in stored(conn)] == [
+        ('00123', '2026-01-05'), ('124', '2026-01-05'), ('124', '2026-01-06'), ('EMP0001', '2026-01-05')]
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows, columns=['employee_id', 'date', 'check_in', 'check_out']).to_csv(path, index=False)
+    return path
+
+
+def test_day_split_across_chunks_is_merged(conn, tmp_path):
+    path = write_csv(tmp_path / "punches.csv", [
+        ('EMP0001', '2026-01-05', '9:00', '12:00'),
+        ('EMP0002', '2026-01-05', '9:00', '18:00'),
+        ('EMP0001', '2026-01-05', '13:00', '18:00'),
+    ])
+    import_attendance_file(conn, path, uploaded_by=1, chunk_size=2)
+    assert stored(conn) == [
+        ('EMP0001', '2026-01-05', '09:00', '18:00', 9.0, 'present', 1.0),
+        ('EMP0002', '2026-01-05', '09:00', '18:00', 9.0, 'present', 1.0),
+    ]
+    # Uploading the same file again gives the same rows
+    import_attendance_file(conn, path, uploaded_by=1, chunk_size=2)
+    assert stored(conn)[0] == ('EMP0001', '2026-01-05', '09:00', '18:00', 9.0, 'present', 1.0)
+
+
+def test_new_upload_corrects_the_stored_day(conn, tmp_path):
+    import_attendance_file(conn, write_csv(tmp_path / "first.csv", [
+        ('EMP0001', '2026-01-05', '9:00', '18:00'),
+        ('EMP0002', '2026-01-05', '9:00', '18:00'),
+    ]), uploaded_by=1)
+    # A shorter day, and the sheets' 0:00/0:00 absence marker
+    import_attendance_file(conn, write_csv(tmp_path / "correction.csv", [
+        ('EMP0001', '2026-01-05', '9:00', '11:00'),
+        ('EMP0002', '2026-01-05', '0:00', '0:00'),
+    ]), uploaded_by=1)
+    assert stored(conn) == [
+        ('EMP0001', '2026-01-05', '09:00', '11:00', 2.0, 'absent', 0.0),
+        ('EMP0002', '2026-01-05', '00:00', '00:00', 0.0, 'absent', 0.0),
+    ]
+    import_attendance(conn, pd.DataFrame({'employee_id': ['EMP0001'], 'date': ['2026-01-05'],
+                                          'check_in': ['10:00'], 'check_out': ['17:00']}), uploaded_by=1)
+    assert stored(conn)[0] == ('EMP0001', '2026-01-05', '10:00', '17:00', 7.0, 'present', 1.0)
+
+
+def test_stored_times_are_parsed_in_any_import_format():
+    # Rows migrated from old uploads may keep times as typed
+    data = pd.DataFrame({'employee_id': [1], 'date': ['2026-01-05'], 'check_in': [780.0], 'check_out': [1200.0],
+                         'status': [None]})
+    stored_rows = pd.DataFrame({'employee_id': [1], 'date': ['2026-01-05'], 'check_in': ['9:00'],
+                                'check_out': ['12:00 PM'], 'status': ['present'], 'upload_id': [7]})
+    merged = merge_stored_punches(data, stored_rows, upload=7)
+    assert merged[['check_in', 'check_out']].values.tolist() == [[540.0, 1200.0]]
+    assert merge_stored_punches(data, stored_rows, upload=8) is data
@@ -0,0 +1,79 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import db
+from attendance_import import import_attendance
+from dashboard_stats import dashboard_stats
+from database_setup import create_database
+
+DIRECT_COUNTS = """
+    SELECT date, SUM(COALESCE(status, 'present') NOT IN ('off', 'holiday')),
+           SUM(COALESCE(status, 'present') IN ('present', 'half_day'))
+    FROM attendance GROUP BY date ORDER BY date
+"""
+
+
+@pytest.fixture
+def conn(tmp_path):
+    create_database(tmp_path / "hrms.db")
+    conn = db.connect(tmp_path / "hrms.db")
+    conn.executemany("INSERT INTO employees (employee_id, first_name, last_name, email) VALUES (?, 'A', 'B', ?)",
+                     [(f"EMP{i:04d}", f"emp{i}@example.com") for i in range(1, 6)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def stats_counts(conn):
+    return conn.execute("SELECT date, recorded, attended FROM stats_attendance_daily WHERE recorded OR attended "
+                        "ORDER BY date").fetchall()
+
+
+def test_imports_keep_the_daily_counts_without_row_triggers(conn):
+    import_attendance(conn, pd.DataFrame({
+        'employee_id': ['EMP0001', 'EMP0002', 'EMP0003', 'EMP0004'],
+        'date': ['2026-01-05'] * 3 + ['2026-01-06'],
+        'check_in': '9:00', 'check_out': ['18:00', '10:00', '13:00', '18:00'],
+    }), uploaded_by=1)
+    # Statuses changed by a later upload move the counts of the days they replace
+    import_attendance(conn, pd.DataFrame({
+        'employee_id': ['EMP0001', 'EMP0004', 'EMP0005'],
+        'date': ['2026-01-05', '2026-01-06', '2026-01-06'],
+        'status': ['off', 'holiday', 'leave'],
+    }), uploaded_by=1)
+    assert stats_counts(conn) == conn.execute(DIRECT_COUNTS).fetchall() == [
+        ('2026-01-05', 2, 1), ('2026-01-06', 1, 0)]
+
+    # The triggers are back for every other writer
+    with conn:
+        conn.execute("UPDATE attendance SET status = 'present' WHERE employee_id = 5")
+        conn.execute("DELETE FROM attendance WHERE employee_id = 2")
+    assert stats_counts(conn) == conn.execute(DIRECT_COUNTS).fetchall() == [
+        ('2026-01-05', 1, 1), ('2026-01-06', 1, 1)]
+
+
+def test_failed_import_leaves_counts_and_triggers_alone(conn):
+    import_attendance(conn, pd.DataFrame({'employee_id': ['EMP0001'], 'date': ['2026-01-05']}), uploaded_by=1)
+    with pytest.raises(Exception):
+        import_attendance(conn, pd.DataFrame({'employee_id': ['EMP0002'], 'date': ['2026-01-05']}),
+                          uploaded_by=object())
+    assert stats_counts(conn) == [('2026-01-05', 1, 1)]
+    with conn:
+        conn.execute("INSERT INTO attendance (employee_id, date, status) VALUES (3, '2026-01-05', 'present')")
+    assert stats_counts(conn) == [('2026-01-05', 2, 2)]
+
+
+def test_department_count_follows_inserts_moves_and_deletes(conn):
+    with conn:
+        conn.execute("INSERT INTO companies (company_id, name) VALUES ('CMP001', 'Co')")
+        conn.executemany("INSERT INTO departments (department_id, name, company_id) VALUES (?, ?, ?)",
+                         [('DEP001', 'Ops', 1), ('DEP002', 'Sales', 1), ('DEP003', 'Unassigned', None)])
+    assert dashboard_stats(conn, date(2026, 1, 31))['departments'] == 3
+    with conn:
+        conn.execute("UPDATE departments SET company_id = NULL WHERE id = 2")
+        conn.execute("DELETE FROM departments WHERE id = 1")
+    assert dashboard_stats(conn, date(2026, 1, 31))['departments'] == 2
+    assert conn.execute("SELECT company_id, departments FROM stats_departments ORDER BY company_id").fetchall() == [
+        (0, 2), (1, 0)]
@@ -0,0 +1,87 @@
+import threading
+
+import pandas as pd
+import pytest
+
+import db
+from database_setup import create_database
+from employee_ids import format_employee_id, next_employee_id, reserve_employee_ids
+from employee_import import import_employees
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "hrms.db"
+    create_database(path)
+    conn = db.connect(path)
+    with conn:
+        conn.execute("INSERT INTO companies (company_id, name) VALUES ('CMP001', 'Co')")
+        conn.execute("INSERT INTO departments (department_id, name, company_id) VALUES ('DEP001', 'Ops', 1)")
+        conn.execute("INSERT INTO positions (position_id, title, department_id) VALUES ('POS001', 'Lead', 1)")
+    conn.close()
+    return path
+
+
+def test_concurrent_reservations_never_overlap(db_path):
+    # Each thread reserves and commits on its own connection, as the GUI and an import job would
+    codes = []
+    lock = threading.Lock()
+
+    def allocate(size):
+        conn = db.connect(db_path)
+        try:
+            for _ in range(20):
+                with conn:
+                    reserved = reserve_employee_ids(conn, size)
+                with lock:
+                    codes.extend(reserved)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=allocate, args=(size,)) for size in (1, 2, 5, 10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = 20 * (1 + 2 + 5 + 10)
+    assert sorted(codes) == [format_employee_id(number) for number in range(1, total + 1)]
+
+
+def test_rolled_back_reservation_is_handed_out_again(db_path):
+    conn = db.connect(db_path)
+    with conn:
+        assert next_employee_id(conn) == 'EMP0001'
+    reserve_employee_ids(conn, 3)
+    conn.rollback()
+    with conn:
+        assert reserve_employee_ids(conn, 2) == ['EMP0002', 'EMP0003']
+    conn.close()
+
+
+def test_bulk_onboarding_allocates_one_contiguous_block(db_path):
+    conn = db.connect(db_path)
+    with conn:
+        conn.execute("""
+            INSERT INTO employees (employee_id, first_name, last_name, email) VALUES (?, 'A', 'B', 'taken@example.com')
+        """, (next_employee_id(conn),))
+    rows = pd.DataFrame({
+        'first_name': ['Asha', 'Ravi', 'Meera', 'Dev'],
+        'last_name': ['K', 'S', 'P', 'R'],
+        'email': ['asha@example.com', 'TAKEN@example.com', 'meera@example.com', 'dev@example.com'],
+        'position_id': ['POS001', 'POS001', 'POS999', 'POS001'],
+        'basic_salary': ['30000', '30000', '30000', 'lots'],
+    }, dtype=str)
+    result = import_employees(conn, rows, created_by=1)
+    assert result['rows_imported'] == 1
+    assert (result['first_employee_id'], result['last_employee_id']) == ('EMP0002', 'EMP0002')
+    assert [(error['row'], error['error']) for error in result['errors']] == [
+        (3, "email already belongs to an existing employee"),
+        (4, "unknown position code"),
+        (5, "basic_salary is not a number"),
+    ]
+
+    result = import_employees(conn, rows.iloc[[0]].assign(email='asha2@example.com'), created_by=1)
+    assert result['first_employee_id'] == 'EMP0003'
+    assert conn.execute("SELECT employee_id, email FROM employees ORDER BY id").fetchall() == [
+        ('EMP0001', 'taken@example.com'), ('EMP0002', 'asha@example.com'), ('EMP0003', 'asha2@example.com')]
+    conn.close()
@@ -0,0 +1,104 @@
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+import migrations
+from employee_ids import next_employee_id
+from employee_search import employee_filter
+from migrations import SCHEMA_VERSION, migrate, schema_version
+
+# database/hrms.db is the schema as shipped before migrations existed (user_version 0)
+LEGACY_DB = Path(__file__).resolve().parent.parent / "database" / "hrms.db"
+
+
+@pytest.fixture
+def legacy(tmp_path):
+    # Rows the old app could leave behind: a payroll period generated twice, a day uploaded twice,
+    # dates and times as typed, and codes with gaps
+    path = tmp_path / "hrms.db"
+    shutil.copy(LEGACY_DB, path)
+    conn = sqlite3.connect(path)
+    assert schema_version(conn) == 0
+    conn.executemany("""
+        INSERT INTO employees (employee_id, first_name, last_name, email, basic_salary, hra, conveyance, status)
+        VALUES (?, ?, 'Rao', ?, 30000, 12000, 1600, ?)
+    """, [('EMP0001', 'Asha', 'asha@example.com', 'active'), ('EMP0007', 'Ravi', 'ravi@example.com', 'inactive')])
+    conn.executemany("""
+        INSERT INTO attendance (employee_id, date, check_in, check_out, status) VALUES (1, ?, ?, ?, ?)
+    """, [
+        ('1/5/2026', '9:00', '18:00', 'present'),
+        ('2026-01-05', '09:00', '12:00', 'present'),
+        ('2026-01-06 00:00:00', '9:00 AM', '1:30 PM', 'present'),
+        ('1/7/2026', '0:00', '0:00', 'present'),
+        ('1/8/2026', '9:00:00', '18:00:00', 'leave'),
+    ])
+    conn.executemany("""
+        INSERT INTO payroll (employee_id, month, year, basic, gross, net_salary) VALUES (1, 12, 2025, ?, ?, ?)
+    """, [(29000, 40000, 38000), (30000, 43600, 41000)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_legacy_database_is_brought_to_the_current_schema(legacy):
+    assert migrate(legacy) == SCHEMA_VERSION
+    assert schema_version(legacy) == SCHEMA_VERSION
+
+    # The newest of the duplicate rows is kept; dates and times are canonical and the hours,
+    # status and paid fraction are backfilled from the punches
+    assert legacy.execute("""
+        SELECT date, check_in, check_out, hours_worked, status, paid_fraction FROM attendance ORDER BY date
+    """).fetchall() == [
+        ('2026-01-05', '09:00', '12:00', 3.0, 'half_day', 0.5),
+        ('2026-01-06', '09:00', '13:30', 4.5, 'half_day', 0.5),
+        ('2026-01-07', '00:00', '00:00', 0.0, 'absent', 0.0),
+        ('2026-01-08', '09:00', '18:00', 9.0, 'leave', 1.0),
+    ]
+    assert legacy.execute("SELECT basic, gross, input_hash FROM payroll").fetchall() == [(30000, 43600, None)]
+
+    # Summary tables start out matching the base tables
+    assert legacy.execute("SELECT date, recorded, attended FROM stats_attendance_daily ORDER BY date").fetchall() == [
+        ('2026-01-05', 1, 1), ('2026-01-06', 1, 1), ('2026-01-07', 1, 0), ('2026-01-08', 1, 0)]
+    assert legacy.execute("SELECT year, month, employees, gross FROM stats_payroll_period").fetchall() == [
+        (2025, 12, 1, 43600)]
+    assert legacy.execute("SELECT status, employees FROM stats_headcount ORDER BY status").fetchall() == [
+        ('active', 1), ('inactive', 1)]
+
+    # Existing salaries become the first revision, statutory rules are seeded, and new codes
+    # continue after the highest one in use
+    assert legacy.execute("SELECT employee_id, effective_from, basic_salary FROM salary_revisions").fetchall() == [
+        (1, '0001-01-01', 30000), (2, '0001-01-01', 30000)]
+    assert legacy.execute("SELECT COUNT(*) FROM statutory_rates").fetchone()[0] > 0
+    with legacy:
+        assert next_employee_id(legacy) == 'EMP0008'
+
+    where, params = employee_filter(legacy, 'rav')
+    assert legacy.execute(f"SELECT e.employee_id FROM employees e WHERE {where}", params).fetchall() == [('EMP0007',)]
+
+
+def test_migrating_again_changes_nothing(legacy):
+    migrate(legacy)
+    schema = legacy.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+    assert migrate(legacy) == SCHEMA_VERSION
+    assert legacy.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall() == schema
+
+
+def test_failed_migration_rolls_back_to_the_last_version(legacy, monkeypatch):
+    def broken(cursor):
+        cursor.execute("CREATE TABLE half_done (id INTEGER)")
+        raise sqlite3.OperationalError("disk full")
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS[:3] + [broken])
+    monkeypatch.setattr(migrations, 'SCHEMA_VERSION', 4)
+    with pytest.raises(sqlite3.OperationalError):
+        migrations.migrate(legacy)
+    assert schema_version(legacy) == 3
+    assert legacy.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+
+
+def test_newer_database_is_refused(legacy):
+    legacy.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    with pytest.raises(RuntimeError):
+        migrate(legacy)
@@ -0,0 +1,94 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import db
+import payroll_engine
+import statutory
+from database_setup import create_database
+from payroll_engine import compute_payroll, load_payroll_inputs
+from periods import month_bounds
+from salary_history import add_salary_revision
+from statutory import load_statutory_rules, rules_for_period
+
+DEDUCTIONS = ['pf', 'esic', 'professional_tax', 'tds']
+
+
+@pytest.fixture
+def period_rules(tmp_path):
+    create_database(tmp_path / "hrms.db")
+    conn = db.connect(tmp_path / "hrms.db")
+    try:
+        return rules_for_period(load_statutory_rules(conn), month_bounds(2026, 1)[0])
+    finally:
+        conn.close()
+
+
+def payroll_for(period_rules, payable_days, basic=100000.0, hra=40000.0, conveyance=5000.0):
+    inputs = pd.DataFrame({'employee_id': [1], 'basic_salary': [basic], 'hra': [hra],
+                           'conveyance': [conveyance], 'payable_days': [float(payable_days)]})
+    return compute_payroll(inputs, 1, 2026, period_rules).iloc[0]
+
+
+def test_full_month_tds(period_rules):
+    row = payroll_for(period_rules, 31)
+    assert row['gross'] == 145000
+    assert row['tds'] == 11527
+
+
+def test_partial_month_withholds_on_earned_pay(period_rules):
+    row = payroll_for(period_rules, 2)
+    assert row['gross'] == pytest.approx(9354.84)
+    assert row['tds'] == 0
+    assert row['net_salary'] >= 0
+    assert row['net_salary'] == pytest.approx(row['gross'] - row[DEDUCTIONS].sum())
+
+
+def test_zero_days_pays_and_deducts_nothing(period_rules):
+    row = payroll_for(period_rules, 0)
+    assert row['gross'] == 0
+    assert (row[DEDUCTIONS] == 0).all()
+    assert row['net_salary'] == 0
+
+
+def test_marginal_relief_above_rebate_limit(period_rules):
+    # 107,000 a month is 12.09L taxable after the standard deduction: tax is capped at the 9,000
+    # over the 12L rebate limit, plus cess, spread over twelve months
+    row = payroll_for(period_rules, 31, basic=107000.0, hra=0.0, conveyance=0.0)
+    assert row['tds'] == 780
+
+
+def test_mid_month_raise_is_paid_from_its_effective_date(tmp_path):
+    create_database(tmp_path / "hrms.db")
+    conn = db.connect(tmp_path / "hrms.db")
+    conn.execute("""
+        INSERT INTO employees (employee_id, first_name, last_name, email, basic_salary, hra, conveyance, status)
+        VALUES ('EMP0001', 'A', 'B', 'a@example.com', 31000, 0, 0, 'active')
+    """)
+    conn.executemany("INSERT INTO attendance (employee_id, date, status, paid_fraction) VALUES (1, ?, 'present', 1)",
+                     [(f"2026-01-{day:02d}",) for day in range(1, 32)])
+    conn.commit()
+    add_salary_revision(conn, 1, date(2026, 1, 20), 62000, 0, 0)
+
+    inputs = load_payroll_inputs(conn, 1, 2026)
+    conn.close()
+    # A full month at the blended rate pays 19 days at 31,000 a month and 12 days at 62,000
+    assert inputs['basic_salary'].iloc[0] == pytest.approx(19 * 1000 + 12 * 2000)
+
+
+def test_formula_change_recomputes_stored_rows(tmp_path, monkeypatch):
+    create_database(tmp_path / "hrms.db")
+    conn = db.connect(tmp_path / "hrms.db")
+    conn.executemany("""
+        INSERT INTO employees (employee_id, first_name, last_name, email, basic_salary, hra, conveyance, status)
+        VALUES (?, 'A', 'B', ?, 100000, 40000, 5000, 'active')
+    """, [(f"EMP{i:04d}", f"emp{i}@example.com") for i in (1, 2)])
+    conn.commit()
+    assert payroll_engine.generate_payroll(conn, 1, 2026, 1)['recomputed'] == 2
+    assert payroll_engine.generate_payroll(conn, 1, 2026, 1)['recomputed'] == 0
+
+    # Same rules, different formulas: the stored hashes no longer match
+    monkeypatch.setattr(statutory, 'CALCULATION_VERSION', statutory.CALCULATION_VERSION + 1)
+    assert payroll_engine.generate_payroll(conn, 1, 2026, 1)['recomputed'] == 2
+    conn.close()
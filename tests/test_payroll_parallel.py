@@ -0,0 +1,67 @@
+import shutil
+from datetime import date
+
+import pytest
+
+import db
+import payroll_engine
+from attendance_import import import_attendance
+from benchmarks.synthetic import populate_organisation, synthetic_month_attendance
+from database_setup import create_database
+from salary_history import add_salary_revision
+
+EMPLOYEES = 120
+
+PAYROLL_ROWS = """
+    SELECT employee_id, month, year, payable_days, basic, hra, conveyance, gross, pf, esic,
+           professional_tax, tds, net_salary, input_hash
+    FROM payroll ORDER BY year, month, employee_id
+"""
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    # Two companies of two departments, a month of attendance and one mid-month raise
+    path = tmp_path / "hrms.db"
+    create_database(path)
+    conn = db.connect(path)
+    populate_organisation(conn, EMPLOYEES, companies=2, departments=2, positions=2)
+    import_attendance(conn, synthetic_month_attendance(1, EMPLOYEES, 2026, 1, attendance_rate=0.8), uploaded_by=1)
+    add_salary_revision(conn, 7, date(2026, 1, 15), 95000, 38000, 1600)
+    conn.close()
+    return path
+
+
+def payroll_rows(path, month, year, **kwargs):
+    conn = db.connect(path)
+    try:
+        result = payroll_engine.generate_payroll(conn, month, year, 1, **kwargs)
+        return result, conn.execute(PAYROLL_ROWS).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('partition_by', ['company', 'department'])
+def test_workers_write_the_same_rows_as_a_serial_run(db_path, tmp_path, partition_by):
+    parallel_path = tmp_path / "parallel.db"
+    shutil.copy(db_path, parallel_path)
+
+    serial, serial_rows = payroll_rows(db_path, 1, 2026)
+    parallel, parallel_rows = payroll_rows(parallel_path, 1, 2026, workers=2, partition_by=partition_by)
+    assert serial['employees'] == parallel['employees'] == EMPLOYEES
+    assert len(serial_rows) == EMPLOYEES
+    assert parallel_rows == serial_rows
+
+
+def test_parallel_rerun_recomputes_only_changed_employees(db_path):
+    payroll_rows(db_path, 1, 2026, workers=2)
+    conn = db.connect(db_path)
+    add_salary_revision(conn, 3, date(2026, 1, 1), 50000, 20000, 1600)
+    add_salary_revision(conn, 90, date(2026, 1, 1), 60000, 24000, 1600)
+    conn.close()
+
+    result, rows = payroll_rows(db_path, 1, 2026, workers=2)
+    assert result['recomputed'] == 2
+    assert result['unchanged'] == EMPLOYEES - 2
+    _, serial_rows = payroll_rows(db_path, 1, 2026, full=True)
+    assert rows == serial_rows
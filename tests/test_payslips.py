@@ -0,0 +1,76 @@
+import re
+import zipfile
+
+import pandas as pd
+import pytest
+
+import db
+import payroll_engine
+from attendance_import import import_attendance
+from database_setup import create_database
+from payslips import generate_payslips
+
+
+@pytest.fixture
+def conn(tmp_path):
+    create_database(tmp_path / "hrms.db")
+    conn = db.connect(tmp_path / "hrms.db")
+    conn.executemany("""
+        INSERT INTO employees (employee_id, first_name, last_name, email, basic_salary, hra, conveyance, status)
+        VALUES (?, ?, 'Rao (Jr)', ?, 31000, 12400, 1600, 'active')
+    """, [('EMP0001', 'Asha', 'asha@example.com'), ('EMP0002', 'Ravi', 'ravi@example.com')])
+    conn.commit()
+    import_attendance(conn, pd.DataFrame({
+        'employee_id': ['EMP0001'] * 31 + ['EMP0002'] * 20,
+        'date': [f"2026-01-{day:02d}" for day in range(1, 32)] + [f"2026-01-{day:02d}" for day in range(1, 21)],
+        'check_in': '09:00', 'check_out': '18:00',
+    }), uploaded_by=1)
+    payroll_engine.generate_payroll(conn, 1, 2026, 1)
+    yield conn
+    conn.close()
+
+
+def check_pdf(pdf):
+    # The structure a reader relies on: header and trailer, every xref offset landing on its
+    # object, startxref on the xref table and a stream /Length matching the stream
+    assert pdf.startswith(b"%PDF-1.4\n")
+    assert pdf.endswith(b"%%EOF\n")
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", pdf).group(1))
+    assert pdf[startxref:].startswith(b"xref\n")
+    count = int(re.match(rb"xref\n0 (\d+)\n", pdf[startxref:]).group(1))
+    entries = re.findall(rb"(\d{10}) 00000 n \n", pdf[startxref:])
+    assert len(entries) == count - 1
+    for number, offset in enumerate(entries, start=1):
+        assert pdf[int(offset):].startswith(b"%d 0 obj\n" % number)
+    assert re.search(rb"trailer\n<< /Size %d /Root 1 0 R >>" % count, pdf)
+    length, stream = re.search(rb"<< /Length (\d+) >>\nstream\n(.*)\nendstream\n", pdf, re.S).groups()
+    assert int(length) == len(stream)
+    return stream
+
+
+def test_each_payslip_is_a_valid_pdf_with_its_amounts(conn, tmp_path):
+    result = generate_payslips(conn, 1, 2026, tmp_path)
+    assert result['payslips'] == 2
+
+    with zipfile.ZipFile(result['archive']) as archive:
+        assert sorted(archive.namelist()) == ['EMP0001.pdf', 'EMP0002.pdf', 'index.csv']
+        pdf = archive.read('EMP0002.pdf')
+        index = archive.read('index.csv').decode('utf-8').splitlines()
+    assert (tmp_path / "payslips-2026-01" / "EMP0002.pdf").read_bytes() == pdf
+    assert index[0] == 'employee_id,name,department,net_salary,file'
+
+    stream = check_pdf(pdf)
+    net = conn.execute("SELECT net_salary FROM payroll WHERE employee_id = 2").fetchone()[0]
+    assert b"(Payslip for January 2026)" in stream
+    assert b"(Ravi Rao \\(Jr\\))" in stream
+    assert b"(20 of 31)" in stream
+    assert f"{net:>14,.2f}".encode() in stream
+
+
+def test_workers_render_the_same_files(conn, tmp_path):
+    serial = generate_payslips(conn, 1, 2026, tmp_path / "serial")
+    parallel = generate_payslips(conn, 1, 2026, tmp_path / "parallel", workers=2)
+    with zipfile.ZipFile(serial['archive']) as one, zipfile.ZipFile(parallel['archive']) as other:
+        assert one.namelist() == other.namelist()
+        for name in one.namelist():
+            assert one.read(name) == other.read(name)
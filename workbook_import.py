@@ -0,0 +1,380 @@
+import re
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.parsers import expat
+from datetime import date, timedelta
+import pandas as pd
+
+from attendance_import import TIME_LABELS, import_attendance, to_nullable
+
+# Reader for the macro-enabled payroll workbook (Payroll Data.xlsm) and workbooks laid out like it.
+# Sheets are streamed straight out of the zip with expat and only mapped columns are decoded,
+# which skips openpyxl's per-cell objects and the VBA, styles and calc chain it loads alongside.
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+# Element names as expat reports them with namespace_separator=' '
+ROW_TAG = f'{MAIN_NS[1:-1]} row'
+CELL_TAG = f'{MAIN_NS[1:-1]} c'
+TEXT_TAGS = {f'{MAIN_NS[1:-1]} v', f'{MAIN_NS[1:-1]} t'}
+
+EXCEL_EPOCH = date(1899, 12, 30)
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+MONTH_PATTERN = '(?P<month>' + '|'.join(MONTHS) + ')'
+
+# Attendance register status codes; codes not listed (NJ = not joined, LWD = after last
+# working day) mean the employee wasn't on the rolls that day and are skipped
+STATUS_CODES = {
+    'P': 'present',
+    'P/2': 'half_day',
+    'A': 'absent',
+    'LWP': 'absent',
+    'Off': 'off',
+    'H': 'holiday',
+    'CL': 'leave',
+    'SL': 'leave',
+}
+
+# Which sheets feed which table. Columns are sheet column letters with a value kind, since
+# header rows in the workbook are merged, repeated and misspelt. Attendance registers are
+# wide: one block of `day_width` columns per day of the month, starting at `first_day`.
+WORKBOOK_SHEETS = [
+    {
+        'table': 'employees',
+        'sheets': r'^Data$',
+        'first_row': 8,
+        'columns': {
+            'employee_id': ('C', 'code'), 'name': ('D', 'text'), 'designation': ('F', 'text'),
+            'date_of_birth': ('O', 'date'), 'date_of_joining': ('P', 'date'),
+            'basic_salary': ('AH', 'number'), 'hra': ('AI', 'number'), 'conveyance': ('AJ', 'number'),
+            'esic': ('AO', 'number'), 'pf': ('AS', 'number'),
+        },
+    },
+    {
+        'table': 'employees',
+        'sheets': r'^SMS - Data$',
+        'first_row': 8,
+        'columns': {
+            'employee_id': ('B', 'code'), 'name': ('C', 'text'), 'designation': ('E', 'text'),
+            'date_of_birth': ('N', 'date'), 'date_of_joining': ('O', 'date'),
+            'basic_salary': ('AG', 'number'), 'hra': ('AH', 'number'), 'conveyance': ('AI', 'number'),
+            'esic': ('AN', 'number'), 'pf': ('AR', 'number'),
+        },
+    },
+    {
+        'table': 'attendance',
+        'sheets': rf'^(?:SMS-)?{MONTH_PATTERN}-Att$',
+        'first_row': 9,
+        'columns': {'employee_id': ('C', 'code')},
+        'first_day': 'F',
+        'day_width': 4,
+        'day_columns': {'check_in': (0, 'time'), 'check_out': (1, 'time'), 'status': (3, 'text')},
+    },
+    {
+        'table': 'payroll',
+        'sheets': rf'^(?:SMS-)?{MONTH_PATTERN}-Pay$',
+        'first_row': 9,
+        'columns': {
+            'employee_id': ('C', 'code'), 'payable_days': ('Q', 'number'),
+            'basic': ('AF', 'number'), 'hra': ('AG', 'number'), 'conveyance': ('AH', 'number'),
+            'esic': ('AM', 'number'), 'pf': ('AO', 'number'),
+            'gross': ('AS', 'number'), 'net_salary': ('AU', 'number'),
+        },
+    },
+]
+
+
+def column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def column_letters(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class Workbook:
+    # Sheet index and shared strings of an .xlsx/.xlsm; sheet data is only read by iter_rows
+
+    def __init__(self, path):
+        self.archive = zipfile.ZipFile(path)
+        workbook = ET.fromstring(self.archive.read('xl/workbook.xml'))
+        targets = {rel.get('Id'): rel.get('Target')
+                   for rel in ET.fromstring(self.archive.read('xl/_rels/workbook.xml.rels'))}
+        self.sheets = {}
+        for sheet in workbook.iter(f'{MAIN_NS}sheet'):
+            target = targets[sheet.get(f'{REL_NS}id')]
+            self.sheets[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+        self.strings = []
+        if 'xl/sharedStrings.xml' in self.archive.namelist():
+            with self.archive.open('xl/sharedStrings.xml') as handle:
+                for _, element in ET.iterparse(handle):
+                    if element.tag == f'{MAIN_NS}si':
+                        self.strings.append(''.join(element.itertext()))
+                        element.clear()
+
+    def close(self):
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _value(self, kind, text):
+        if kind == 'inlineStr' or kind in ('str', 'd'):
+            return text
+        if text == '' or kind == 'e':
+            return None
+        if kind == 's':
+            return self.strings[int(text)]
+        if kind == 'b':
+            return text == '1'
+        return float(text)
+
+    def iter_rows(self, sheet, columns, first_row=1):
+        # Yields (row number, {column letter: raw value}) for the wanted columns only.
+        # Dates and times come back as Excel serial numbers; see convert(). Plain expat, with
+        # text handlers attached only inside wanted cells: most of a sheet is formulas and
+        # styles that never need to reach Python.
+        wanted = set(columns)
+        parser = expat.ParserCreate(namespace_separator=' ')
+        parser.buffer_text = True
+        rows = []
+        values = None
+        cell = None
+
+        def text(data):
+            cell[1].append(data)
+
+        def end(name):
+            parser.CharacterDataHandler = None
+            parser.EndElementHandler = None
+
+        def start(name, attrs):
+            # Called for every element in the sheet, so checks run most-frequent first
+            nonlocal values, cell
+            if name == CELL_TAG:
+                letters = attrs.get('r', '').rstrip('0123456789')
+                cell = None
+                if values is not None and letters in wanted:
+                    cell = values[letters] = [attrs.get('t'), []]
+            elif cell is not None and name in TEXT_TAGS:
+                parser.CharacterDataHandler = text
+                parser.EndElementHandler = end
+            elif name == ROW_TAG:
+                number = int(attrs['r'])
+                values = {} if number >= first_row else None
+                if values is not None:
+                    rows.append((number, values))
+
+        parser.StartElementHandler = start
+        with self.archive.open(self.sheets[sheet]) as handle:
+            while True:
+                chunk = handle.read(1 << 16)
+                parser.Parse(chunk, not chunk)
+                # The last row may continue in the next chunk, so it waits unless the sheet is done
+                complete = rows if not chunk else rows[:-1]
+                for number, cells in complete:
+                    yield number, {letters: self._value(kind, ''.join(parts))
+                                   for letters, (kind, parts) in cells.items()}
+                del rows[:len(complete)]
+                if not chunk:
+                    break
+
+
+def convert(values, kind):
+    # Column of raw cell values to what the database stores for that kind
+    series = pd.Series(values, dtype=object)
+    if kind == 'text':
+        text = series.map(lambda value: None if value is None else str(value).strip())
+        return text.where(text != '')
+    numbers = pd.to_numeric(series, errors='coerce')
+    if kind == 'number':
+        return numbers
+    if kind == 'code':
+        # Employee codes are stored as numbers in the sheet; 10001.0 -> '10001'
+        codes = series.map(lambda value: str(value).strip() if isinstance(value, str) else None)
+        whole = numbers.notna() & (numbers == numbers.round())
+        codes[whole] = numbers[whole].astype('int64').astype(str)
+        return codes.where(codes != '')
+    if kind == 'date':
+        days = numbers.where(numbers > 0)
+        return (pd.Timestamp(EXCEL_EPOCH) + pd.to_timedelta(days, unit='D')).dt.strftime('%Y-%m-%d')
+    if kind == 'time':
+        # Fraction of a day; midnight is how the register marks "no punch"
+        minutes = (numbers % 1 * 24 * 60).round()
+        minutes = minutes.where(minutes > 0)
+        labels = pd.Series(TIME_LABELS[minutes.fillna(0).astype('int64').to_numpy() % (24 * 60)],
+                           index=series.index)
+        return labels.where(minutes.notna())
+    raise ValueError(f"Unknown column kind: {kind}")
+
+
+def read_sheet(book, sheet, mapping):
+    # Mapped columns of one sheet as a DataFrame, one row per sheet row with an employee code.
+    # Attendance registers come back long already: one row per employee and day, with a `day` column.
+    columns = mapping['columns']
+    code_letters = columns['employee_id'][0]
+    wanted = [letters for letters, _ in columns.values()]
+    day_columns = {}
+    if 'first_day' in mapping:
+        first = column_index(mapping['first_day'])
+        for day in range(1, 32):
+            day_columns[day] = [
+                (field, column_letters(first + (day - 1) * mapping['day_width'] + offset))
+                for field, (offset, _) in mapping['day_columns'].items()
+            ]
+            wanted.extend(letters for _, letters in day_columns[day])
+
+    raw = {field: [] for field in [*columns, *mapping.get('day_columns', {})]}
+    days = []
+    for _, values in book.iter_rows(sheet, wanted, mapping['first_row']):
+        if values.get(code_letters) is None:
+            continue
+        for day, fields in (day_columns.items() or [(None, [])]):
+            for field, (letters, _) in columns.items():
+                raw[field].append(values.get(letters))
+            for field, letters in fields:
+                raw[field].append(values.get(letters))
+            days.append(day)
+
+    # One conversion per field over the whole sheet rather than per column of the register
+    kinds = {field: kind for field, (_, kind) in [*columns.items(), *mapping.get('day_columns', {}).items()]}
+    data = pd.DataFrame({field: convert(values, kinds[field]) for field, values in raw.items()})
+    if day_columns:
+        data['day'] = days
+    return data[data['employee_id'].notna()].reset_index(drop=True)
+
+
+def _sheet_month(mapping, sheet):
+    return MONTHS.index(re.match(mapping['sheets'], sheet).group('month')) + 1
+
+
+def attendance_rows(data, year, month):
+    # Register days past the end of the month (e.g. 29-31 on the Feb sheet) are dropped
+    last_day = (date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)).day
+    data = data[data['day'] <= last_day]
+    return pd.DataFrame({
+        'employee_id': data['employee_id'],
+        'date': [f"{year:04d}-{month:02d}-{day:02d}" for day in data['day'].tolist()],
+        'check_in': data['check_in'],
+        'check_out': data['check_out'],
+        'status': data['status'].map(STATUS_CODES),
+    }).dropna(subset=['status'])
+
+
+def _import_employees(conn, data):
+    names = data['name'].fillna('').str.split(n=1, expand=True).reindex(columns=[0, 1])
+    positions = dict(conn.execute("SELECT LOWER(title), id FROM positions").fetchall())
+    position_ids = data['designation'].str.lower().map(positions)
+    rows = zip(
+        data['employee_id'].tolist(),
+        names[0].fillna('').tolist(),
+        names[1].fillna('').tolist(),
+        to_nullable(data['date_of_birth']).tolist(),
+        to_nullable(data['date_of_joining']).tolist(),
+        to_nullable(position_ids).tolist(),
+        *(to_nullable(data[col]).tolist() for col in ['basic_salary', 'hra', 'conveyance', 'pf', 'esic']),
+    )
+    with conn:
+        # Re-importing refreshes names and salary structure; a position picked in the app is kept
+        conn.executemany("""
+            INSERT INTO employees (employee_id, first_name, last_name, date_of_birth, date_of_joining,
+                                   position_id, basic_salary, hra, conveyance, pf, esic)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (employee_id) DO UPDATE SET
+                first_name = excluded.first_name,
+                last_name = excluded.last_name,
+                date_of_birth = excluded.date_of_birth,
+                date_of_joining = excluded.date_of_joining,
+                position_id = COALESCE(employees.position_id, excluded.position_id),
+                basic_salary = excluded.basic_salary,
+                hra = excluded.hra,
+                conveyance = excluded.conveyance,
+                pf = excluded.pf,
+                esic = excluded.esic
+        """, rows)
+    return len(data)
+
+
+def _import_payroll(conn, data, year, month, generated_by):
+    data = data[data['payable_days'].notna()]
+    mapping = dict(conn.execute("SELECT employee_id, id FROM employees").fetchall())
+    employee_ids = data['employee_id'].map(mapping)
+    data = data[employee_ids.notna()]
+    count = len(data)
+    rows = zip(
+        employee_ids[employee_ids.notna()].astype('int64').tolist(),
+        [month] * count,
+        [year] * count,
+        *(to_nullable(data[col]).tolist() for col in
+          ['payable_days', 'basic', 'hra', 'conveyance', 'gross', 'pf', 'esic', 'net_salary']),
+        [generated_by] * count,
+    )
+    with conn:
+        # Historical registers carry no input hash, so a later payroll run for the month recomputes them
+        conn.executemany("""
+            INSERT INTO payroll (employee_id, month, year, payable_days, basic, hra, conveyance,
+                                 gross, pf, esic, net_salary, input_hash, generated_by)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)
+            ON CONFLICT (employee_id, month, year) DO UPDATE SET
+                payable_days = excluded.payable_days,
+                basic = excluded.basic,
+                hra = excluded.hra,
+                conveyance = excluded.conveyance,
+                gross = excluded.gross,
+                pf = excluded.pf,
+                esic = excluded.esic,
+                net_salary = excluded.net_salary,
+                input_hash = NULL,
+                generated_by = excluded.generated_by,
+                generated_at = CURRENT_TIMESTAMP
+        """, rows)
+    return count
+
+
+def workbook_sheets(book, mappings=WORKBOOK_SHEETS):
+    # (sheet, mapping) pairs in import order: employees before the sheets that refer to them
+    order = {'employees': 0, 'attendance': 1, 'payroll': 2}
+    matched = [(sheet, mapping) for mapping in mappings for sheet in book.sheets
+               if re.match(mapping['sheets'], sheet)]
+    return sorted(matched, key=lambda pair: order[pair[1]['table']])
+
+
+def import_workbook(conn, path, uploaded_by, year, mappings=WORKBOOK_SHEETS, progress=None):
+    # Each sheet is one batch, committed on its own; `year` dates the month-named sheets
+    start = time.perf_counter()
+    result = {'sheets': [], 'employees': 0, 'attendance': 0, 'payroll': 0, 'unknown_employees': set()}
+    with Workbook(path) as book:
+        sheets = workbook_sheets(book, mappings)
+        for done, (sheet, mapping) in enumerate(sheets, start=1):
+            data = read_sheet(book, sheet, mapping)
+            table = mapping['table']
+            if table == 'employees':
+                result['employees'] += _import_employees(conn, data)
+            elif table == 'attendance':
+                imported = import_attendance(conn, attendance_rows(data, year, _sheet_month(mapping, sheet)),
+                                             uploaded_by)
+                result['attendance'] += imported['rows_imported']
+                result['unknown_employees'].update(imported['unknown_employees'])
+            else:
+                result['payroll'] += _import_payroll(conn, data, year, _sheet_month(mapping, sheet), uploaded_by)
+            result['sheets'].append(sheet)
+            if progress:
+                progress(int(done * 100 / len(sheets)))
+
+    result['unknown_employees'] = sorted(result['unknown_employees'])
+    result['seconds'] = time.perf_counter() - start
+    return result